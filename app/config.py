@@ -7,7 +7,7 @@ different environments (development, testing, production) and .env files.
 
 import os
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -32,11 +32,85 @@ class APIConfig(BaseModel):
     version: str
     description: str
     cors_origins: list[str]
+    max_batch_size: int
+    admin_token: Optional[str] = None
 
 class ModelConfig(BaseModel):
     """Configuration for ML models."""
     model_path: str
     preprocessors_path: str
+    engine: str
+    sparse_batch_features: bool
+    feature_builder: str
+    artifact_format: str
+    arrays_path: str
+
+class MicroBatchingConfig(BaseModel):
+    """Configuration for micro-batching of single-resume requests."""
+    enabled: bool
+    window_ms: float
+    max_batch_size: int
+
+class InferenceExecutorConfig(BaseModel):
+    """Configuration for the pool that runs inference off the event loop."""
+    mode: str
+    max_workers: int
+    max_queue_size: int
+
+class CacheConfig(BaseModel):
+    """Configuration for the prediction cache."""
+    enabled: bool
+    backend: str
+    max_entries: int
+    ttl_seconds: float
+    redis_url: Optional[str] = None
+    # Term counts of distinct text fragments kept for TF-IDF (0 disables; layout feature builder only)
+    text_fragment_max_entries: int = 0
+
+class StreamingConfig(BaseModel):
+    """Configuration for streamed NDJSON classification."""
+    chunk_size: int
+    max_line_bytes: int
+
+class RegistryConfig(BaseModel):
+    """Configuration for the model registry (hot reload of model versions)."""
+    enabled: bool
+    path: str
+    poll_interval_seconds: float
+    history_size: int
+    pinned_version: Optional[str] = None
+
+class ExperimentsConfig(BaseModel):
+    """Configuration for shadow and A/B evaluation of candidate model versions."""
+    shadow_models: List[str] = []
+    shadow_queue_size: int
+    ab_candidate: Optional[str] = None
+    ab_weight: float = 0.0
+
+class MetricsConfig(BaseModel):
+    """Configuration for the per-stage latency metrics exposed on /metrics."""
+    enabled: bool
+
+class ProfilingConfig(BaseModel):
+    """Configuration for on-demand profiling of classification requests."""
+    sample_rate: float
+    output_dir: str
+    max_files: int
+
+class ResumeStoreConfig(BaseModel):
+    """Configuration for the stored resumes behind incremental re-classification."""
+    max_entries: int
+
+class FeedbackConfig(BaseModel):
+    """Configuration for the log of recruiter feedback used to retrain the model."""
+    enabled: bool
+    path: str
+
+class ServerConfig(BaseModel):
+    """Configuration for the preforking production server."""
+    host: str
+    port: int
+    workers: int
 
 class Config(BaseModel):
     """Main configuration class."""
@@ -45,6 +119,17 @@ class Config(BaseModel):
     api: APIConfig
     log: LogConfig
     model: ModelConfig
+    micro_batching: MicroBatchingConfig
+    inference_executor: InferenceExecutorConfig
+    cache: CacheConfig
+    streaming: StreamingConfig
+    server: ServerConfig
+    registry: RegistryConfig
+    experiments: ExperimentsConfig
+    metrics: MetricsConfig
+    profiling: ProfilingConfig
+    resume_store: ResumeStoreConfig
+    feedback: FeedbackConfig
 
 # Default configurations
 default_config = {
@@ -58,7 +143,8 @@ default_config = {
                 "http://localhost",
                 "http://localhost:4200",
                 "https://talent-flow-webapp.web.app"
-            ]
+            ],
+            "max_batch_size": 1000
         },
         "log": {
             "level": "DEBUG",
@@ -66,7 +152,62 @@ default_config = {
         },
         "model": {
             "model_path": "ml/talent_flow_classifier.pkl",
-            "preprocessors_path": "ml/talent_flow_preprocessors.pkl"
+            "preprocessors_path": "ml/talent_flow_preprocessors.pkl",
+            "engine": "compiled",
+            "sparse_batch_features": True,
+            "feature_builder": "layout",
+            "artifact_format": "pickle",
+            "arrays_path": "ml/talent_flow_arrays"
+        },
+        "micro_batching": {
+            "enabled": False,
+            "window_ms": 2.0,
+            "max_batch_size": 64
+        },
+        "inference_executor": {
+            "mode": "thread",
+            "max_workers": 4,
+            "max_queue_size": 64
+        },
+        "cache": {
+            "enabled": True,
+            "backend": "memory",
+            "max_entries": 10000,
+            "ttl_seconds": 3600,
+            "text_fragment_max_entries": 20000
+        },
+        "streaming": {
+            "chunk_size": 256,
+            "max_line_bytes": 1048576
+        },
+        "server": {
+            "host": "0.0.0.0",
+            "port": 8000,
+            "workers": 1
+        },
+        "registry": {
+            "enabled": False,
+            "path": "ml/talent_flow_arrays",
+            "poll_interval_seconds": 5.0,
+            "history_size": 1
+        },
+        "experiments": {
+            "shadow_queue_size": 256
+        },
+        "metrics": {
+            "enabled": True
+        },
+        "profiling": {
+            "sample_rate": 0.0,
+            "output_dir": "profiles",
+            "max_files": 100
+        },
+        "resume_store": {
+            "max_entries": 10000
+        },
+        "feedback": {
+            "enabled": True,
+            "path": "feedback/feedback.jsonl"
         }
     },
     Environment.TESTING: {
@@ -78,7 +219,8 @@ default_config = {
             "cors_origins": [
                 "http://localhost",
                 "http://localhost:4200"
-            ]
+            ],
+            "max_batch_size": 1000
         },
         "log": {
             "level": "INFO",
@@ -86,7 +228,62 @@ default_config = {
         },
         "model": {
             "model_path": "ml/talent_flow_classifier.pkl",
-            "preprocessors_path": "ml/talent_flow_preprocessors.pkl"
+            "preprocessors_path": "ml/talent_flow_preprocessors.pkl",
+            "engine": "compiled",
+            "sparse_batch_features": True,
+            "feature_builder": "layout",
+            "artifact_format": "pickle",
+            "arrays_path": "ml/talent_flow_arrays"
+        },
+        "micro_batching": {
+            "enabled": False,
+            "window_ms": 2.0,
+            "max_batch_size": 64
+        },
+        "inference_executor": {
+            "mode": "thread",
+            "max_workers": 2,
+            "max_queue_size": 32
+        },
+        "cache": {
+            "enabled": False,
+            "backend": "memory",
+            "max_entries": 1000,
+            "ttl_seconds": 60,
+            "text_fragment_max_entries": 1000
+        },
+        "streaming": {
+            "chunk_size": 32,
+            "max_line_bytes": 1048576
+        },
+        "server": {
+            "host": "0.0.0.0",
+            "port": 8000,
+            "workers": 1
+        },
+        "registry": {
+            "enabled": False,
+            "path": "ml/talent_flow_arrays",
+            "poll_interval_seconds": 1.0,
+            "history_size": 1
+        },
+        "experiments": {
+            "shadow_queue_size": 256
+        },
+        "metrics": {
+            "enabled": True
+        },
+        "profiling": {
+            "sample_rate": 0.0,
+            "output_dir": "profiles",
+            "max_files": 100
+        },
+        "resume_store": {
+            "max_entries": 1000
+        },
+        "feedback": {
+            "enabled": True,
+            "path": "feedback/feedback.jsonl"
         }
     },
     Environment.PRODUCTION: {
@@ -97,7 +294,8 @@ default_config = {
             "description": "API for classifying resumes by experience level",
             "cors_origins": [
                 "https://talent-flow-webapp.web.app"
-            ]
+            ],
+            "max_batch_size": 5000
         },
         "log": {
             "level": "WARNING",
@@ -106,7 +304,62 @@ default_config = {
         },
         "model": {
             "model_path": "ml/talent_flow_classifier.pkl",
-            "preprocessors_path": "ml/talent_flow_preprocessors.pkl"
+            "preprocessors_path": "ml/talent_flow_preprocessors.pkl",
+            "engine": "compiled",
+            "sparse_batch_features": True,
+            "feature_builder": "layout",
+            "artifact_format": "pickle",
+            "arrays_path": "ml/talent_flow_arrays"
+        },
+        "micro_batching": {
+            "enabled": False,
+            "window_ms": 2.0,
+            "max_batch_size": 64
+        },
+        "inference_executor": {
+            "mode": "thread",
+            "max_workers": 8,
+            "max_queue_size": 256
+        },
+        "cache": {
+            "enabled": True,
+            "backend": "memory",
+            "max_entries": 50000,
+            "ttl_seconds": 21600,
+            "text_fragment_max_entries": 100000
+        },
+        "streaming": {
+            "chunk_size": 512,
+            "max_line_bytes": 1048576
+        },
+        "server": {
+            "host": "0.0.0.0",
+            "port": 8000,
+            "workers": 4
+        },
+        "registry": {
+            "enabled": False,
+            "path": "ml/talent_flow_arrays",
+            "poll_interval_seconds": 30.0,
+            "history_size": 1
+        },
+        "experiments": {
+            "shadow_queue_size": 256
+        },
+        "metrics": {
+            "enabled": True
+        },
+        "profiling": {
+            "sample_rate": 0.0,
+            "output_dir": "profiles",
+            "max_files": 100
+        },
+        "resume_store": {
+            "max_entries": 100000
+        },
+        "feedback": {
+            "enabled": True,
+            "path": "feedback/feedback.jsonl"
         }
     }
 }
@@ -149,6 +402,86 @@ def get_config() -> Config:
     if os.getenv("PREPROCESSORS_PATH"):
         config_dict["model"]["preprocessors_path"] = os.getenv("PREPROCESSORS_PATH")
     
+    if os.getenv("MODEL_ARTIFACT_FORMAT"):
+        config_dict["model"]["artifact_format"] = os.getenv("MODEL_ARTIFACT_FORMAT").lower()
+    
+    if os.getenv("MODEL_ARRAYS_PATH"):
+        config_dict["model"]["arrays_path"] = os.getenv("MODEL_ARRAYS_PATH")
+    
+    if os.getenv("MODEL_ENGINE"):
+        config_dict["model"]["engine"] = os.getenv("MODEL_ENGINE").lower()
+    
+    if os.getenv("MICRO_BATCHING_ENABLED"):
+        config_dict["micro_batching"]["enabled"] = os.getenv("MICRO_BATCHING_ENABLED").lower() in ("true", "1", "t")
+    
+    if os.getenv("INFERENCE_EXECUTOR_MODE"):
+        config_dict["inference_executor"]["mode"] = os.getenv("INFERENCE_EXECUTOR_MODE").lower()
+    
+    if os.getenv("INFERENCE_WORKERS"):
+        config_dict["inference_executor"]["max_workers"] = int(os.getenv("INFERENCE_WORKERS"))
+    
+    if os.getenv("CACHE_ENABLED"):
+        config_dict["cache"]["enabled"] = os.getenv("CACHE_ENABLED").lower() in ("true", "1", "t")
+    
+    if os.getenv("CACHE_BACKEND"):
+        config_dict["cache"]["backend"] = os.getenv("CACHE_BACKEND").lower()
+    
+    if os.getenv("CACHE_REDIS_URL"):
+        config_dict["cache"]["redis_url"] = os.getenv("CACHE_REDIS_URL")
+    
+    if os.getenv("CACHE_TEXT_FRAGMENT_MAX_ENTRIES"):
+        config_dict["cache"]["text_fragment_max_entries"] = int(os.getenv("CACHE_TEXT_FRAGMENT_MAX_ENTRIES"))
+    
+    if os.getenv("SERVER_HOST"):
+        config_dict["server"]["host"] = os.getenv("SERVER_HOST")
+    
+    if os.getenv("SERVER_PORT"):
+        config_dict["server"]["port"] = int(os.getenv("SERVER_PORT"))
+    
+    if os.getenv("SERVER_WORKERS"):
+        config_dict["server"]["workers"] = int(os.getenv("SERVER_WORKERS"))
+    
+    if os.getenv("ADMIN_TOKEN"):
+        config_dict["api"]["admin_token"] = os.getenv("ADMIN_TOKEN")
+    
+    if os.getenv("MODEL_REGISTRY_ENABLED"):
+        config_dict["registry"]["enabled"] = os.getenv("MODEL_REGISTRY_ENABLED").lower() in ("true", "1", "t")
+    
+    if os.getenv("MODEL_REGISTRY_PATH"):
+        config_dict["registry"]["path"] = os.getenv("MODEL_REGISTRY_PATH")
+    
+    if os.getenv("MODEL_PINNED_VERSION"):
+        config_dict["registry"]["pinned_version"] = os.getenv("MODEL_PINNED_VERSION")
+    
+    if os.getenv("SHADOW_MODELS"):
+        config_dict["experiments"]["shadow_models"] = [
+            path.strip() for path in os.getenv("SHADOW_MODELS").split(",") if path.strip()
+        ]
+    
+    if os.getenv("AB_CANDIDATE_MODEL"):
+        config_dict["experiments"]["ab_candidate"] = os.getenv("AB_CANDIDATE_MODEL")
+    
+    if os.getenv("AB_CANDIDATE_WEIGHT"):
+        config_dict["experiments"]["ab_weight"] = float(os.getenv("AB_CANDIDATE_WEIGHT"))
+    
+    if os.getenv("METRICS_ENABLED"):
+        config_dict["metrics"]["enabled"] = os.getenv("METRICS_ENABLED").lower() in ("true", "1", "t")
+    
+    if os.getenv("PROFILING_SAMPLE_RATE"):
+        config_dict["profiling"]["sample_rate"] = float(os.getenv("PROFILING_SAMPLE_RATE"))
+    
+    if os.getenv("PROFILING_OUTPUT_DIR"):
+        config_dict["profiling"]["output_dir"] = os.getenv("PROFILING_OUTPUT_DIR")
+    
+    if os.getenv("RESUME_STORE_MAX_ENTRIES"):
+        config_dict["resume_store"]["max_entries"] = int(os.getenv("RESUME_STORE_MAX_ENTRIES"))
+    
+    if os.getenv("FEEDBACK_ENABLED"):
+        config_dict["feedback"]["enabled"] = os.getenv("FEEDBACK_ENABLED").lower() in ("true", "1", "t")
+    
+    if os.getenv("FEEDBACK_PATH"):
+        config_dict["feedback"]["path"] = os.getenv("FEEDBACK_PATH")
+    
     # Create and return the Config object
     config_dict["env"] = env
     return Config(**config_dict)
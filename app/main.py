@@ -1,23 +1,72 @@
+import asyncio
+import json
+import secrets
 import sys
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Dict, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from loguru import logger
+from pydantic import ValidationError
 
 from app.config import config
-from app.models import ResumePayload, ClassificationResponse
-from app.services.prediction_service import ResumeClassifierService
+from app.models import (
+    ResumePayload,
+    ClassificationResponse,
+    BatchResumePayload,
+    BatchClassificationResponse,
+    ResumePatch,
+    FeedbackPayload,
+)
+from app.services.feedback_log import FeedbackLog
+from app.services.inference_executor import ExecutorSaturatedError, InferenceExecutor
+from app.services.metrics import CONTENT_TYPE, RESUME_ERRORS, MetricsMiddleware, metrics
+from app.services.request_profiler import (
+    ProfilerBusyError,
+    RequestProfile,
+    RequestProfiler,
+    current_profile,
+    record_stage,
+)
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_loader import ModelLoader, ModelNotReadyError
+from app.services.resume_store import InvalidPatchError, ResumeNotFoundError, ResumeStore
+from app.utils import format_validation_error, iter_ndjson_lines, select_probabilities
+
+def _dumps(content: Any) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
 # Logger setup
 logger.remove()
 logger.add(sys.stdout, level=config.log.level, format=config.log.format)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model in the background so the server accepts health probes meanwhile
+    model_loader.start()
+    if model_registry is not None:
+        model_registry.start()
+    yield
+    if model_registry is not None:
+        model_registry.stop()
+    if micro_batcher is not None:
+        micro_batcher.shutdown()
+    inference_executor.shutdown()
+    if model_experiments is not None:
+        model_experiments.shutdown()
+
 # App
 app = FastAPI(
     title=config.api.title,
     description=config.api.description,
     version=config.api.version,
     debug=config.debug,
+    lifespan=lifespan,
 )
 
 # CORS
@@ -29,21 +78,489 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Instantiate service
-classifier_service = ResumeClassifierService()
+if config.metrics.enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# The classifier service is attached to the executor once the model loader has built it
+inference_executor = InferenceExecutor(
+    None,
+    mode=config.inference_executor.mode,
+    max_workers=config.inference_executor.max_workers,
+    max_queue_size=config.inference_executor.max_queue_size,
+)
+
+micro_batcher = (
+    MicroBatcher(
+        partial(inference_executor.run, "predict_batch"),
+        window_ms=config.micro_batching.window_ms,
+        max_batch_size=config.micro_batching.max_batch_size,
+    )
+    if config.micro_batching.enabled
+    else None
+)
+
+# Shadow and A/B candidates, loaded with the first service and shared by every version swapped in later
+model_experiments = None
+
+def _build_classifier_service(model: Any = None, artifacts: Optional[Dict[str, Any]] = None):
+    global model_experiments
+    # Imported here so that pandas / scipy / scikit-learn load in the background too
+    from app.services.model_experiments import ModelExperiments
+    from app.services.prediction_service import ResumeClassifierService
+    if model_experiments is None:
+        model_experiments = ModelExperiments(config.experiments)
+    return ResumeClassifierService(model, artifacts, model_experiments)
+
+def _build_model_registry():
+    from app.services.model_registry import ModelRegistry
+    return ModelRegistry(
+        config.registry.path,
+        service_factory=_build_classifier_service,
+        poll_interval=config.registry.poll_interval_seconds,
+        pinned_version=config.registry.pinned_version,
+        history_size=config.registry.history_size,
+        # Looked up at call time: versions swapped in later replace the loader's service
+        on_swap=lambda service: model_loader.replace(service),
+    )
+
+model_registry = _build_model_registry() if config.registry.enabled else None
+
+request_profiler = RequestProfiler(
+    sample_rate=config.profiling.sample_rate,
+    output_dir=config.profiling.output_dir,
+    max_files=config.profiling.max_files,
+)
+
+resume_store = ResumeStore(config.resume_store.max_entries)
+
+feedback_log = FeedbackLog(config.feedback.path) if config.feedback.enabled else None
+
+model_loader = ModelLoader(
+    model_registry.load_active if model_registry is not None else _build_classifier_service,
+    on_ready=inference_executor.set_service,
+)
+
+def _require_model():
+    """Return the classifier service, or answer 503 while the model is not ready."""
+    try:
+        return model_loader.require()
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+def _require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Allow admin endpoints only with the configured X-Admin-Token."""
+    if not config.api.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (no admin token configured)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, config.api.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
+def _request_profile(request: Request) -> Optional[RequestProfile]:
+    """A profile when an admin asked for one with X-Profile or the request is sampled, else None."""
+    if "x-profile" in request.headers:
+        _require_admin(request.headers.get("x-admin-token"))
+        return RequestProfile("requested")
+    if request_profiler.sampled():
+        return RequestProfile("sampled")
+    return None
+
+def _require_registry():
+    if model_registry is None:
+        raise HTTPException(status_code=404, detail="Model registry is disabled")
+    return model_registry
 
 @app.get("/")
 async def root():
+    service = model_loader.service
     return {
         "api": config.api.title,
         "version": config.api.version,
         "status": "online",
+        "modelVersion": service.model_version if service is not None else None,
+    }
+
+@app.get("/health/live")
+async def health_live():
+    """Liveness: the process serves requests. Fails only when the model can never load."""
+    if model_loader.state == "failed":
+        return JSONResponse({"status": "failed", "model": model_loader.status()}, status_code=503)
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: the model is loaded and warmed up, so classification requests are served."""
+    if not model_loader.ready:
+        return JSONResponse({"status": "not_ready", "model": model_loader.status()}, status_code=503)
+    return {"status": "ready", "model": model_loader.status()}
+
+@app.get("/stats")
+async def stats():
+    service = model_loader.service
+    return {
+        "model": model_loader.status(),
+        "micro_batching": micro_batcher.stats() if micro_batcher is not None else {"enabled": False},
+        "inference_executor": inference_executor.stats(),
+        "prediction_cache": (
+            service.prediction_cache.stats()
+            if service is not None and service.prediction_cache is not None
+            else {"enabled": False}
+        ),
+        "text_fragment_cache": (
+            service.feature_layout.fragment_cache.stats()
+            if service is not None and service.feature_layout is not None
+            and service.feature_layout.fragment_cache is not None
+            else {"enabled": False}
+        ),
+        "experiments": service.experiment_stats() if service is not None else {"enabled": False},
+        "resume_store": resume_store.stats(),
+        "feedback": feedback_log.stats() if feedback_log is not None else {"enabled": False},
     }
 
-@app.post("/classify-resume/", response_model=ClassificationResponse)
-async def classify_resume(payload: ResumePayload):
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request counters and per-stage latency histograms, in the Prometheus text format."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+@app.get("/admin/model", dependencies=[Depends(_require_admin)])
+async def admin_model_status():
+    """Active, previous, pinned and available model versions."""
+    return _require_registry().status()
+
+@app.post("/admin/model/rollback", dependencies=[Depends(_require_admin)])
+async def admin_model_rollback():
+    """Serve the previous model version again, pinning it until unpinned."""
+    from app.services.model_registry import RegistryError
+    registry = _require_registry()
+    try:
+        version = await asyncio.to_thread(registry.rollback)
+    except RegistryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.warning(f"Model rolled back to version {version}")
+    return {"activeVersion": version, "pinnedVersion": registry.pinned_version}
+
+@app.put("/admin/model/pin", dependencies=[Depends(_require_admin)])
+async def admin_model_pin(version: str = Query(..., description="Version to serve until unpinned")):
+    """Pin a model version; it is loaded and swapped in by the registry watcher."""
+    from app.services.model_registry import RegistryError
+    registry = _require_registry()
+    try:
+        registry.pin(version)
+    except RegistryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"activeVersion": registry.active_version, "pinnedVersion": registry.pinned_version}
+
+@app.delete("/admin/model/pin", dependencies=[Depends(_require_admin)])
+async def admin_model_unpin():
+    """Remove the pin, so the registry follows LATEST again."""
+    registry = _require_registry()
+    registry.pin(None)
+    return {"activeVersion": registry.active_version, "pinnedVersion": None}
+
+def _json_body_openapi(model) -> Dict[str, Any]:
+    """OpenAPI request body for an endpoint that validates the raw body itself."""
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+
+    def inline(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return inline(definitions[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": inline(schema)}}}}
+
+@app.post(
+    "/classify-resume/",
+    response_model=ClassificationResponse,
+    openapi_extra=_json_body_openapi(ResumePayload),
+)
+async def classify_resume(
+    request: Request,
+    include_probabilities: bool = Query(False, description="Include the probability of every level"),
+    top_k: Optional[int] = Query(None, ge=1, description="Include only the k most likely levels"),
+):
+    service = _require_model()
+    profile = _request_profile(request)
+    # Validate straight from the raw bytes instead of parsing JSON and validating the dict
+    body = await request.body()
+    started_at = time.perf_counter()
+    try:
+        payload = ResumePayload.model_validate_json(body)
+    except ValidationError as e:
+        RESUME_ERRORS.inc("validation")
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+    validation_seconds = time.perf_counter() - started_at
+    record_stage("validation", validation_seconds)
+
+    if profile is not None:
+        profile.stages.append(("validation", validation_seconds))
+        return await _classify_profiled(service, profile, payload, include_probabilities, top_k)
+    return await _classify(payload, include_probabilities, top_k)
+
+async def _classify(payload: ResumePayload, include_probabilities: bool, top_k: Optional[int]):
+    try:
+        if micro_batcher is not None:
+            result = await micro_batcher.predict(payload)
+        else:
+            result = await inference_executor.call("predict", payload)
+        # Returning a response directly skips re-validating the result against the response model
+        return JSONResponse(select_probabilities(result, include_probabilities, top_k))
+    except ExecutorSaturatedError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        RESUME_ERRORS.inc("prediction")
+        logger.exception("Prediction failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _classify_profiled(service, profile: RequestProfile, payload: ResumePayload,
+                             include_probabilities: bool, top_k: Optional[int]):
+    """
+    Classify in a thread under cProfile, bypassing the micro-batcher, the
+    inference queue and the prediction cache so every stage is measured.
+    """
+    # asyncio.to_thread copies the context, so the service's stages reach the profile
+    token = current_profile.set(profile)
+    try:
+        result = await asyncio.to_thread(request_profiler.run, profile, service.predict, payload, False)
+    except ProfilerBusyError as e:
+        if profile.reason == "requested":
+            raise HTTPException(status_code=409, detail=str(e))
+        # A sampled request that lost the race for the profiler is answered unprofiled
+        result = None
+    except Exception as e:
+        RESUME_ERRORS.inc("prediction")
+        logger.exception("Prediction failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        current_profile.reset(token)
+    if result is None:
+        return await _classify(payload, include_probabilities, top_k)
+    path = await asyncio.to_thread(profile.save, request_profiler.output_dir, request_profiler.max_files)
+    logger.info(f"Profiled request of {payload.userId} ({profile.reason}) saved to {path}: {profile.server_timing()}")
+    return JSONResponse(
+        select_probabilities(result, include_probabilities, top_k),
+        headers={"Server-Timing": profile.server_timing(), "X-Profile-Id": profile.id},
+    )
+
+@app.post("/classify-resumes/", response_model=BatchClassificationResponse, response_model_exclude_unset=True)
+async def classify_resumes(
+    payload: BatchResumePayload,
+    include_probabilities: bool = Query(False, description="Include the probability of every level"),
+    top_k: Optional[int] = Query(None, ge=1, description="Include only the k most likely levels"),
+):
+    _require_model()
+    if len(payload.resumes) > config.api.max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(payload.resumes)} resumes (max {config.api.max_batch_size})",
+        )
+
+    items = [{"index": index, "result": None, "error": None} for index in range(len(payload.resumes))]
+    resumes, positions = [], []
+    for index, raw_resume in enumerate(payload.resumes):
+        started_at = time.perf_counter()
+        try:
+            resumes.append(ResumePayload.model_validate(raw_resume))
+            positions.append(index)
+        except ValidationError as e:
+            RESUME_ERRORS.inc("validation")
+            items[index]["error"] = format_validation_error(e)
+            continue
+        record_stage("validation", time.perf_counter() - started_at)
+
     try:
-        return classifier_service.predict(payload)
+        outcomes = await inference_executor.call("predict_batch", resumes) if resumes else []
+    except ExecutorSaturatedError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
+        logger.exception("Batch prediction failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    for index, outcome in zip(positions, outcomes):
+        items[index].update(outcome)
+        if outcome["result"] is not None:
+            items[index]["result"] = select_probabilities(outcome["result"], include_probabilities, top_k)
+
+    failed = sum(1 for item in items if item["error"] is not None)
+    return JSONResponse({"results": items, "succeeded": len(items) - failed, "failed": failed})
+
+@app.put("/resumes/{resume_id}", response_model=ClassificationResponse)
+async def put_resume(
+    resume_id: str,
+    payload: ResumePayload,
+    include_probabilities: bool = Query(False, description="Include the probability of every level"),
+    top_k: Optional[int] = Query(None, ge=1, description="Include only the k most likely levels"),
+):
+    """Store a resume for incremental re-classification and classify it."""
+    service = _require_model()
+    try:
+        prepared = await asyncio.to_thread(resume_store.put, resume_id, payload, service.feature_layout)
+    except Exception as e:
+        RESUME_ERRORS.inc("prediction")
         logger.exception("Prediction failed")
         raise HTTPException(status_code=500, detail=str(e))
+    return await _classify_prepared(service, prepared, include_probabilities, top_k)
+
+@app.patch("/resumes/{resume_id}", response_model=ClassificationResponse)
+async def patch_resume(
+    resume_id: str,
+    patch: ResumePatch,
+    include_probabilities: bool = Query(False, description="Include the probability of every level"),
+    top_k: Optional[int] = Query(None, ge=1, description="Include only the k most likely levels"),
+):
+    """
+    Add, update or remove experiences and formations of a stored resume and
+    classify the result.
+
+    Only the features of the changed experiences are recomputed; the result
+    is identical to classifying the whole patched resume.
+    """
+    service = _require_model()
+    try:
+        prepared = await asyncio.to_thread(resume_store.patch, resume_id, patch.operations, service.feature_layout)
+    except ResumeNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InvalidPatchError as e:
+        RESUME_ERRORS.inc("validation")
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        RESUME_ERRORS.inc("prediction")
+        logger.exception("Prediction failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    return await _classify_prepared(service, prepared, include_probabilities, top_k)
+
+@app.delete("/resumes/{resume_id}", status_code=204)
+async def delete_resume(resume_id: str):
+    """Forget a stored resume."""
+    if not resume_store.delete(resume_id):
+        raise HTTPException(status_code=404, detail=f"Resume {resume_id} is not stored")
+
+async def _classify_prepared(service, prepared, include_probabilities: bool, top_k: Optional[int]):
+    resume_data, features, text_counts = prepared
+    try:
+        result = await inference_executor.call(
+            "predict_extracted", resume_data, features, text_counts, service.model_version
+        )
+        return JSONResponse(select_probabilities(result, include_probabilities, top_k))
+    except ExecutorSaturatedError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        RESUME_ERRORS.inc("prediction")
+        logger.exception("Prediction failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/feedback", status_code=201)
+async def record_feedback(payload: FeedbackPayload):
+    """
+    Record the level a recruiter confirmed or corrected for a resume, as a
+    labelled example for the next retraining (see ``app/ml/retraining.py``).
+    """
+    if feedback_log is None:
+        raise HTTPException(status_code=404, detail="Feedback collection is disabled")
+    try:
+        ResumePayload.model_validate(payload.resume)
+    except ValidationError as e:
+        RESUME_ERRORS.inc("validation")
+        raise RequestValidationError(
+            [{**error, "loc": ("body", "resume", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+    await asyncio.to_thread(feedback_log.record, payload.resume, payload.experienceLevel,
+                            payload.predictedExperienceLevel, payload.modelVersion)
+    return {"status": "recorded", "corrected": (payload.predictedExperienceLevel is not None
+                                                and payload.predictedExperienceLevel != payload.experienceLevel)}
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for endpoints that keep reading the request body while
+    they stream the response.
+
+    The base class listens for client disconnects on ``receive`` (for ASGI
+    servers older than spec 2.4, such as uvicorn), which would steal the body
+    messages; a disconnect surfaces instead as ClientDisconnect while reading.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+@app.post(
+    "/classify-resumes/stream",
+    response_class=DuplexStreamingResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {"application/x-ndjson": {"schema": {"type": "string"}}}}},
+)
+async def classify_resumes_stream(
+    request: Request,
+    include_probabilities: bool = Query(False, description="Include the probability of every level"),
+    top_k: Optional[int] = Query(None, ge=1, description="Include only the k most likely levels"),
+):
+    """
+    Classify an NDJSON stream of resumes, one JSON object per line.
+
+    The body is parsed as it arrives and classified in chunks of
+    ``streaming.chunk_size`` lines; one line is emitted per input line, in
+    order, as soon as its chunk completes. Lines that fail are emitted as
+    ``{"line": n, "error": "..."}`` and the stream carries on.
+    """
+    _require_model()
+
+    async def classified_lines():
+        chunk = []
+        async for line_number, line in iter_ndjson_lines(request.stream(), config.streaming.max_line_bytes):
+            chunk.append((line_number, line))
+            if len(chunk) >= config.streaming.chunk_size:
+                for output in await _classify_stream_chunk(chunk, include_probabilities, top_k):
+                    yield output
+                chunk = []
+        if chunk:
+            for output in await _classify_stream_chunk(chunk, include_probabilities, top_k):
+                yield output
+
+    return DuplexStreamingResponse(classified_lines(), media_type="application/x-ndjson")
+
+async def _classify_stream_chunk(chunk, include_probabilities: bool, top_k: Optional[int]) -> list:
+    outputs: list = [None] * len(chunk)
+    resumes, positions = [], []
+    for position, (line_number, line) in enumerate(chunk):
+        if line is None:
+            RESUME_ERRORS.inc("validation")
+            outputs[position] = {"line": line_number, "error": "Line exceeds the maximum allowed size"}
+            continue
+        started_at = time.perf_counter()
+        try:
+            resumes.append(ResumePayload.model_validate_json(line))
+            positions.append(position)
+        except ValidationError as e:
+            RESUME_ERRORS.inc("validation")
+            outputs[position] = {"line": line_number, "error": format_validation_error(e)}
+            continue
+        record_stage("validation", time.perf_counter() - started_at)
+
+    if resumes:
+        outcomes = await _call_with_backpressure("predict_batch", resumes)
+        for position, outcome in zip(positions, outcomes):
+            if outcome["error"] is not None:
+                outputs[position] = {"line": chunk[position][0], "error": outcome["error"]}
+            else:
+                outputs[position] = select_probabilities(outcome["result"], include_probabilities, top_k)
+
+    return [_dumps(output) + b"\n" for output in outputs]
+
+async def _call_with_backpressure(method: str, *args: Any) -> Any:
+    """Wait for room in the inference queue instead of failing a stream half-way."""
+    delay = 0.005
+    while True:
+        try:
+            return await inference_executor.call(method, *args)
+        except ExecutorSaturatedError:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
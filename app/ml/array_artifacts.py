@@ -0,0 +1,227 @@
+"""
+Pickle-free model artifacts: a versioned directory of ``.npy`` arrays plus a
+JSON manifest.
+
+Layout::
+
+    <root>/LATEST                 name of the version served by default
+    <root>/<version>/manifest.json
+    <root>/<version>/<array>.npy  forest node arrays, scaler vectors, IDF weights
+
+Loading memory-maps the arrays read-only instead of unpickling Python
+objects, so it neither copies the trees onto the heap nor depends on the
+scikit-learn version that trained the model. Workers forked from, or started
+next to, the same export share the mapped pages.
+
+Convert existing pickles with::
+
+    python -m app.ml.array_artifacts ml/talent_flow_classifier.pkl ml/talent_flow_preprocessors.pkl ml/talent_flow_arrays
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.ml.compiled_forest import CompiledForest
+from app.ml.feature_layout import FeatureLayout
+from app.ml.tfidf import TfidfTables
+
+FORMAT_NAME = "talent-flow-arrays"
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+
+
+def export_array_artifacts(model: Any, artifacts: Dict[str, Any], root: str,
+                           version: Optional[str] = None, make_latest: bool = True) -> str:
+    """
+    Write a fitted forest and its preprocessors as a new version under ``root``.
+
+    Args:
+        model: Fitted RandomForestClassifier (or an already compiled forest)
+        artifacts: Preprocessors dictionary, as stored in ``talent_flow_preprocessors.pkl``,
+            or as loaded from an export (its ``feature_layout`` is reused)
+        root: Directory holding the exported versions
+        version: Version name; defaults to a hash of the exported content
+        make_latest: Point ``LATEST`` at the new version
+
+    Returns:
+        Path of the version directory
+    """
+    forest = model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+    layout = artifacts.get('feature_layout') or FeatureLayout.from_artifacts(artifacts)
+    tfidf = layout.text_tables
+
+    arrays = {f"forest.{name}": array for name, array in forest.arrays().items()}
+    arrays["scaler.scale"] = layout.scale
+    arrays["scaler.min"] = layout.min_
+    arrays["tfidf.idf"] = tfidf.idf_
+
+    def ordered(columns: Dict[str, int]) -> list:
+        return sorted(columns, key=columns.get)
+
+    manifest: Dict[str, Any] = {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "forest": {
+            "n_features": forest.n_features_in_,
+            "n_estimators": forest.n_estimators,
+            "max_depth": forest.max_depth,
+        },
+        "preprocessors": {
+            "level_mapping": artifacts['level_mapping'],
+            "numerical_features_order": list(layout.numerical_order),
+            "education_categories": ordered(layout.education_columns),
+            "tech_classes": ordered(layout.tech_columns),
+            "skill_classes": ordered(layout.skill_columns),
+            "tfidf": {
+                "vocabulary": ordered(tfidf.vocabulary_),
+                "token_pattern": tfidf.token_pattern,
+                "stop_words": sorted(tfidf.stop_words),
+                "lowercase": tfidf.lowercase,
+                "norm": tfidf.norm,
+            },
+        },
+        "arrays": {},
+    }
+
+    digest = hashlib.sha256(json.dumps(manifest["preprocessors"], sort_keys=True).encode("utf-8"))
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        array_digest = hashlib.sha256(array.tobytes()).hexdigest()
+        digest.update(name.encode("utf-8"))
+        digest.update(array_digest.encode("ascii"))
+        manifest["arrays"][name] = {
+            "file": f"{name}.npy",
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "sha256": array_digest,
+        }
+        arrays[name] = array
+    manifest["version"] = version or digest.hexdigest()[:12]
+
+    # Write into a temporary directory and rename it, so a version is never seen half-written
+    os.makedirs(root, exist_ok=True)
+    version_dir = os.path.join(root, manifest["version"])
+    staging_dir = os.path.join(root, f".{manifest['version']}.tmp")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(staging_dir, manifest["arrays"][name]["file"]), array, allow_pickle=False)
+    with open(os.path.join(staging_dir, MANIFEST_FILE), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False, indent=2)
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.replace(staging_dir, version_dir)
+
+    if make_latest:
+        write_latest(root, manifest["version"])
+    return version_dir
+
+
+def write_latest(root: str, version: str) -> None:
+    """Point ``LATEST`` under ``root`` at ``version``, atomically."""
+    latest_tmp = os.path.join(root, f".{LATEST_FILE}.tmp")
+    with open(latest_tmp, "w") as latest_file:
+        latest_file.write(version + "\n")
+    os.replace(latest_tmp, os.path.join(root, LATEST_FILE))
+
+
+def resolve_version_dir(path: str) -> str:
+    """Return ``path`` if it is a version directory, else the version ``LATEST`` points to."""
+    if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return path
+    latest_path = os.path.join(path, LATEST_FILE)
+    if not os.path.exists(latest_path):
+        raise FileNotFoundError(f"Required model file not found: no {MANIFEST_FILE} or {LATEST_FILE} in {path}")
+    with open(latest_path) as latest_file:
+        return os.path.join(path, latest_file.read().strip())
+
+
+def load_array_artifacts(path: str, mmap: bool = True,
+                         verify: bool = False) -> Tuple[CompiledForest, Dict[str, Any]]:
+    """
+    Load an exported version as a compiled forest and a preprocessors dictionary.
+
+    Args:
+        path: Version directory, or export root (the ``LATEST`` version is loaded)
+        mmap: Memory-map the arrays read-only instead of reading them into memory
+        verify: Check the SHA-256 of every array against the manifest (reads all pages)
+
+    Returns:
+        Tuple of the forest and a dictionary with ``level_mapping``,
+        ``numerical_features_order``, ``feature_layout`` and ``model_version``
+    """
+    version_dir = resolve_version_dir(path)
+    with open(os.path.join(version_dir, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("format") != FORMAT_NAME or manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format in {version_dir}: "
+                         f"{manifest.get('format')} v{manifest.get('format_version')}")
+
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        array = np.load(os.path.join(version_dir, entry["file"]), mmap_mode="r" if mmap else None,
+                        allow_pickle=False)
+        if array.dtype.str != entry["dtype"] or list(array.shape) != entry["shape"]:
+            raise ValueError(f"Array {name} does not match the manifest of {version_dir}")
+        if verify and hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest() != entry["sha256"]:
+            raise ValueError(f"Array {name} is corrupted in {version_dir}")
+        arrays[name] = array
+
+    forest_arrays = {name.split(".", 1)[1]: array for name, array in arrays.items() if name.startswith("forest.")}
+    forest = CompiledForest(
+        max_depth=manifest["forest"]["max_depth"],
+        n_features=manifest["forest"]["n_features"],
+        **forest_arrays,
+    )
+
+    preprocessors = manifest["preprocessors"]
+    tfidf_settings = preprocessors["tfidf"]
+    tfidf = TfidfTables(
+        vocabulary={term: column for column, term in enumerate(tfidf_settings["vocabulary"])},
+        idf=arrays["tfidf.idf"],
+        token_pattern=tfidf_settings["token_pattern"],
+        stop_words=tfidf_settings["stop_words"],
+        lowercase=tfidf_settings["lowercase"],
+        norm=tfidf_settings["norm"],
+    )
+    layout = FeatureLayout(
+        numerical_order=preprocessors["numerical_features_order"],
+        scale=arrays["scaler.scale"],
+        min_=arrays["scaler.min"],
+        education_columns={category: column for column, category in enumerate(preprocessors["education_categories"])},
+        tech_columns={token: column for column, token in enumerate(preprocessors["tech_classes"])},
+        skill_columns={token: column for column, token in enumerate(preprocessors["skill_classes"])},
+        tfidf=tfidf,
+    )
+    return forest, {
+        "level_mapping": preprocessors["level_mapping"],
+        "numerical_features_order": preprocessors["numerical_features_order"],
+        "feature_layout": layout,
+        "model_version": manifest["version"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert pickled model artifacts to the array format.")
+    parser.add_argument("model_path", help="Pickled RandomForestClassifier")
+    parser.add_argument("preprocessors_path", help="Pickled preprocessors dictionary")
+    parser.add_argument("output_root", help="Directory receiving the exported version")
+    parser.add_argument("--version", default=None,
+                        help="Version name (default: the version of the pickles, as served today)")
+    args = parser.parse_args()
+
+    from app.utils import compute_artifact_version, load_model_artifacts
+    model, artifacts = load_model_artifacts(args.model_path, args.preprocessors_path)
+    version = args.version or compute_artifact_version(args.model_path, args.preprocessors_path)
+    print(export_array_artifacts(model, artifacts, args.output_root, version))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+Compaction of the served forest into smaller variants.
+
+Three ways to trade accuracy for inference cost, all producing a
+``CompiledForest`` that the ``compiled`` engine serves and that exports as
+an array version:
+
+- tree subset: the k trees that, added one at a time, most improve the
+  Brier score of the averaged probabilities on a selection split
+- depth limit: every tree cut at a maximum depth, the cut nodes becoming
+  leaves that predict the class distribution stored at that node
+- distillation: one shallow regression tree fitted to the full forest's
+  probabilities (no labels needed), its leaves holding mean distributions
+
+Each variant is evaluated on a held-out split of a labelled dataset with
+the serving feature pipeline: accuracy, agreement with the full forest,
+Brier score and expected calibration error, single-row latency, batch
+throughput and the size of its arrays. Usage:
+
+    python -m app.ml.compaction dataset.jsonl --trees 10,25,50 --depths 6,10 --distill-depths 8,12 \\
+        [--base ml/talent_flow_arrays] [--export ml/compacted] [--report compaction.json]
+
+``--base`` takes a version directory in either format, or a root whose
+``LATEST`` names one; without it, the configured pickles are compacted.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.ml.compiled_forest import CompiledForest
+
+# Confidence bins of the expected calibration error
+CALIBRATION_BINS = 10
+
+
+def _tree_arrays(forest: CompiledForest, index: int) -> Dict[str, np.ndarray]:
+    """Node arrays of one tree, with children numbered from the tree's root."""
+    start = int(forest.roots[index])
+    end = int(forest.roots[index + 1]) if index + 1 < forest.n_estimators else len(forest.feature)
+    return {
+        "feature": forest.feature[start:end],
+        "threshold": forest.threshold[start:end],
+        "children_left": forest.children_left[start:end] - start,
+        "children_right": forest.children_right[start:end] - start,
+        "missing_go_to_left": forest.missing_go_to_left[start:end],
+        "values": forest.values[start:end],
+    }
+
+
+def _tree_depth(children_left: np.ndarray, children_right: np.ndarray) -> int:
+    depth, level = 0, np.array([0])
+    while True:
+        internal = level[children_left[level] != level]
+        if not len(internal):
+            return depth
+        level = np.concatenate([children_left[internal], children_right[internal]])
+        depth += 1
+
+
+def _assemble(trees: List[Dict[str, np.ndarray]], classes: np.ndarray, n_features: int) -> CompiledForest:
+    """A CompiledForest from per-tree node arrays (children numbered from each root, leaves pointing to self)."""
+    offsets = np.cumsum([0] + [len(tree["feature"]) for tree in trees])
+    return CompiledForest(
+        feature=np.concatenate([tree["feature"] for tree in trees]).astype(np.int64),
+        threshold=np.concatenate([tree["threshold"] for tree in trees]).astype(np.float64),
+        children_left=np.concatenate([tree["children_left"] + offset for tree, offset in zip(trees, offsets)]),
+        children_right=np.concatenate([tree["children_right"] + offset for tree, offset in zip(trees, offsets)]),
+        missing_go_to_left=np.concatenate([tree["missing_go_to_left"] for tree in trees]).astype(bool),
+        values=np.concatenate([tree["values"] for tree in trees]).astype(np.float64),
+        roots=offsets[:-1].astype(np.int64),
+        max_depth=max(_tree_depth(tree["children_left"], tree["children_right"]) for tree in trees),
+        classes=np.asarray(classes),
+        n_features=n_features,
+    )
+
+
+def select_trees(forest: CompiledForest, indices: List[int]) -> CompiledForest:
+    """The forest made of the trees at ``indices``, in that order."""
+    return _assemble([_tree_arrays(forest, index) for index in indices], forest.classes_, forest.n_features_in_)
+
+
+def greedy_tree_subset(forest: CompiledForest, features: np.ndarray, labels: np.ndarray, k: int) -> List[int]:
+    """
+    Indices of ``k`` trees chosen by forward selection: each step adds the
+    tree whose addition gives the lowest Brier score of the averaged
+    probabilities against ``labels`` (class indices).
+    """
+    # Leaf distributions of every tree for every row: (trees, rows, classes)
+    per_tree = forest.values[forest.apply(np.asarray(features, dtype=np.float32))].transpose(1, 0, 2)
+    targets = np.eye(len(forest.classes_))[labels]
+    chosen: List[int] = []
+    total = np.zeros_like(targets)
+    remaining = list(range(forest.n_estimators))
+    for size in range(1, min(k, forest.n_estimators) + 1):
+        candidates = (total[np.newaxis] + per_tree[remaining]) / size
+        scores = ((candidates - targets[np.newaxis]) ** 2).sum(axis=2).mean(axis=1)
+        best = remaining.pop(int(np.argmin(scores)))
+        chosen.append(best)
+        total += per_tree[best]
+    return chosen
+
+
+def limit_depth(forest: CompiledForest, max_depth: int) -> CompiledForest:
+    """Every tree cut at ``max_depth``; nodes at that depth predict the distribution they store."""
+    trees = []
+    for index in range(forest.n_estimators):
+        tree = _tree_arrays(forest, index)
+        left, right = tree["children_left"], tree["children_right"]
+        kept, new_id, leaves = [0], {0: 0}, set()
+        depth = {0: 0}
+        for node in kept:
+            if left[node] == node or depth[node] == max_depth:
+                leaves.add(node)
+                continue
+            for child in (int(left[node]), int(right[node])):
+                new_id[child] = len(kept)
+                depth[child] = depth[node] + 1
+                kept.append(child)
+
+        kept_array = np.asarray(kept)
+        is_leaf = np.asarray([node in leaves for node in kept])
+        own_ids = np.arange(len(kept))
+        trees.append({
+            "feature": np.where(is_leaf, 0, tree["feature"][kept_array]),
+            "threshold": np.where(is_leaf, -2.0, tree["threshold"][kept_array]),
+            "children_left": np.where(is_leaf, own_ids, [new_id.get(int(left[node]), 0) for node in kept]),
+            "children_right": np.where(is_leaf, own_ids, [new_id.get(int(right[node]), 0) for node in kept]),
+            "missing_go_to_left": tree["missing_go_to_left"][kept_array],
+            "values": tree["values"][kept_array],
+        })
+    return _assemble(trees, forest.classes_, forest.n_features_in_)
+
+
+def distill(forest: CompiledForest, features: np.ndarray, max_depth: int,
+            min_samples_leaf: int = 5) -> CompiledForest:
+    """One regression tree of depth ``max_depth`` fitted to the forest's probabilities on ``features``."""
+    from sklearn.tree import DecisionTreeRegressor
+
+    features = np.asarray(features, dtype=np.float32)
+    student = DecisionTreeRegressor(max_depth=max_depth, min_samples_leaf=min_samples_leaf, random_state=0)
+    student.fit(features, forest.predict_proba(features))
+    tree = student.tree_
+    node_ids = np.arange(tree.node_count)
+    is_leaf = tree.children_left == -1
+    return _assemble([{
+        "feature": np.where(is_leaf, 0, tree.feature),
+        "threshold": tree.threshold,
+        "children_left": np.where(is_leaf, node_ids, tree.children_left),
+        "children_right": np.where(is_leaf, node_ids, tree.children_right),
+        "missing_go_to_left": np.asarray(tree.missing_go_to_left, dtype=bool),
+        # Means of probability distributions, so every leaf sums to one
+        "values": tree.value[:, :, 0],
+    }], forest.classes_, forest.n_features_in_)
+
+
+def expected_calibration_error(probabilities: np.ndarray, labels: np.ndarray,
+                               bins: int = CALIBRATION_BINS) -> float:
+    """Gap between confidence and accuracy, averaged over equal-width confidence bins weighted by their rows."""
+    confidence = probabilities.max(axis=1)
+    correct = probabilities.argmax(axis=1) == labels
+    bin_of = np.minimum((confidence * bins).astype(int), bins - 1)
+    error = 0.0
+    for bin_index in range(bins):
+        in_bin = bin_of == bin_index
+        if in_bin.any():
+            error += in_bin.mean() * abs(correct[in_bin].mean() - confidence[in_bin].mean())
+    return float(error)
+
+
+def _seconds_per_call(function, min_seconds: float = 0.2) -> float:
+    """Smallest time of one call over repeats lasting ``min_seconds`` in total."""
+    function()
+    best, spent = float("inf"), 0.0
+    while spent < min_seconds:
+        started_at = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started_at
+        best, spent = min(best, elapsed), spent + elapsed
+    return best
+
+
+def evaluate(forest: CompiledForest, reference: CompiledForest, features: np.ndarray,
+             labels: np.ndarray) -> Dict[str, Any]:
+    """Quality, calibration, speed and size of ``forest`` on held-out rows (labels are class indices)."""
+    features = np.asarray(features, dtype=np.float32)
+    probabilities = forest.predict_proba(features)
+    predicted = probabilities.argmax(axis=1)
+    targets = np.eye(len(forest.classes_))[labels]
+    batch = features[:1024]
+    return {
+        "trees": forest.n_estimators,
+        "max_depth": forest.max_depth,
+        "nodes": len(forest.feature),
+        "accuracy": float((predicted == labels).mean()),
+        "agreement": float((predicted == reference.predict_proba(features).argmax(axis=1)).mean()),
+        "brier": float(((probabilities - targets) ** 2).sum(axis=1).mean()),
+        "ece": expected_calibration_error(probabilities, labels),
+        "single_row_us": _seconds_per_call(lambda: forest.predict_proba(features[:1])) * 1e6,
+        "batch_rows_per_second": len(batch) / _seconds_per_call(lambda: forest.predict_proba(batch)),
+        "size_kb": sum(array.nbytes for array in forest.arrays().values()) / 1024,
+    }
+
+
+def load_labelled_features(dataset_path: str, service: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Model input and class index of every labelled resume of a dataset, built
+    with the serving feature pipeline. Resumes without a known level or
+    that fail validation or extraction are skipped.
+    """
+    from pydantic import ValidationError
+    from app.ml.training import iter_dataset
+    from app.models import ResumePayload
+    from app.utils import extract_features_batch
+
+    class_index = {label: index for index, label in enumerate(service.engine.classes_.tolist())}
+    resumes_data, labels = [], []
+    for resume in iter_dataset(dataset_path):
+        label = service.artifacts['level_mapping'].get(resume.get('experienceLevel'))
+        if label is None or label not in class_index:
+            continue
+        try:
+            resumes_data.append(ResumePayload.model_validate(resume).model_dump())
+        except ValidationError:
+            continue
+        labels.append(class_index[label])
+
+    columns = extract_features_batch(resumes_data)
+    valid = [row for row, error in enumerate(columns.errors) if error is None]
+    features = service._preprocess_batch(columns.take(valid))
+    return np.asarray(features, dtype=np.float32), np.asarray(labels, dtype=np.int64)[valid]
+
+
+def build_variants(forest: CompiledForest, features: np.ndarray, labels: np.ndarray, tree_counts: List[int],
+                   depths: List[int], distill_depths: List[int]) -> Dict[str, CompiledForest]:
+    """The compacted variants, keyed by name, fitted or selected on the given rows."""
+    variants: Dict[str, CompiledForest] = {}
+    if tree_counts:
+        order = greedy_tree_subset(forest, features, labels, max(tree_counts))
+        for count in sorted(tree_counts):
+            # Forward selection is nested, so one run gives every subset size
+            variants[f"trees-{count}"] = select_trees(forest, order[:count])
+    for depth in sorted(depths):
+        variants[f"depth-{depth}"] = limit_depth(forest, depth)
+    for depth in sorted(distill_depths):
+        variants[f"distilled-{depth}"] = distill(forest, features, depth)
+    return variants
+
+
+def compact(dataset_path: str, base_path: Optional[str] = None, tree_counts: List[int] = (10, 25, 50),
+            depths: List[int] = (6, 10, 14), distill_depths: List[int] = (8, 12), selection_size: float = 0.5,
+            export_root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build and evaluate the compacted variants of a model version.
+
+    Args:
+        dataset_path: JSON array or JSONL file of resumes labelled with ``experienceLevel``
+        base_path: Version directory (arrays or pickles), or a root whose ``LATEST`` names one;
+            defaults to the configured pickles
+        tree_counts: Sizes of the greedy tree subsets
+        depths: Maximum depths of the depth-limited forests
+        distill_depths: Depths of the distilled trees
+        selection_size: Share of the rows used to select trees and distill; the rest is held out
+        export_root: Also export every variant as an array version under this directory
+
+    Returns:
+        A report with one entry per variant, the full forest first
+    """
+    from sklearn.model_selection import train_test_split
+    from app.config import config
+    from app.services.prediction_service import ResumeClassifierService
+    from app.utils import load_model_artifacts
+
+    if base_path is not None:
+        from app.services.model_registry import load_version_artifacts, resolve_version_path
+        model, artifacts = load_version_artifacts(resolve_version_path(base_path))
+    else:
+        model, artifacts = load_model_artifacts(config.model.model_path, config.model.preprocessors_path)
+    service = ResumeClassifierService(model, artifacts)
+    forest = model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+
+    features, labels = load_labelled_features(dataset_path, service)
+    if len(labels) < 4:
+        raise ValueError(f"Too few labelled resumes in {dataset_path} to select and evaluate ({len(labels)})")
+    try:
+        split = train_test_split(features, labels, train_size=selection_size, random_state=42, stratify=labels)
+    except ValueError:
+        # A level with a single resume cannot be stratified
+        split = train_test_split(features, labels, train_size=selection_size, random_state=42)
+    selection_features, test_features, selection_labels, test_labels = split
+
+    variants = {"full": forest}
+    variants.update(build_variants(forest, selection_features, selection_labels, list(tree_counts),
+                                   list(depths), list(distill_depths)))
+    report = {
+        "rows": {"selection": len(selection_labels), "test": len(test_labels)},
+        "variants": {name: evaluate(variant, forest, test_features, test_labels)
+                     for name, variant in variants.items()},
+    }
+    if export_root is not None:
+        from app.ml.array_artifacts import export_array_artifacts
+        base_version = artifacts.get('model_version') or "base"
+        for name, variant in variants.items():
+            if name != "full":
+                export_array_artifacts(variant, artifacts, export_root, version=f"{base_version}-{name}",
+                                       make_latest=False)
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    header = (f"{'variant':<14} {'trees':>5} {'depth':>5} {'nodes':>7} {'size KiB':>9} {'accuracy':>8} "
+              f"{'agree':>6} {'brier':>6} {'ece':>6} {'1-row us':>9} {'rows/s':>9}")
+    lines = [header]
+    for name, row in report["variants"].items():
+        lines.append(
+            f"{name:<14} {row['trees']:>5} {row['max_depth']:>5} {row['nodes']:>7} {row['size_kb']:>9.1f} "
+            f"{row['accuracy']:>8.3f} {row['agreement']:>6.3f} {row['brier']:>6.3f} {row['ece']:>6.3f} "
+            f"{row['single_row_us']:>9.1f} {row['batch_rows_per_second']:>9.0f}"
+        )
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build and compare compacted variants of the forest.")
+    parser.add_argument("dataset", help="JSON array or JSONL file of resumes labelled with experienceLevel")
+    parser.add_argument("--base", default=None,
+                        help="Version directory, or root with a LATEST, to compact (default: configured pickles)")
+    parser.add_argument("--trees", type=_int_list, default=[10, 25, 50], help="Greedy subset sizes, e.g. 10,25")
+    parser.add_argument("--depths", type=_int_list, default=[6, 10, 14], help="Depth limits, e.g. 6,10")
+    parser.add_argument("--distill-depths", type=_int_list, default=[8, 12], help="Distilled tree depths")
+    parser.add_argument("--selection-size", type=float, default=0.5,
+                        help="Share of rows used to select trees and distill (the rest is held out)")
+    parser.add_argument("--export", default=None, help="Export every variant as an array version here")
+    parser.add_argument("--report", default=None, help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        report = compact(args.dataset, args.base, args.trees, args.depths, args.distill_depths,
+                         args.selection_size, args.export)
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+
+    print(f"{report['rows']['selection']} rows to select and distill, {report['rows']['test']} held out")
+    print(format_report(report))
+    if args.export:
+        print(f"Variants exported under {os.path.abspath(args.export)}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+            report_file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
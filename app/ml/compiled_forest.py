@@ -0,0 +1,160 @@
+"""
+Array-backed evaluator for a fitted scikit-learn ``RandomForestClassifier``.
+
+The trees of the forest are compiled once into flat NumPy arrays (split
+feature, threshold, children and per-node class distribution) and rows are
+evaluated by walking all trees at once with vectorized gathers. This skips
+the input validation and joblib dispatch that dominate ``predict_proba`` for
+single rows and small batches, while reproducing its results exactly.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+# Rows evaluated per traversal pass, bounding the (rows, trees, classes) buffers
+_ROWS_PER_CHUNK = 2048
+
+
+class CompiledForest:
+    """
+    A random forest compiled into flat node arrays.
+
+    Nodes of all trees are concatenated; ``roots`` holds the index of the first
+    node of each tree. Leaves point to themselves, so rows that reach a leaf
+    early stay there while the remaining rows keep walking down their trees.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children_left: np.ndarray,
+                 children_right: np.ndarray, missing_go_to_left: np.ndarray, values: np.ndarray,
+                 roots: np.ndarray, max_depth: int, classes: np.ndarray, n_features: int,
+                 children: Optional[np.ndarray] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.missing_go_to_left = missing_go_to_left
+        self.values = values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        # Derived lookup tables: children interleaved as [left, right] per node. Tables
+        # passed in (e.g. memory-mapped from an export) are used without copying.
+        if children is None:
+            children = np.stack([children_left, children_right], axis=1).ravel()
+        self._children = children.astype(np.intp, copy=False)
+        self._feature = feature.astype(np.intp, copy=False)
+        self._is_leaf = children_left == np.arange(len(children_left))
+
+    @classmethod
+    def from_sklearn(cls, forest: Any) -> "CompiledForest":
+        """Compile the fitted trees of a RandomForestClassifier."""
+        features: List[np.ndarray] = []
+        thresholds: List[np.ndarray] = []
+        lefts: List[np.ndarray] = []
+        rights: List[np.ndarray] = []
+        missing: List[np.ndarray] = []
+        values: List[np.ndarray] = []
+        roots: List[int] = []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            missing.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+            # Same slice DecisionTreeClassifier.predict_proba returns for a leaf
+            values.append(tree.value[:, 0, :forest.n_classes_].astype(np.float64))
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children_left=np.concatenate(lefts),
+            children_right=np.concatenate(rights),
+            missing_go_to_left=np.concatenate(missing),
+            values=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=int(max_depth),
+            classes=np.asarray(forest.classes_),
+            n_features=int(forest.n_features_in_),
+        )
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Return the node arrays, keyed by constructor argument name."""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children_left": self.children_left,
+            "children_right": self.children_right,
+            "missing_go_to_left": self.missing_go_to_left,
+            "values": self.values,
+            "roots": self.roots,
+            "classes": self.classes_,
+            "children": self._children,
+        }
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Return the leaf reached in every tree, as an array of shape (rows, trees)."""
+        n_rows = X.shape[0]
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * X.shape[1])[:, np.newaxis]
+        has_missing = bool(np.isnan(flat_X).any())
+        nodes = np.repeat(self.roots[np.newaxis, :], n_rows, axis=0)
+
+        for depth in range(self.max_depth):
+            x = flat_X[row_offsets + self._feature[nodes]]
+            # A NaN compares false, so it follows the side learned for missing values
+            go_right = x > self.threshold[nodes]
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.missing_go_to_left[nodes], go_right)
+            nodes = self._children[2 * nodes + go_right]
+            if depth % 4 == 3 and self._is_leaf[nodes].all():
+                break
+        return nodes
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """
+        Mean class distribution of the leaves reached by each row.
+
+        Rows are cast to float32 and tree outputs are summed in estimator order
+        before dividing by the number of trees, as scikit-learn does, so the
+        result is identical to ``RandomForestClassifier.predict_proba``.
+        Sparse input is densified one chunk of rows at a time.
+        """
+        if sparse.issparse(X):
+            X = sparse.csr_matrix(X)
+        else:
+            X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[-1]} features, but the forest expects {self.n_features_in_}"
+            )
+
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], _ROWS_PER_CHUNK):
+            chunk = X[start:start + _ROWS_PER_CHUNK]
+            if sparse.issparse(chunk):
+                chunk = chunk.toarray().astype(np.float32)
+            leaf_values = self.values[self.apply(chunk)]
+            # cumsum adds trees one after the other, matching the forest's accumulation order
+            proba[start:start + len(chunk)] = np.cumsum(leaf_values, axis=1)[:, -1]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Most likely class of each row."""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
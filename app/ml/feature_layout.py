@@ -0,0 +1,208 @@
+"""
+Precompiled feature layout for the serving hot path.
+
+The fitted preprocessors in ``talent_flow_preprocessors.pkl`` are reduced once
+to plain lookup tables (scaler vectors, category and token to column dicts,
+block offsets), so feature rows can be written straight into a preallocated
+float32 buffer without building pandas DataFrames on every request.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from scipy import sparse
+
+from app.ml.tfidf import FragmentCountCache, TfidfTables
+from app.utils import FeatureColumns
+
+# Feature rows as returned by extract_features_for_prediction, or a batch from extract_features_batch
+Features = Union[List[Dict[str, Any]], FeatureColumns]
+
+
+class FeatureLayout:
+    """
+    Column layout of the model input: numerical, education, technology,
+    soft-skill and TF-IDF blocks, in the order used during training.
+    """
+
+    def __init__(self, numerical_order: List[str], scale: np.ndarray, min_: np.ndarray,
+                 education_columns: Dict[str, int], tech_columns: Dict[str, int],
+                 skill_columns: Dict[str, int], tfidf: Any):
+        self.numerical_order = list(numerical_order)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.min_ = np.asarray(min_, dtype=np.float64)
+        self.education_columns = education_columns
+        self.tech_columns = tech_columns
+        self.skill_columns = skill_columns
+        self.tfidf = tfidf
+
+        self.education_offset = len(self.numerical_order)
+        self.tech_offset = self.education_offset + len(education_columns)
+        self.skills_offset = self.tech_offset + len(tech_columns)
+        self.text_offset = self.skills_offset + len(skill_columns)
+        self.n_features = self.text_offset + len(tfidf.vocabulary_)
+        self.fragment_cache: Optional[FragmentCountCache] = None
+        self._text_tables: Optional[TfidfTables] = None
+        self._signature: Optional[str] = None
+
+    @classmethod
+    def from_artifacts(cls, artifacts: Dict[str, Any]) -> "FeatureLayout":
+        """Build the layout from the preprocessors dictionary."""
+        scaler = artifacts['scaler']
+        ohe = artifacts['one_hot_encoder']
+        return cls(
+            numerical_order=artifacts['numerical_features_order'],
+            scale=scaler.scale_,
+            min_=scaler.min_,
+            education_columns={category: column for column, category in enumerate(ohe.categories_[0])},
+            tech_columns={token: column for column, token in enumerate(artifacts['mlb_tech'].classes_)},
+            skill_columns={token: column for column, token in enumerate(artifacts['mlb_skills'].classes_)},
+            tfidf=artifacts['tfidf_vectorizer'],
+        )
+
+    def cache_text_fragments(self, max_entries: int) -> FragmentCountCache:
+        """Vectorize texts from cached per-fragment term counts (see FragmentCountCache)."""
+        self.fragment_cache = FragmentCountCache(self.text_tables, max_entries)
+        return self.fragment_cache
+
+    @property
+    def text_tables(self) -> TfidfTables:
+        """Lookup tables of the TF-IDF vectorizer, extracted once."""
+        if self._text_tables is None:
+            self._text_tables = (self.tfidf if isinstance(self.tfidf, TfidfTables)
+                                 else TfidfTables.from_vectorizer(self.tfidf))
+        return self._text_tables
+
+    def signature(self) -> str:
+        """
+        Digest of everything that decides the column values: column order,
+        scaler, vocabularies and TF-IDF tables. Equal for a pickled layout
+        and its array export; models reading different layouts cannot share
+        feature rows even when their column counts match.
+        """
+        if self._signature is None:
+            tables = self.text_tables
+            digest = hashlib.sha256(json.dumps({
+                "numerical": self.numerical_order,
+                "education": sorted(self.education_columns.items(), key=lambda item: item[1]),
+                "technologies": sorted(self.tech_columns.items(), key=lambda item: item[1]),
+                "soft_skills": sorted(self.skill_columns.items(), key=lambda item: item[1]),
+                "terms": sorted(tables.vocabulary_.items(), key=lambda item: item[1]),
+                "tokenizer": [tables.token_pattern, sorted(tables.stop_words), tables.lowercase, tables.norm],
+            }, ensure_ascii=False).encode("utf-8"))
+            for array in (self.scale, self.min_, tables.idf_):
+                digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+            self._signature = digest.hexdigest()
+        return self._signature
+
+    def text_counts(self, fragments: List[str]) -> Dict[int, int]:
+        """Term counts of ``" ".join(fragments)``, through the fragment cache when enabled."""
+        if self.fragment_cache is not None:
+            return self.fragment_cache.counts(fragments)
+        counts: Dict[int, int] = {}
+        for fragment in fragments:
+            for column, count in self.text_tables.term_counts(fragment).items():
+                counts[column] = counts.get(column, 0) + count
+        return counts
+
+    def transform(self, features_list: Features, text_counts: Optional[List[Dict[int, int]]] = None) -> np.ndarray:
+        """
+        Write the feature rows of ``features_list`` into one float32 matrix.
+
+        Values equal the output of the scaler / one-hot / binarizer / TF-IDF
+        pipeline cast to float32, the precision the forest compares them in.
+        ``text_counts``, when given, holds the term counts of every row's text
+        (see ``text_counts``), which is then not tokenized again.
+        """
+        out = np.zeros((len(features_list), self.n_features), dtype=np.float32)
+        for row, categorical in enumerate(self._categorical_values(features_list)):
+            for column, value in self._categorical_columns(*categorical):
+                out[row, column] = value
+        out[:, :self.education_offset] = self._scaled_numerical(features_list)
+
+        if text_counts is not None:
+            text = self.text_tables.weight_counts(text_counts)
+        else:
+            text = self._text_features(features_list)
+        rows = np.repeat(np.arange(text.shape[0]), np.diff(text.indptr))
+        out[rows, self.text_offset + text.indices] = text.data
+        return out
+
+    def transform_sparse(self, features_list: Features) -> sparse.csr_matrix:
+        """CSR equivalent of ``transform`` in float64, for batch paths."""
+        numerical = self._scaled_numerical(features_list)
+        text = self._text_features(features_list)
+
+        indptr, indices, data = [0], [], []
+        for row, categorical in enumerate(self._categorical_values(features_list)):
+            row_columns = {column: numerical[row, column]
+                           for column in range(self.education_offset) if numerical[row, column] != 0}
+            row_columns.update(self._categorical_columns(*categorical))
+            start, end = text.indptr[row], text.indptr[row + 1]
+            row_columns.update(zip((self.text_offset + text.indices[start:end]).tolist(),
+                                   text.data[start:end].tolist()))
+            for column in sorted(row_columns):
+                indices.append(column)
+                data.append(row_columns[column])
+            indptr.append(len(indices))
+
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), indptr),
+            shape=(len(features_list), self.n_features)
+        )
+
+    def _scaled_numerical(self, features_list: Features) -> np.ndarray:
+        # Same operations, in the same order, as MinMaxScaler.transform
+        if isinstance(features_list, FeatureColumns):
+            numerical = features_list.numerical(self.numerical_order)
+        else:
+            numerical = np.array([[features[name] for name in self.numerical_order] for features in features_list],
+                                 dtype=np.float64).reshape(len(features_list), len(self.numerical_order))
+        numerical *= self.scale
+        numerical += self.min_
+        return numerical
+
+    def _text_features(self, features_list: Features) -> sparse.csr_matrix:
+        if self.fragment_cache is not None:
+            fragments = self._text_fragments(features_list)
+            # Texts that are not strings (a missing summary) fail in the vectorizer, as without the cache
+            if fragments is not None and all(isinstance(fragment, str) for row in fragments for fragment in row):
+                return self.fragment_cache.transform(fragments)
+        return self.tfidf.transform(self._texts(features_list))
+
+    @staticmethod
+    def _text_fragments(features_list: Features) -> Optional[List[List[Any]]]:
+        if isinstance(features_list, FeatureColumns):
+            return features_list.text_fragments
+        if all("textFragments" in features for features in features_list):
+            return [features["textFragments"] for features in features_list]
+        return None
+
+    @staticmethod
+    def _texts(features_list: Features) -> List[Any]:
+        if isinstance(features_list, FeatureColumns):
+            return features_list.full_text
+        return [features["fullText"] for features in features_list]
+
+    @staticmethod
+    def _categorical_values(features_list: Features):
+        """(education level, technologies, soft skills) of every row."""
+        if isinstance(features_list, FeatureColumns):
+            return zip(features_list.highest_education, features_list.technologies, features_list.soft_skills)
+        return ((features["highestEducationLevel"], features["technologies"], features["softSkills"])
+                for features in features_list)
+
+    def _categorical_columns(self, education: Any, technologies: List[str], soft_skills: List[str]):
+        """Yield (column, 1.0) for the education level, technologies and soft skills present."""
+        education_column = self.education_columns.get(education)
+        if education_column is not None:
+            yield self.education_offset + education_column, 1.0
+        for token in technologies:
+            column = self.tech_columns.get(token)
+            if column is not None:
+                yield self.tech_offset + column, 1.0
+        for token in soft_skills:
+            column = self.skill_columns.get(token)
+            if column is not None:
+                yield self.skills_offset + column, 1.0
@@ -0,0 +1,274 @@
+"""
+Incremental retraining of the classifier from recruiter feedback.
+
+Instead of fitting every tree again, the forest of the current version is
+grown with warm start: a few new trees are fitted on the newly labelled
+resumes (see ``app.services.feedback_log``) and added to the existing ones,
+optionally replacing the same number of the oldest trees so the forest keeps
+its size and gradually follows recent data.
+
+The preprocessors are frozen: new trees read the same feature columns as the
+old ones, so every tree stays valid. Technologies, soft skills, education
+levels and terms outside the fitted vocabularies are ignored, as at serving
+time, and reported, so the team can decide when a full retraining
+(``app.ml.training``) should extend the vocabularies.
+
+The result is published as a new version (pickles) in the model registry,
+where the watcher swaps it in. Usage:
+
+    python -m app.ml.retraining feedback/feedback.jsonl --base ml/registry --registry ml/registry --trees 15
+"""
+import argparse
+import json
+import os
+import shutil
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.ml.array_artifacts import LATEST_FILE, write_latest
+from app.ml.training import (
+    MODEL_FILE,
+    PhaseTimer,
+    TrainingColumns,
+    feature_matrix,
+    iter_dataset,
+    read_training_columns,
+    save_artifacts,
+)
+
+
+def resolve_base_dir(path: str) -> str:
+    """``path`` if it holds the pickles of a version, else the version its ``LATEST`` names."""
+    if os.path.exists(os.path.join(path, MODEL_FILE)):
+        return path
+    latest_path = os.path.join(path, LATEST_FILE)
+    if not os.path.exists(latest_path):
+        raise FileNotFoundError(f"Required model file not found: no {MODEL_FILE} or {LATEST_FILE} in {path}")
+    with open(latest_path) as latest_file:
+        return os.path.join(path, latest_file.read().strip())
+
+
+def load_base_model(path: str) -> Tuple[Any, Dict[str, Any], str]:
+    """The scikit-learn forest, preprocessors and version name of the version to grow."""
+    from sklearn.ensemble import RandomForestClassifier
+    from app.services.model_registry import load_version_artifacts
+
+    version_dir = resolve_base_dir(path)
+    model, artifacts = load_version_artifacts(version_dir)
+    if not isinstance(model, RandomForestClassifier):
+        raise ValueError(f"Warm start needs a pickled scikit-learn forest, {version_dir} holds "
+                         f"{type(model).__name__}")
+    artifacts = dict(artifacts)
+    # Versions are named by the registry, never by the pickled preprocessors
+    artifacts.pop('model_version', None)
+    return model, artifacts, os.path.basename(os.path.normpath(version_dir))
+
+
+def claim_feedback(path: str) -> str:
+    """
+    Rename the feedback log so this run owns its records; new feedback goes
+    to a fresh log. The claimed file is kept as an archive.
+    """
+    # The extension is kept, as it tells iter_dataset how to read the file
+    stem, extension = os.path.splitext(path)
+    claimed = f"{stem}.{datetime.now().strftime('%Y%m%dT%H%M%S')}{extension}"
+    os.replace(path, claimed)
+    return claimed
+
+
+def unknown_tokens(artifacts: Dict[str, Any], columns: TrainingColumns, top: int = 20) -> Dict[str, Any]:
+    """Tokens of each vocabulary that the fitted preprocessors do not know, with how often they occur."""
+    vectorizer = artifacts['tfidf_vectorizer']
+    analyzer = vectorizer.build_analyzer()
+    vocabularies = {
+        "technologies": (set(artifacts['mlb_tech'].classes_), columns.technologies),
+        "softSkills": (set(artifacts['mlb_skills'].classes_), columns.soft_skills),
+        "educationLevels": (set(artifacts['one_hot_encoder'].categories_[0]),
+                            [[level] for level in columns.education]),
+        "terms": (set(vectorizer.vocabulary_), [analyzer(text) for text in columns.texts]),
+    }
+    report = {}
+    for name, (known, rows) in vocabularies.items():
+        total = sum(len(row) for row in rows)
+        unknown = Counter(token for row in rows for token in row if token not in known)
+        occurrences = sum(unknown.values())
+        report[name] = {
+            "distinct": len(unknown),
+            "occurrences": occurrences,
+            "share": occurrences / total if total else 0.0,
+            "top": unknown.most_common(top),
+        }
+    return report
+
+
+def freeze_vocabularies(artifacts: Dict[str, Any], columns: TrainingColumns) -> None:
+    """Drop the technologies and soft skills the binarizers do not know, as serving ignores them."""
+    known_technologies = set(artifacts['mlb_tech'].classes_)
+    known_skills = set(artifacts['mlb_skills'].classes_)
+    columns.technologies = [[token for token in row if token in known_technologies] for row in columns.technologies]
+    columns.soft_skills = [[token for token in row if token in known_skills] for row in columns.soft_skills]
+
+
+def grow_forest(model: Any, features: np.ndarray, labels: np.ndarray, new_trees: int,
+                replace_oldest: bool = False, n_jobs: Optional[int] = -1,
+                random_state: Optional[int] = None) -> Any:
+    """
+    Fit ``new_trees`` more trees of ``model`` on the given rows with warm
+    start, then drop as many of the oldest trees when ``replace_oldest``.
+
+    Every class of the model must occur in ``labels``: scikit-learn derives
+    the classes of the new trees from the rows they are fitted on.
+    """
+    missing = sorted(set(model.classes_.tolist()) - set(labels.tolist()))
+    if missing:
+        raise ValueError(f"Rows lack examples of classes {missing}; every class is needed to grow the forest")
+    if new_trees < 1:
+        raise ValueError(f"At least one new tree is needed, got {new_trees}")
+
+    # A fresh seed per run, so replaced trees do not come back with the seeds of earlier runs
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees, n_jobs=n_jobs,
+                     random_state=random_state)
+    model.fit(features, labels)
+    if replace_oldest:
+        del model.estimators_[:new_trees]
+        model.n_estimators = len(model.estimators_)
+    # Served one row at a time, where spreading the trees over threads only adds overhead
+    model.set_params(warm_start=False, n_jobs=None)
+    return model
+
+
+def publish_version(model: Any, artifacts: Dict[str, Any], registry_root: str) -> Tuple[str, str]:
+    """
+    Write the model and preprocessors pickles as a new registry version,
+    named by their content, and point ``LATEST`` at it.
+    """
+    from app.utils import compute_artifact_version
+
+    # Written into a dot-prefixed directory, which the registry ignores until it is renamed
+    staging_dir = os.path.join(registry_root, f".retrain-{uuid.uuid4().hex}.tmp")
+    model_path, preprocessors_path = save_artifacts(model, artifacts, staging_dir)
+    version = compute_artifact_version(model_path, preprocessors_path)
+    version_dir = os.path.join(registry_root, version)
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.replace(staging_dir, version_dir)
+    write_latest(registry_root, version)
+    return version, version_dir
+
+
+def retrain(feedback_paths: List[str], base_path: str, registry_root: str, new_trees: int = 15,
+            replace_oldest: bool = False, n_jobs: Optional[int] = -1, random_state: Optional[int] = None,
+            chunk_size: int = 10000, publish: bool = True) -> Dict[str, Any]:
+    """
+    Grow the forest of the base version on labelled feedback and publish it.
+
+    Args:
+        feedback_paths: JSONL (or JSON array) files of resumes labelled with ``experienceLevel``
+        base_path: Version directory holding the pickles, or a registry root (its ``LATEST``)
+        registry_root: Registry receiving the new version
+        new_trees: Trees fitted on the feedback
+        replace_oldest: Drop as many of the oldest trees, keeping the forest size
+        n_jobs: Cores used to fit the new trees (-1: all of them)
+        random_state: Seed of the new trees (default: a fresh one)
+        chunk_size: Rows transformed into the feature matrix at a time
+        publish: Write the new version to the registry
+
+    Returns:
+        A report with row and class counts, unknown tokens, per-phase timings and the new version
+    """
+    timer = PhaseTimer()
+    with timer.phase("load_base"):
+        model, artifacts, base_version = load_base_model(base_path)
+    trees_before = len(model.estimators_)
+
+    with timer.phase("read_feedback"):
+        columns, skipped = TrainingColumns(), 0
+        for path in feedback_paths:
+            read, path_skipped = read_training_columns(iter_dataset(path))
+            for name in ("numerical", "education", "technologies", "soft_skills", "texts", "labels"):
+                getattr(columns, name).extend(getattr(read, name))
+            skipped += path_skipped
+    if not len(columns):
+        raise ValueError(f"No labelled resumes in {', '.join(feedback_paths)}")
+
+    with timer.phase("build_matrix"):
+        unknown = unknown_tokens(artifacts, columns)
+        freeze_vocabularies(artifacts, columns)
+        features = feature_matrix(artifacts, columns, chunk_size)
+        labels = np.asarray(columns.labels, dtype=np.int64)
+    if features.shape[1] != model.n_features_in_:
+        raise ValueError(f"Feedback rows have {features.shape[1]} features, the base model expects "
+                         f"{model.n_features_in_}")
+
+    inverse_mapping = {label: level for level, label in artifacts['level_mapping'].items()}
+    base_accuracy = float(np.mean(model.predict(features) == labels))
+    with timer.phase("grow_forest"):
+        grow_forest(model, features, labels, new_trees, replace_oldest, n_jobs, random_state)
+
+    version = version_dir = None
+    if publish:
+        with timer.phase("publish"):
+            version, version_dir = publish_version(model, artifacts, registry_root)
+
+    return {
+        "base_version": base_version,
+        "rows": len(labels),
+        "skipped": skipped,
+        "class_counts": {inverse_mapping[label]: int(count)
+                         for label, count in zip(*np.unique(labels, return_counts=True))},
+        "unknown_tokens": unknown,
+        "base_accuracy_on_feedback": base_accuracy,
+        "trees_before": trees_before,
+        "trees_after": len(model.estimators_),
+        "phases": timer.phases,
+        "phase_table": timer.table(),
+        "version": version,
+        "version_dir": version_dir,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Grow the served forest on recruiter feedback.")
+    parser.add_argument("feedback", nargs="+", help="Feedback logs (JSONL of labelled resumes)")
+    parser.add_argument("--base", required=True, help="Version directory with the pickles, or a registry root")
+    parser.add_argument("--registry", required=True, help="Registry receiving the new version")
+    parser.add_argument("--trees", type=int, default=15, help="Trees fitted on the feedback")
+    parser.add_argument("--replace-oldest", action="store_true", help="Drop as many of the oldest trees")
+    parser.add_argument("--claim", action="store_true",
+                        help="Rename each feedback log before reading it, so new feedback goes to a fresh log")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Cores used to fit the new trees (-1: all)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the new trees")
+    parser.add_argument("--dry-run", action="store_true", help="Report without publishing a version")
+    parser.add_argument("--report", default=None, help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    feedback_paths = [claim_feedback(path) for path in args.feedback] if args.claim else args.feedback
+    try:
+        report = retrain(feedback_paths, args.base, args.registry, new_trees=args.trees,
+                         replace_oldest=args.replace_oldest, n_jobs=args.n_jobs, random_state=args.seed,
+                         publish=not args.dry_run)
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+
+    print(f"{report['rows']} labelled resumes ({report['skipped']} skipped): {report['class_counts']}")
+    print(f"Base version {report['base_version']} was right on {report['base_accuracy_on_feedback']:.1%} of them")
+    for name, unknown in report["unknown_tokens"].items():
+        top = ", ".join(f"{token} ({count})" for token, count in unknown["top"][:5])
+        print(f"unknown {name}: {unknown['distinct']} distinct, {unknown['share']:.1%} of occurrences"
+              + (f"; {top}" if top else ""))
+    print(report["phase_table"])
+    print(f"Trees: {report['trees_before']} -> {report['trees_after']}")
+    if report["version"]:
+        print(f"Published version {report['version']} at {report['version_dir']}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump({key: value for key, value in report.items() if key != "phase_table"}, report_file,
+                      indent=2, ensure_ascii=False)
+            report_file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
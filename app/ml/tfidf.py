@@ -0,0 +1,163 @@
+"""
+TF-IDF weighting from plain lookup tables.
+
+Reproduces ``TfidfVectorizer.transform`` of the fitted vectorizer (word
+analyzer, unigrams, lowercasing, stop words, smoothed IDF, l2 norm) with
+only ``re`` and NumPy, so exported artifacts can be served without
+unpickling scikit-learn objects. Results are bit-for-bit identical: counts
+are weighted by the IDF in float64 and every row is normalized by the square
+root of its sum of squares, accumulated in column order like scikit-learn.
+
+``FragmentCountCache`` builds the same rows from cached term counts of the
+fragments a text is joined from, so repeated activity descriptions are
+tokenized once.
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+class TfidfTables:
+    """Vocabulary, IDF weights and tokenizer settings of a fitted TF-IDF vectorizer."""
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray, token_pattern: str,
+                 stop_words: Optional[Iterable[str]] = None, lowercase: bool = True,
+                 norm: Optional[str] = "l2"):
+        if norm not in ("l2", None):
+            raise ValueError(f"Unsupported TF-IDF norm: {norm}")
+        self.vocabulary_ = vocabulary
+        self.idf_ = idf
+        self.token_pattern = token_pattern
+        self.stop_words = frozenset(stop_words or ())
+        self.lowercase = lowercase
+        self.norm = norm
+        self._token_regex = re.compile(token_pattern)
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer: Any) -> "TfidfTables":
+        """Extract the tables of a fitted ``TfidfVectorizer``, rejecting settings not reproduced here."""
+        unsupported = {
+            "analyzer": "word", "ngram_range": (1, 1), "strip_accents": None, "preprocessor": None,
+            "tokenizer": None, "binary": False, "sublinear_tf": False, "use_idf": True,
+        }
+        for name, expected in unsupported.items():
+            value = getattr(vectorizer, name)
+            if value != expected:
+                raise ValueError(f"TF-IDF setting {name}={value!r} cannot be exported (expected {expected!r})")
+        stop_words = vectorizer.get_stop_words()
+        return cls(
+            vocabulary={term: int(column) for term, column in vectorizer.vocabulary_.items()},
+            idf=np.asarray(vectorizer.idf_, dtype=np.float64),
+            token_pattern=vectorizer.token_pattern,
+            stop_words=sorted(stop_words) if stop_words else None,
+            lowercase=vectorizer.lowercase,
+            norm=vectorizer.norm,
+        )
+
+    def tokens(self, text: str) -> List[str]:
+        """Tokens of ``text`` that count towards the vocabulary, stop words removed."""
+        if self.lowercase:
+            text = text.lower()
+        return [token for token in self._token_regex.findall(text) if token not in self.stop_words]
+
+    def term_counts(self, text: str) -> Dict[int, int]:
+        """Occurrences of each vocabulary column in ``text``."""
+        counts: Dict[int, int] = {}
+        for token in self.tokens(text):
+            column = self.vocabulary_.get(token)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        return counts
+
+    def transform(self, texts: List[str]) -> sparse.csr_matrix:
+        """TF-IDF rows of ``texts`` as a float64 CSR matrix with sorted column indices."""
+        return self.weight_counts([self.term_counts(text) for text in texts])
+
+    def weight_counts(self, rows: List[Dict[int, int]]) -> sparse.csr_matrix:
+        """TF-IDF rows from the term counts of each row: IDF weighting, then normalization."""
+        indptr, indices, data = [0], [], []
+        for counts in rows:
+            for column in sorted(counts):
+                indices.append(column)
+                data.append(counts[column])
+            indptr.append(len(indices))
+
+        indices_array = np.asarray(indices, dtype=np.int32)
+        values = np.asarray(data, dtype=np.float64) * self.idf_[indices_array]
+        if self.norm == "l2":
+            for start, end in zip(indptr[:-1], indptr[1:]):
+                if end > start:
+                    # cumsum accumulates in column order, as scikit-learn's row normalization does
+                    norm = np.sqrt(np.cumsum(values[start:end] * values[start:end])[-1])
+                    if norm != 0.0:
+                        values[start:end] /= norm
+        return sparse.csr_matrix((values, indices_array, np.asarray(indptr, dtype=np.int32)),
+                                 shape=(len(rows), len(self.vocabulary_)))
+
+
+class FragmentCountCache:
+    """
+    TF-IDF of texts made of space-joined fragments, from cached per-fragment term counts.
+
+    Activity and problem descriptions repeat across resumes (many come from
+    the same templates), so the term counts of each distinct fragment are
+    kept in a bounded LRU. A row's counts are the sum of its fragments'
+    counts: tokens never span the separating space, so the sum equals the
+    counts of the joined text, and weighting them with the vectorizer's
+    tables gives exactly ``transform(" ".join(fragments))``.
+    """
+
+    def __init__(self, tables: TfidfTables, max_entries: int):
+        self.tables = tables
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def transform(self, fragment_rows: List[List[str]]) -> sparse.csr_matrix:
+        """TF-IDF rows of ``" ".join(fragments)`` for every list of fragments."""
+        return self.tables.weight_counts([self.counts(fragments) for fragments in fragment_rows])
+
+    def counts(self, fragments: List[str]) -> Dict[int, int]:
+        """Term counts of ``" ".join(fragments)``, summed from the cached counts of each fragment."""
+        counts: Dict[int, int] = {}
+        for fragment in fragments:
+            for column, count in self._fragment_counts(fragment):
+                counts[column] = counts.get(column, 0) + count
+        return counts
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def _fragment_counts(self, fragment: str) -> Tuple[Tuple[int, int], ...]:
+        with self._lock:
+            counts = self._entries.get(fragment)
+            if counts is not None:
+                self._entries.move_to_end(fragment)
+                self.hits += 1
+                return counts
+            self.misses += 1
+        # Tokenized outside the lock; a fragment raced by two threads is counted twice, harmlessly
+        counts = tuple(self.tables.term_counts(fragment).items())
+        with self._lock:
+            self._entries[fragment] = counts
+            self._entries.move_to_end(fragment)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return counts
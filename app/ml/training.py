@@ -0,0 +1,425 @@
+"""
+Training pipeline of the experience level classifier.
+
+Reproduces the notebook export in ``traning.py`` (same features,
+preprocessors, train/test split and forest) as a reusable module that reads
+a local dataset instead of downloading it:
+
+- the dataset, a JSON array or JSONL file of labelled resumes, is streamed
+  and only the compact features of each resume are kept, not its JSON
+- the feature matrix is written chunk by chunk into one preallocated
+  float32 array, the precision the forest is fitted in
+- the forest is fitted on every core (``n_jobs``)
+
+Each phase reports its wall time and the peak resident memory of the
+process so far. The artifacts are written in the layout
+``load_model_artifacts`` reads (and optionally exported as arrays).
+
+Usage:
+    python -m app.ml.training dataset.jsonl --output-dir ml [--smote] [--arrays ml/talent_flow_arrays]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import pickle
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+LEVEL_MAPPING = {'Júnior': 0, 'Pleno': 1, 'Sênior': 2, 'Especialista': 3}
+NUMERICAL_FEATURES = ['totalYearsExperience', 'numberOfJobs', 'avgYearsPerJob']
+STOP_WORDS = ['de', 'a', 'o', 'que', 'e', 'do', 'da', 'em', 'um']
+EDUCATION_ORDER = {"Técnico": 1, "Graduação": 2, "Especialização": 3, "MBA": 3, "Pós-graduação": 3, "Mestrado": 4,
+                   "Doutorado": 5, "Nenhum": 0}
+DATE_FORMATS = ('%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%d')
+MODEL_FILE = 'talent_flow_classifier.pkl'
+PREPROCESSORS_FILE = 'talent_flow_preprocessors.pkl'
+
+
+def iter_dataset(path: str, block_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the resumes of a JSONL file (``.jsonl``) or of a JSON array, one
+    at a time, reading ``block_size`` characters at a time.
+    """
+    with open(path, encoding="utf-8") as dataset_file:
+        if path.endswith(".jsonl"):
+            for line_number, line in enumerate(dataset_file, start=1):
+                if line.strip():
+                    yield _expect_object(json.loads(line), f"line {line_number}")
+        else:
+            yield from _iter_json_array(dataset_file, block_size)
+
+
+def _iter_json_array(dataset_file: TextIO, block_size: int) -> Iterator[Dict[str, Any]]:
+    decoder = json.JSONDecoder()
+    buffer, opened, index = "", False, 0
+    for block in iter(lambda: dataset_file.read(block_size), ""):
+        buffer += block
+        position = 0
+        while True:
+            # Skip whitespace, the opening bracket and the commas between items
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] in ",["):
+                if buffer[position] == "[":
+                    if opened:
+                        raise ValueError("Dataset must be a JSON array of resume objects")
+                    opened = True
+                position += 1
+            if position >= len(buffer):
+                break
+            if not opened:
+                raise ValueError("Dataset must be a JSON array of resume objects")
+            if buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The item continues in the next block
+                break
+            yield _expect_object(item, f"item {index}")
+            index += 1
+        buffer = buffer[position:]
+    raise ValueError("Dataset ends before its JSON array is closed")
+
+
+def _expect_object(item: Any, where: str) -> Dict[str, Any]:
+    if not isinstance(item, dict):
+        raise ValueError(f"Dataset {where} is not a resume object")
+    return item
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def total_years_experience(experiences: List[Dict[str, Any]], today: datetime) -> float:
+    """Total years of experience, rounded to one decimal, as computed in the notebook."""
+    total_days = 0
+    for experience in experiences or []:
+        start = _parse_date(experience.get('startDate'))
+        if start is None:
+            continue
+        end = today
+        if not experience.get('isCurrent', False) and experience.get('endDate'):
+            end = _parse_date(experience.get('endDate')) or today
+        total_days += (end - start).days
+    return round(total_days / 365.25, 1)
+
+
+def highest_education_level(formations: List[Dict[str, Any]]) -> str:
+    """Highest education level of the formations, "Nenhum" when there are none."""
+    if not formations:
+        return "Nenhum"
+    highest = max(formations, key=lambda formation: EDUCATION_ORDER.get(formation.get('level', 'Nenhum'), 0))
+    return highest['level']
+
+
+def training_features(resume: Dict[str, Any], today: datetime) -> Dict[str, Any]:
+    """Features of one resume for training, as ``extract_simplified_features`` of the notebook builds them."""
+    technologies, soft_skills = set(), set()
+    text_parts = [resume.get('summary', '')]
+    experiences = resume.get('professionalExperiences', [])
+
+    for experience in experiences:
+        text_parts.append(experience.get('role', ''))
+        for activity in experience.get('activitiesPerformed', []):
+            text_parts.extend([activity.get('activity', ''), activity.get('problemSolved', '')])
+            if isinstance(activity.get('technologies'), list):
+                technologies.update(activity.get('technologies', []))
+            if isinstance(activity.get('appliedSoftSkills'), list):
+                soft_skills.update(activity.get('appliedSoftSkills', []))
+
+    number_of_jobs = len(experiences)
+    total_years = total_years_experience(experiences, today)
+    return {
+        'totalYearsExperience': total_years,
+        'numberOfJobs': number_of_jobs,
+        'avgYearsPerJob': round(total_years / number_of_jobs if number_of_jobs > 0 else 0, 1),
+        'highestEducationLevel': highest_education_level(resume.get('academicFormations', [])),
+        'allTechnologies': list(technologies),
+        'allSoftSkills': list(soft_skills),
+        'fullText': " ".join(filter(None, text_parts)),
+    }
+
+
+class TrainingColumns:
+    """Features and labels of a training set, one column per feature."""
+
+    def __init__(self):
+        self.numerical: List[Tuple[float, int, float]] = []
+        self.education: List[str] = []
+        self.technologies: List[List[str]] = []
+        self.soft_skills: List[List[str]] = []
+        self.texts: List[str] = []
+        self.labels: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def append(self, features: Dict[str, Any], label: int) -> None:
+        self.numerical.append(tuple(features[name] for name in NUMERICAL_FEATURES))
+        self.education.append(features['highestEducationLevel'])
+        self.technologies.append(features['allTechnologies'])
+        self.soft_skills.append(features['allSoftSkills'])
+        self.texts.append(features['fullText'])
+        self.labels.append(label)
+
+
+def read_training_columns(resumes: Iterator[Dict[str, Any]],
+                          today: Optional[datetime] = None) -> Tuple[TrainingColumns, int]:
+    """
+    Training features of ``resumes``, with the number of resumes skipped
+    because their ``experienceLevel`` is missing or not one of the levels.
+    """
+    today = today or datetime.now()
+    columns, skipped = TrainingColumns(), 0
+    for resume in resumes:
+        label = LEVEL_MAPPING.get(resume.get('experienceLevel'))
+        if label is None:
+            skipped += 1
+            continue
+        columns.append(training_features(resume, today), label)
+    return columns, skipped
+
+
+def fit_preprocessors(columns: TrainingColumns) -> Dict[str, Any]:
+    """Fit the preprocessors on every row, as the notebook does, and return the artifacts dictionary."""
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.preprocessing import MinMaxScaler, MultiLabelBinarizer, OneHotEncoder
+
+    # Fitted on DataFrames so they keep the feature names the serving pipeline passes
+    scaler = MinMaxScaler().fit(pd.DataFrame(columns.numerical, columns=NUMERICAL_FEATURES))
+    one_hot_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore').fit(
+        pd.DataFrame({'highestEducationLevel': columns.education})
+    )
+    return {
+        'scaler': scaler,
+        'one_hot_encoder': one_hot_encoder,
+        'mlb_tech': MultiLabelBinarizer().fit(columns.technologies),
+        'mlb_skills': MultiLabelBinarizer().fit(columns.soft_skills),
+        'tfidf_vectorizer': TfidfVectorizer(max_features=200, stop_words=STOP_WORDS).fit(columns.texts),
+        'level_mapping': dict(LEVEL_MAPPING),
+        'numerical_features_order': list(NUMERICAL_FEATURES),
+    }
+
+
+def feature_matrix(artifacts: Dict[str, Any], columns: TrainingColumns, chunk_size: int = 10000) -> np.ndarray:
+    """The model input of every row, transformed ``chunk_size`` rows at a time into one float32 matrix."""
+    import pandas as pd
+
+    blocks = [
+        (lambda rows: artifacts['scaler'].transform(
+            pd.DataFrame(columns.numerical[rows], columns=NUMERICAL_FEATURES)), len(NUMERICAL_FEATURES)),
+        (lambda rows: artifacts['one_hot_encoder'].transform(
+            pd.DataFrame({'highestEducationLevel': columns.education[rows]})),
+         len(artifacts['one_hot_encoder'].categories_[0])),
+        (lambda rows: artifacts['mlb_tech'].transform(columns.technologies[rows]),
+         len(artifacts['mlb_tech'].classes_)),
+        (lambda rows: artifacts['mlb_skills'].transform(columns.soft_skills[rows]),
+         len(artifacts['mlb_skills'].classes_)),
+        (lambda rows: artifacts['tfidf_vectorizer'].transform(columns.texts[rows]).toarray(),
+         len(artifacts['tfidf_vectorizer'].vocabulary_)),
+    ]
+    matrix = np.empty((len(columns), sum(width for _, width in blocks)), dtype=np.float32)
+    for start in range(0, len(columns), chunk_size):
+        rows = slice(start, start + chunk_size)
+        offset = 0
+        for transform, width in blocks:
+            matrix[rows, offset:offset + width] = transform(rows)
+            offset += width
+    return matrix
+
+
+def resample_with_smote(features: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Balance the classes with SMOTE, with as many neighbours as the smallest class allows."""
+    from imblearn.over_sampling import SMOTE
+
+    min_class_count = np.bincount(labels).min()
+    k_neighbors = min(5, min_class_count - 1) if min_class_count > 1 else 1
+    return SMOTE(random_state=42, k_neighbors=k_neighbors).fit_resample(features, labels)
+
+
+def fit_forest(features: np.ndarray, labels: np.ndarray, n_estimators: int = 150, n_jobs: Optional[int] = -1,
+               random_state: int = 42) -> Any:
+    """Fit the random forest on ``n_jobs`` cores."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs)
+    model.fit(features, labels)
+    # Served one row at a time, where spreading the trees over threads only adds overhead
+    model.n_jobs = None
+    return model
+
+
+def save_artifacts(model: Any, artifacts: Dict[str, Any], output_dir: str) -> Tuple[str, str]:
+    """Write the model and preprocessors pickles under ``output_dir``; return their paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    preprocessors_path = os.path.join(output_dir, PREPROCESSORS_FILE)
+    with open(model_path, 'wb') as model_file:
+        pickle.dump(model, model_file)
+    with open(preprocessors_path, 'wb') as preprocessors_file:
+        pickle.dump(artifacts, preprocessors_file)
+    return model_path, preprocessors_path
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of the process in MiB, or None where the platform does not report it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in KiB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PhaseTimer:
+    """Wall time and peak memory after each phase of a run."""
+
+    def __init__(self):
+        self.phases: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started_at = time.perf_counter()
+        yield
+        self.phases.append({"phase": name, "seconds": time.perf_counter() - started_at,
+                            "peak_rss_mb": peak_rss_mb()})
+
+    def table(self) -> str:
+        lines = [f"{'phase':<22} {'seconds':>9} {'peak RSS (MiB)':>15}"]
+        for phase in self.phases:
+            peak = f"{phase['peak_rss_mb']:.1f}" if phase['peak_rss_mb'] is not None else "n/a"
+            lines.append(f"{phase['phase']:<22} {phase['seconds']:>9.2f} {peak:>15}")
+        return "\n".join(lines)
+
+
+def train(dataset_path: str, output_dir: str, chunk_size: int = 10000, n_jobs: Optional[int] = -1,
+          n_estimators: int = 150, smote: bool = False, test_size: float = 0.3,
+          arrays_root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Train the classifier on a local dataset and write its artifacts.
+
+    Args:
+        dataset_path: JSON array or JSONL file of resumes labelled with ``experienceLevel``
+        output_dir: Directory receiving the model and preprocessors pickles
+        chunk_size: Rows transformed into the feature matrix at a time
+        n_jobs: Cores used to fit the forest (-1: all of them)
+        n_estimators: Number of trees
+        smote: Balance the training split with SMOTE (needs imbalanced-learn)
+        test_size: Share of the rows held out for evaluation (0 trains on every row)
+        arrays_root: Also export the artifacts as arrays under this directory
+
+    Returns:
+        A report with the row counts, per-phase timings, evaluation and artifact paths
+    """
+    from sklearn.metrics import classification_report
+    from sklearn.model_selection import train_test_split
+
+    if smote and importlib.util.find_spec("imblearn") is None:
+        # Checked before the dataset is read, not after minutes of feature extraction
+        raise ImportError("SMOTE needs the imbalanced-learn package (pip install imbalanced-learn)")
+
+    timer = PhaseTimer()
+    with timer.phase("read_and_extract"):
+        columns, skipped = read_training_columns(iter_dataset(dataset_path))
+    if not len(columns):
+        raise ValueError(f"No labelled resumes in {dataset_path}")
+    with timer.phase("fit_preprocessors"):
+        artifacts = fit_preprocessors(columns)
+    with timer.phase("build_matrix"):
+        features = feature_matrix(artifacts, columns, chunk_size)
+        labels = np.asarray(columns.labels, dtype=np.int64)
+        del columns
+
+    if test_size > 0:
+        train_features, test_features, train_labels, test_labels = train_test_split(
+            features, labels, test_size=test_size, random_state=42, stratify=labels
+        )
+    else:
+        train_features, train_labels, test_features, test_labels = features, labels, None, None
+    if smote:
+        with timer.phase("smote"):
+            train_features, train_labels = resample_with_smote(train_features, train_labels)
+
+    with timer.phase("fit_forest"):
+        model = fit_forest(train_features, train_labels, n_estimators, n_jobs)
+
+    evaluation = None
+    if test_features is not None:
+        with timer.phase("evaluate"):
+            evaluation = classification_report(
+                test_labels, model.predict(test_features), labels=list(LEVEL_MAPPING.values()),
+                target_names=list(LEVEL_MAPPING), zero_division=0, output_dict=True
+            )
+
+    with timer.phase("save_artifacts"):
+        model_path, preprocessors_path = save_artifacts(model, artifacts, output_dir)
+        arrays_dir = None
+        if arrays_root is not None:
+            from app.ml.array_artifacts import export_array_artifacts
+            from app.utils import compute_artifact_version
+            arrays_dir = export_array_artifacts(model, artifacts, arrays_root,
+                                                version=compute_artifact_version(model_path, preprocessors_path))
+
+    return {
+        "rows": len(labels),
+        "skipped": skipped,
+        "train_rows": len(train_labels),
+        "features": features.shape[1],
+        "phases": timer.phases,
+        "phase_table": timer.table(),
+        "evaluation": evaluation,
+        "model_path": model_path,
+        "preprocessors_path": preprocessors_path,
+        "arrays_dir": arrays_dir,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the experience level classifier on a local dataset.")
+    parser.add_argument("dataset", help="JSON array or JSONL file of resumes labelled with experienceLevel")
+    parser.add_argument("--output-dir", default="ml", help="Directory receiving the pickled artifacts")
+    parser.add_argument("--arrays", default=None, help="Also export the artifacts as arrays under this directory")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows transformed at a time")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Cores used to fit the forest (-1: all)")
+    parser.add_argument("--n-estimators", type=int, default=150)
+    parser.add_argument("--smote", action="store_true", help="Balance the training split with SMOTE")
+    parser.add_argument("--test-size", type=float, default=0.3, help="Share held out for evaluation")
+    parser.add_argument("--report", default=None, help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        report = train(args.dataset, args.output_dir, chunk_size=args.chunk_size, n_jobs=args.n_jobs,
+                       n_estimators=args.n_estimators, smote=args.smote, test_size=args.test_size,
+                       arrays_root=args.arrays)
+    except (ImportError, ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+    print(f"{report['rows']} resumes ({report['skipped']} skipped without a known level), "
+          f"{report['features']} features, {report['train_rows']} training rows")
+    print(report["phase_table"])
+    if report["evaluation"] is not None:
+        print(f"accuracy {report['evaluation']['accuracy']:.3f}, "
+              f"macro F1 {report['evaluation']['macro avg']['f1-score']:.3f}")
+    print(f"Artifacts: {report['model_path']}, {report['preprocessors_path']}"
+          + (f", {report['arrays_dir']}" if report["arrays_dir"] else ""))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump({key: value for key, value in report.items() if key != "phase_table"}, report_file,
+                      indent=2, ensure_ascii=False)
+            report_file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
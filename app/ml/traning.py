@@ -218,6 +218,19 @@ if resumes_data:
         pickle.dump(artifacts, f)
     print(f"Pré-processadores salvos em '{preprocessors_path}'")
 
+    # Exporta também no formato de arrays (.npy + manifest.json), carregado pela API sem pickle
+    try:
+        from app.ml.array_artifacts import export_array_artifacts
+        from app.utils import compute_artifact_version
+
+        arrays_dir = export_array_artifacts(
+            model, artifacts, os.path.join(DRIVE_PATH, 'talent_flow_arrays'),
+            version=compute_artifact_version(model_path, preprocessors_path)
+        )
+        print(f"Artefatos em arrays salvos em '{arrays_dir}'")
+    except ImportError:
+        print("Pacote 'app' indisponível; execute a partir da raiz do repositório para exportar os arrays.")
+
     # --- 6. Demonstração de Como Usar o Modelo em Produção ---
     print("\n" + "=" * 50)
     print("PASSO 4: DEMONSTRAÇÃO DE PREDIÇÃO COM NOVO DADO")
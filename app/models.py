@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 
 class ActivityPerformed(BaseModel):
@@ -46,9 +46,70 @@ class ResumePayload(BaseModel):
     languages: Optional[List[LanguageEntry]] = Field(default_factory=list)
     status: Optional[str] = None
 
+class ResumePatchOperation(BaseModel):
+    """Model for one change of a stored resume: add, update or remove an experience or formation."""
+    op: Literal["add", "update", "remove"]
+    section: Literal["professionalExperiences", "academicFormations"]
+    index: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Entry to update or remove; for add, the position to insert at (appended when omitted)"
+    )
+    value: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="The new experience or formation, for add and update"
+    )
+
+class ResumePatch(BaseModel):
+    """Model for the incremental re-classification request payload."""
+    operations: List[ResumePatchOperation] = Field(..., min_length=1)
+
+ExperienceLevel = Literal["Júnior", "Pleno", "Sênior", "Especialista"]
+
+class FeedbackPayload(BaseModel):
+    """Model for a recruiter's confirmation or correction of a classification.
+
+    The resume is kept raw, as it was submitted for classification, so it is
+    stored with its original date strings for retraining.
+    """
+    resume: Dict[str, Any]
+    experienceLevel: ExperienceLevel = Field(..., description="Level confirmed or corrected by the recruiter")
+    predictedExperienceLevel: Optional[str] = Field(default=None, description="Level the model answered")
+    modelVersion: Optional[str] = Field(default=None, description="Version of the model that answered")
+
+class ClassProbability(BaseModel):
+    """Model for the probability of one experience level."""
+    level: str
+    probability: float
+
 class ClassificationResponse(BaseModel):
     """Model for the resume classification response."""
     userId: str
     predictedExperienceLevel: str
     confidenceScore: float
     hash: str
+    modelVersion: Optional[str] = Field(default=None, description="Version of the model that produced the classification")
+    probabilities: Optional[List[ClassProbability]] = Field(
+        default=None,
+        description="Per-level probabilities, most likely first. Only present when requested."
+    )
+
+class BatchResumePayload(BaseModel):
+    """Model for the batch classification request payload.
+
+    Resumes are kept as raw objects so each one is validated on its own and a
+    malformed entry is reported in its item instead of rejecting the batch.
+    """
+    resumes: List[Dict[str, Any]] = Field(..., min_length=1)
+
+class BatchClassificationItem(BaseModel):
+    """Model for the outcome of one resume in a batch classification."""
+    index: int
+    result: Optional[ClassificationResponse] = None
+    error: Optional[str] = None
+
+class BatchClassificationResponse(BaseModel):
+    """Model for the batch classification response."""
+    results: List[BatchClassificationItem]
+    succeeded: int
+    failed: int
@@ -0,0 +1,193 @@
+"""
+Offline scoring of large JSONL files on every core.
+
+The input is read in chunks of lines, so memory stays bounded by the chunk
+size and the number of chunks in flight, whatever the file size. Chunks are
+scored by a process pool whose workers load the model artifacts once, and
+written back in input order. After each chunk is written a checkpoint records
+the input and output byte offsets, so an interrupted run resumes from the
+last completed chunk instead of starting over.
+"""
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import ValidationError
+
+from app.models import ResumePayload
+from app.utils import format_validation_error, select_probabilities
+
+# Service used by pool workers, created by _init_worker
+_worker_service = None
+
+# A chunk of input: (first byte offset, byte offset after the chunk, number of the last line read,
+# [(line number, line bytes)] of its non-blank lines)
+Chunk = Tuple[int, int, int, List[Tuple[int, bytes]]]
+
+
+def _init_worker(model_path: str, preprocessors_path: str) -> None:
+    global _worker_service
+    from app.services.prediction_service import ResumeClassifierService
+    from app.utils import load_model_artifacts
+    model, artifacts = load_model_artifacts(model_path, preprocessors_path)
+    _worker_service = ResumeClassifierService(model, artifacts)
+    # Every resume of a re-scoring run is seen once; caching would only cost memory
+    _worker_service.prediction_cache = None
+
+
+def score_lines(service: Any, lines: List[Tuple[int, bytes]], include_probabilities: bool = False,
+                max_line_bytes: Optional[int] = None) -> Tuple[bytes, int]:
+    """
+    Classify NDJSON lines and return the output lines, in the same order,
+    with the number of lines that failed.
+
+    Each output line is the classification of the input line, or
+    ``{"line": n, "error": ...}`` when the line cannot be classified.
+    """
+    outputs: List[Any] = [None] * len(lines)
+    resumes, positions = [], []
+    for position, (line_number, line) in enumerate(lines):
+        if max_line_bytes is not None and len(line) > max_line_bytes:
+            outputs[position] = {"line": line_number, "error": "Line exceeds the maximum allowed size"}
+            continue
+        try:
+            resumes.append(ResumePayload.model_validate_json(line))
+            positions.append(position)
+        except ValidationError as e:
+            outputs[position] = {"line": line_number, "error": format_validation_error(e)}
+
+    if resumes:
+        for position, outcome in zip(positions, service.predict_batch(resumes)):
+            if outcome["error"] is not None:
+                outputs[position] = {"line": lines[position][0], "error": outcome["error"]}
+            else:
+                outputs[position] = select_probabilities(outcome["result"], include_probabilities, None)
+
+    failed = sum(1 for output in outputs if "error" in output)
+    return b"".join(
+        json.dumps(output, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        for output in outputs
+    ), failed
+
+
+def _score_chunk_in_worker(lines: List[Tuple[int, bytes]], include_probabilities: bool,
+                           max_line_bytes: Optional[int]) -> Tuple[bytes, int]:
+    return score_lines(_worker_service, lines, include_probabilities, max_line_bytes)
+
+
+def read_chunks(input_file, chunk_size: int, line_number: int = 0) -> Iterator[Chunk]:
+    """
+    Read non-blank lines from a binary file object in chunks of ``chunk_size``.
+
+    Line numbers are 1-based and count blank lines, continuing from
+    ``line_number`` (the number of lines before the current file position).
+    """
+    start = input_file.tell()
+    lines: List[Tuple[int, bytes]] = []
+    for raw in iter(input_file.readline, b""):
+        line_number += 1
+        line = raw.strip()
+        if line:
+            lines.append((line_number, line))
+        if len(lines) >= chunk_size:
+            end = input_file.tell()
+            yield start, end, line_number, lines
+            start, lines = end, []
+    end = input_file.tell()
+    if end > start:
+        yield start, end, line_number, lines
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, int]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, int]) -> None:
+    """Write the checkpoint atomically, so a crash never leaves a truncated one."""
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def score_file(input_path: str, output_path: str, model_path: str, preprocessors_path: str,
+               workers: int, chunk_size: int = 1000, checkpoint_path: Optional[str] = None,
+               resume: bool = False, include_probabilities: bool = False,
+               max_line_bytes: Optional[int] = None, report_every: float = 5.0) -> Dict[str, Any]:
+    """
+    Score every line of ``input_path`` into ``output_path``, one output line per input line.
+
+    With ``resume``, scoring restarts after the last chunk recorded in the
+    checkpoint; the output is truncated to the matching offset first, so lines
+    written after the checkpoint are not duplicated.
+
+    Returns:
+        Totals of the run: lines scored, errors, elapsed seconds and lines per second
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    if checkpoint is None:
+        checkpoint = {"input_offset": 0, "output_offset": 0, "line_number": 0, "lines": 0, "errors": 0}
+    elif checkpoint["input_offset"] > 0:
+        logger.info(f"Resuming from line {checkpoint['line_number'] + 1} of {input_path}")
+
+    max_in_flight = 2 * workers
+    scored = errors = 0
+    started_at = last_report = time.perf_counter()
+
+    with open(input_path, "rb") as input_file, open(output_path, "ab") as output_file, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(model_path, preprocessors_path)) as pool:
+        output_file.truncate(checkpoint["output_offset"])
+        input_file.seek(checkpoint["input_offset"])
+        pending: "deque[Tuple[Chunk, Future]]" = deque()
+
+        def write_oldest() -> None:
+            nonlocal scored, errors
+            (_, end, last_line_number, lines), future = pending.popleft()
+            output, chunk_errors = future.result()
+            output_file.write(output)
+            output_file.flush()
+            os.fsync(output_file.fileno())
+            scored += len(lines)
+            errors += chunk_errors
+            checkpoint.update(
+                input_offset=end,
+                output_offset=output_file.tell(),
+                line_number=last_line_number,
+                lines=checkpoint["lines"] + len(lines),
+                errors=checkpoint["errors"] + chunk_errors,
+            )
+            save_checkpoint(checkpoint_path, checkpoint)
+
+        for chunk in read_chunks(input_file, chunk_size, checkpoint["line_number"]):
+            pending.append((chunk, pool.submit(_score_chunk_in_worker, chunk[3], include_probabilities,
+                                               max_line_bytes)))
+            # Bounded read-ahead: wait for the oldest chunk before reading more
+            while len(pending) >= max_in_flight or (pending and pending[0][1].done()):
+                write_oldest()
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                logger.info(f"Scored {scored} lines ({scored / (now - started_at):.0f} lines/s)")
+                last_report = now
+        while pending:
+            write_oldest()
+
+    elapsed = time.perf_counter() - started_at
+    return {
+        "lines": scored,
+        "errors": errors,
+        "total_lines": checkpoint["lines"],
+        "total_errors": checkpoint["errors"],
+        "elapsed_seconds": elapsed,
+        "lines_per_second": scored / elapsed if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,49 @@
+"""
+Append-only log of recruiter feedback on classifications.
+
+Each line is the resume as it was submitted, labelled with the
+``experienceLevel`` a recruiter confirmed or corrected, plus a ``feedback``
+object recording what the model answered. The file is a labelled dataset
+that ``app.ml.retraining`` (or a full ``app.ml.training`` run) reads as is.
+
+Every record is written with a single ``write`` on a file opened in append
+mode, so several server workers can share the log. The file is opened per
+record: once a retraining run claims the log by renaming it, new feedback
+starts a fresh file.
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+class FeedbackLog:
+    """Labelled resumes collected from recruiters, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def record(self, resume: Dict[str, Any], experience_level: str,
+               predicted_level: Optional[str] = None, model_version: Optional[str] = None) -> None:
+        line = dict(resume, experienceLevel=experience_level, feedback={
+            "predictedExperienceLevel": predicted_level,
+            "modelVersion": model_version,
+            "recordedAt": datetime.now(timezone.utc).isoformat(),
+        })
+        data = (json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        descriptor = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(descriptor, data)
+        finally:
+            os.close(descriptor)
+        with self._lock:
+            self.records += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": True, "path": self.path, "records": self.records}
@@ -0,0 +1,169 @@
+"""
+Executor that keeps CPU-bound inference off the asyncio event loop.
+
+Service methods are run in a bounded thread pool, or optionally in a process
+pool where each worker loads its own ``ResumeClassifierService``. Endpoints
+await the result, so the event loop keeps serving other requests while a
+forest is evaluated.
+"""
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Upper bounds, in milliseconds, of the queue wait histogram buckets
+WAIT_TIME_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Service used by process pool workers, created by _init_worker
+_worker_service = None
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the inference queue is full and a task cannot be accepted."""
+
+
+def _init_worker() -> None:
+    global _worker_service
+    from app.services.prediction_service import ResumeClassifierService
+    _worker_service = ResumeClassifierService()
+
+
+def _timed_call(target: Callable[..., Any], *args: Any) -> Tuple[float, Any]:
+    # time.time() is comparable across processes, unlike perf_counter()
+    started_at = time.time()
+    return started_at, target(*args)
+
+
+def _call_in_worker(method: str, *args: Any) -> Tuple[float, Any]:
+    return _timed_call(getattr(_worker_service, method), *args)
+
+
+class InferenceExecutor:
+    """
+    Bounded pool running ``ResumeClassifierService`` methods.
+
+    At most ``max_workers`` calls run at once and up to ``max_queue_size``
+    more may wait; beyond that, submissions fail with ExecutorSaturatedError
+    instead of queueing without limit.
+    """
+
+    def __init__(self, service: Any, mode: str = "thread", max_workers: int = 4, max_queue_size: int = 64):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor mode: {mode}")
+        self._service = service
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._pool: Optional[Executor] = None
+        self._pool_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._max_queue_depth = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._wait_buckets = [0] * (len(WAIT_TIME_BUCKETS_MS) + 1)
+
+    def set_service(self, service: Any) -> None:
+        """Run subsequent thread mode calls on ``service`` (e.g. once it finished loading)."""
+        self._service = service
+
+    def submit(self, method: str, *args: Any) -> Future:
+        """Schedule ``service.<method>(*args)`` and return a future with its result."""
+        pool = self._ensure_pool()
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue_size:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Inference queue is full ({self.max_queue_size} waiting tasks)"
+                )
+            self._in_flight += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth())
+
+        submitted_at = time.time()
+        if self.mode == "process":
+            inner = pool.submit(_call_in_worker, method, *args)
+        else:
+            inner = pool.submit(_timed_call, getattr(self._service, method), *args)
+
+        outer: Future = Future()
+        inner.add_done_callback(lambda done: self._complete(done, outer, submitted_at))
+        return outer
+
+    def run(self, method: str, *args: Any) -> Any:
+        """Run a service method in the pool and block until it finishes."""
+        return self.submit(method, *args).result()
+
+    async def call(self, method: str, *args: Any) -> Any:
+        """Run a service method in the pool and await its result."""
+        return await asyncio.wrap_future(self.submit(method, *args))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool, letting running tasks finish when ``wait`` is true."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pool_pid == os.getpid():
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and wait time statistics."""
+        with self._lock:
+            buckets = {str(bound): count for bound, count in zip(WAIT_TIME_BUCKETS_MS, self._wait_buckets)}
+            buckets["+Inf"] = self._wait_buckets[-1]
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "in_flight": self._in_flight,
+                "queue_depth": self._queue_depth(),
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "mean_wait_ms": self._wait_total_ms / self._completed if self._completed else 0.0,
+                "max_wait_ms": self._wait_max_ms,
+                "wait_ms_histogram": buckets,
+            }
+
+    def _queue_depth(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+
+    def _ensure_pool(self) -> Executor:
+        # Pools do not survive fork, so one is created lazily per process
+        if self._pool is not None and self._pool_pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                if self.mode == "process":
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="inference")
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _complete(self, inner: Future, outer: Future, submitted_at: float) -> None:
+        if inner.cancelled():
+            with self._lock:
+                self._in_flight -= 1
+            outer.cancel()
+            return
+
+        error = inner.exception()
+        with self._lock:
+            self._in_flight -= 1
+            if error is None:
+                started_at, _ = inner.result()
+                wait_ms = max(0.0, (started_at - submitted_at) * 1000)
+                self._completed += 1
+                self._wait_total_ms += wait_ms
+                self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+                self._wait_buckets[bisect_left(WAIT_TIME_BUCKETS_MS, wait_ms)] += 1
+
+        if error is not None:
+            outer.set_exception(error)
+        else:
+            outer.set_result(inner.result()[1])
@@ -0,0 +1,203 @@
+"""
+In-process metrics, exposed in the Prometheus text format on ``/metrics``.
+
+Counters and fixed-bucket histograms cost a lock and a bisect per
+observation, so stages of a request can be timed individually: payload
+validation, feature extraction, preprocessing, forest inference and resume
+hashing. When ``metrics.enabled`` is off every observation returns at once.
+
+Values live in the process that records them: with the preforking server
+each worker reports its own series, and stages run by a process-pool
+inference executor are not seen by the API process.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app.config import config
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS_SECONDS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic count per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Histogram:
+    """Observations counted into fixed buckets, per combination of label values."""
+
+    kind = "histogram"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS_SECONDS):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label values: [bucket counts (the last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if not self._registry.enabled:
+            return
+        # Buckets are inclusive upper bounds ("le"), hence bisect_left
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series is not None else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = sorted((labelvalues, list(series[0]), series[1]) for labelvalues, series in self._series.items())
+        labelnames = self.labelnames + ("le",)
+        for labelvalues, counts, total in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(labelnames, labelvalues + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """The metrics of a process, rendered together for a scrape."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS_SECONDS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        if any(existing.name == metric.name for existing in self._metrics):
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics.append(metric)
+        return metric
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests and timing them per route.
+
+    Requests are labelled with the route template (``/admin/model/pin``),
+    not the raw path, so unknown URLs cannot grow the number of series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started_at, scope["method"], path)
+            HTTP_REQUESTS.inc(scope["method"], path, str(status[0]))
+
+
+metrics = MetricsRegistry(enabled=config.metrics.enabled)
+
+HTTP_REQUESTS = metrics.counter(
+    "talent_flow_http_requests_total", "HTTP requests by method, route and status code", ("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "talent_flow_http_request_duration_seconds", "HTTP request latency by method and route", ("method", "route")
+)
+STAGE_SECONDS = metrics.histogram(
+    "talent_flow_stage_duration_seconds",
+    "Time spent in each classification stage; in batches, feature extraction, preprocessing and "
+    "inference are timed once for all rows",
+    ("stage",)
+)
+RESUME_ERRORS = metrics.counter(
+    "talent_flow_resume_errors_total", "Resumes that could not be classified, by failing stage", ("stage",)
+)
+CACHE_LOOKUPS = metrics.counter(
+    "talent_flow_prediction_cache_lookups_total", "Prediction cache lookups by result (hit or miss)", ("result",)
+)
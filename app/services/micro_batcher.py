@@ -0,0 +1,152 @@
+"""
+Dynamic micro-batching of concurrent single-resume classifications.
+
+Requests that arrive within a short window are gathered and scored together
+through ``ResumeClassifierService.predict_batch``, so concurrent callers share
+one forest evaluation instead of paying the per-call overhead each.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.models import ResumePayload
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class PredictionError(Exception):
+    """Raised to a caller whose resume failed inside a micro-batch."""
+
+
+class MicroBatcher:
+    """
+    Gathers single predictions into batches scored by a background thread.
+
+    A batch is closed when ``max_batch_size`` items are queued or when
+    ``window_ms`` milliseconds have passed since its first item arrived,
+    whichever comes first. Each caller receives only its own result.
+    """
+
+    def __init__(self, predict_batch: Callable[[List[ResumePayload]], List[Dict[str, Any]]],
+                 window_ms: float, max_batch_size: int):
+        self._predict_batch = predict_batch
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.Queue[Optional[Tuple[ResumePayload, Future]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._bucket_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._batches = 0
+        self._items = 0
+        self._max_size = 0
+
+    def submit(self, resume: ResumePayload) -> Future:
+        """Queue a resume and return a future resolved with its classification."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((resume, future))
+        return future
+
+    async def predict(self, resume: ResumePayload) -> Dict[str, Any]:
+        """Classify a resume as part of the next micro-batch."""
+        return await asyncio.wrap_future(self.submit(resume))
+
+    def shutdown(self) -> None:
+        """Stop the worker after the queued items have been scored."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the batch sizes achieved so far."""
+        with self._stats_lock:
+            buckets = {str(bound): count for bound, count in zip(BATCH_SIZE_BUCKETS, self._bucket_counts)}
+            buckets["+Inf"] = self._bucket_counts[-1]
+            return {
+                "enabled": True,
+                "window_ms": self.window_seconds * 1000,
+                "max_batch_size": self.max_batch_size,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+                "max_batch_size_seen": self._max_size,
+                "batch_size_histogram": buckets,
+            }
+
+    def _worker_running(self) -> bool:
+        # Threads do not survive fork, so a worker is started per process
+        return self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive()
+
+    def _ensure_worker(self) -> None:
+        if self._worker_running():
+            return
+        with self._start_lock:
+            if not self._worker_running():
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = self._fill_batch(batch)
+            self._process(batch)
+            if stopping:
+                return
+
+    def _fill_batch(self, batch: List[Tuple[ResumePayload, Future]]) -> bool:
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _process(self, batch: List[Tuple[ResumePayload, Future]]) -> None:
+        # Claimed futures can no longer be cancelled; callers that already gave up are not scored
+        batch = [(resume, future) for resume, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self._record(len(batch))
+        resumes = [resume for resume, _ in batch]
+        try:
+            outcomes = self._predict_batch(resumes)
+        except Exception as e:
+            logger.exception("Micro-batch prediction failed")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), outcome in zip(batch, outcomes):
+            if outcome["error"] is not None:
+                future.set_exception(PredictionError(outcome["error"]))
+            else:
+                future.set_result(outcome["result"])
+
+    def _record(self, size: int) -> None:
+        with self._stats_lock:
+            self._bucket_counts[bisect_left(BATCH_SIZE_BUCKETS, size)] += 1
+            self._batches += 1
+            self._items += size
+            self._max_size = max(self._max_size, size)
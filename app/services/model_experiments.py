@@ -0,0 +1,299 @@
+"""
+Shadow and A/B evaluation of candidate models on live traffic.
+
+Candidates score the feature matrix the primary model already scored, so
+features are extracted and preprocessed once per request whatever the
+number of models. Shadow models run in a background thread fed by a
+bounded queue; when it is full the work is dropped, never queued on the
+request path. An A/B split routes a stable, configurable share of resumes
+to a candidate instead of the primary model.
+
+Candidates are loaded once per process (``ModelExperiments``) and shared by
+every service the model registry swaps in, so hot reloads keep a single
+shadow thread and the experiment counters.
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.ml.compiled_forest import CompiledForest
+
+# Upper bounds, in milliseconds, of the scoring latency histogram buckets
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class CandidateModel:
+    """A model scored on the primary model's features, with its own version name."""
+
+    def __init__(self, name: str, engine: Any, level_mapping: Dict[str, int],
+                 layout_signature: Optional[str] = None):
+        self.name = name
+        self.engine = engine
+        self.layout_signature = layout_signature
+        self._levels = {encoded: level for level, encoded in level_mapping.items()}
+
+    def labels(self, probabilities: np.ndarray) -> List[str]:
+        """Decoded level of each row of class probabilities."""
+        classes = self.engine.classes_[np.argmax(probabilities, axis=1)]
+        return [self._levels.get(encoded, "Desconhecido") for encoded in classes.tolist()]
+
+
+def load_candidate(path: str, n_features: int, layout_signature: Optional[str] = None) -> CandidateModel:
+    """
+    Load a candidate from a model version directory (array export or pickles).
+
+    The candidate must read the primary model's feature rows: same column
+    count and, when ``layout_signature`` is given, the same vocabularies and
+    preprocessors (see ``FeatureLayout.signature``).
+    """
+    from app.ml.feature_layout import FeatureLayout
+    from app.services.model_registry import load_version_artifacts
+    model, artifacts = load_version_artifacts(path)
+    engine = model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+    if engine.n_features_in_ != n_features:
+        raise ValueError(
+            f"Candidate {path} expects {engine.n_features_in_} features, but the primary model builds {n_features}"
+        )
+    layout = artifacts.get('feature_layout') or FeatureLayout.from_artifacts(artifacts)
+    if layout_signature is not None and layout.signature() != layout_signature:
+        raise ValueError(
+            f"Candidate {path} was fitted on other features (vocabularies or preprocessors) than the primary model"
+        )
+    return CandidateModel(artifacts['model_version'], engine, artifacts['level_mapping'], layout.signature())
+
+
+class LatencyStats:
+    """Count, mean, max and histogram of scoring latencies, in milliseconds."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, latency_ms: float) -> None:
+        self.calls += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        histogram = {str(bound): count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)}
+        histogram["+Inf"] = self.buckets[-1]
+        return {
+            "calls": self.calls,
+            "mean_latency_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "max_latency_ms": self.max_ms,
+            "latency_ms_histogram": histogram,
+        }
+
+
+class ShadowEvaluator:
+    """
+    Scores candidate models on the primary model's feature rows in a
+    background thread and compares their predictions.
+
+    Records, per shadow model, the rows scored, the agreement rate with the
+    primary model and the scoring latency, next to the primary latency.
+    """
+
+    def __init__(self, candidates: List[CandidateModel], max_queue_size: int = 256):
+        self.candidates = list(candidates)
+        self.max_queue_size = max_queue_size
+        self._queue: "queue.Queue[Optional[Tuple[Any, List[str], float]]]" = queue.Queue(maxsize=max_queue_size)
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self._primary_latency = LatencyStats()
+        self._latency = {candidate.name: LatencyStats() for candidate in self.candidates}
+        self._rows = {candidate.name: 0 for candidate in self.candidates}
+        self._agreements = {candidate.name: 0 for candidate in self.candidates}
+
+    def submit(self, features: Any, primary_labels: List[str], primary_latency_ms: float) -> bool:
+        """Queue rows already scored by the primary model; return False if they were dropped."""
+        self._ensure_worker()
+        with self._stats_lock:
+            self._primary_latency.record(primary_latency_ms)
+        try:
+            self._queue.put_nowait((features, primary_labels, primary_latency_ms))
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+        with self._stats_lock:
+            self.submitted += 1
+        return True
+
+    def drain(self, timeout: float = 5.0) -> None:
+        """Wait until the queued work has been scored (for tests and shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def shutdown(self) -> None:
+        if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+        self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            models = {}
+            for candidate in self.candidates:
+                rows = self._rows[candidate.name]
+                models[candidate.name] = {
+                    "rows": rows,
+                    "agreements": self._agreements[candidate.name],
+                    "agreement_rate": self._agreements[candidate.name] / rows if rows else None,
+                    **self._latency[candidate.name].as_dict(),
+                }
+            return {
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queue.qsize(),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "primary": self._primary_latency.as_dict(),
+                "models": models,
+            }
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork, so a worker is started per process
+        if self._worker is not None and self._worker_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._worker is None or self._worker_pid != os.getpid():
+                self._worker = threading.Thread(target=self._run, name="shadow-models", daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._score(*item)
+            except Exception:
+                with self._stats_lock:
+                    self.failed += 1
+                logger.exception("Shadow model scoring failed")
+            finally:
+                self._queue.task_done()
+
+    def _score(self, features: Any, primary_labels: List[str], primary_latency_ms: float) -> None:
+        for candidate in self.candidates:
+            started_at = time.perf_counter()
+            labels = candidate.labels(candidate.engine.predict_proba(features))
+            latency_ms = (time.perf_counter() - started_at) * 1000
+            agreements = sum(1 for label, primary in zip(labels, primary_labels) if label == primary)
+            with self._stats_lock:
+                self._latency[candidate.name].record(latency_ms)
+                self._rows[candidate.name] += len(labels)
+                self._agreements[candidate.name] += agreements
+
+
+class ABSplit:
+    """
+    Routes a share ``weight`` of resumes to a candidate model.
+
+    Routing hashes the user id, so a user consistently gets the same arm and
+    repeated submissions are comparable.
+    """
+
+    def __init__(self, candidate: CandidateModel, weight: float):
+        if not 0.0 <= weight <= 1.0:
+            raise ValueError(f"A/B weight must be between 0 and 1, got {weight}")
+        self.candidate = candidate
+        self.weight = weight
+        self._lock = threading.Lock()
+        self.routed = {"primary": 0, "candidate": 0}
+
+    def routes_to_candidate(self, user_id: str) -> bool:
+        bucket = int.from_bytes(hashlib.sha256(user_id.encode("utf-8")).digest()[:8], "big") / 2 ** 64
+        chosen = bucket < self.weight
+        with self._lock:
+            self.routed["candidate" if chosen else "primary"] += 1
+        return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"candidate": self.candidate.name, "weight": self.weight, "routed": dict(self.routed)}
+
+
+class ModelExperiments:
+    """
+    Shadow models and A/B split of the ``experiments`` configuration,
+    loaded with the first service and attached to every later one.
+
+    A candidate that fails to load (missing directory, other feature
+    layout) is logged and left out. A service whose feature layout differs
+    from the candidates' (e.g. a version swapped in with a new vocabulary)
+    is served without them, as they would score misaligned columns.
+    """
+
+    def __init__(self, experiments_config: Any):
+        self.config = experiments_config
+        self.shadow_evaluator: Optional[ShadowEvaluator] = None
+        self.ab_split: Optional[ABSplit] = None
+        self.layout_signature: Optional[str] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.shadow_models or self.config.ab_candidate)
+
+    def attach(self, service: Any) -> None:
+        """Give ``service`` the shared experiments, loading them against it the first time."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load(service.engine.n_features_in_, service.layout_signature)
+        if service.layout_signature != self.layout_signature:
+            logger.warning(f"Model version {service.model_version} reads other features than the shadow and "
+                           f"A/B candidates; it is served without them")
+            return
+        service.shadow_evaluator = self.shadow_evaluator
+        service.ab_split = self.ab_split
+
+    def shutdown(self) -> None:
+        if self.shadow_evaluator is not None:
+            self.shadow_evaluator.shutdown()
+
+    def _load(self, n_features: int, layout_signature: str) -> None:
+        # Experiments are optional: a candidate that fails to load is left out, never the primary model
+        shadow_models = [candidate for candidate in (self._load_candidate(path, n_features, layout_signature)
+                                                     for path in self.config.shadow_models)
+                         if candidate is not None]
+        if shadow_models:
+            self.shadow_evaluator = ShadowEvaluator(shadow_models, self.config.shadow_queue_size)
+        if self.config.ab_candidate:
+            candidate = self._load_candidate(self.config.ab_candidate, n_features, layout_signature)
+            if candidate is not None:
+                try:
+                    self.ab_split = ABSplit(candidate, self.config.ab_weight)
+                except ValueError:
+                    logger.exception("A/B split is misconfigured; serving without it")
+        self.layout_signature = layout_signature
+        self._loaded = True
+
+    @staticmethod
+    def _load_candidate(path: str, n_features: int, layout_signature: str) -> Optional[CandidateModel]:
+        try:
+            return load_candidate(path, n_features, layout_signature)
+        except Exception:
+            logger.exception(f"Candidate model {path} could not be loaded; serving without it")
+            return None
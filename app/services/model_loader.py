@@ -0,0 +1,172 @@
+"""
+Background loading of the classifier, so the server accepts connections
+(and answers health probes) while the model artifacts are unpickled.
+
+Loading goes through ``loading`` → ``warming_up`` → ``ready``. A warm-up
+inference runs before the model is reported ready, so one-time costs (lazy
+imports, first allocations, code paths touched for the first time) are not
+paid by the first real request. A failed load ends in ``failed``.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from loguru import logger
+
+from app.models import ResumePayload
+
+# Resume used for the warm-up inference; it touches every feature block
+WARM_UP_RESUME = {
+    "userId": "warm-up",
+    "summary": "Desenvolvedor backend com experiência em APIs, dados e liderança técnica.",
+    "academicFormations": [
+        {"level": "Graduação", "courseName": "Ciência da Computação", "institution": "Warm-up"}
+    ],
+    "professionalExperiences": [
+        {
+            "startDate": "2018-01-01",
+            "endDate": "2023-01-01",
+            "activitiesPerformed": [
+                {
+                    "activity": "Desenvolvi serviços de classificação",
+                    "problemSolved": "Reduzi o tempo de resposta",
+                    "technologies": ["Python", "Docker"],
+                    "appliedSoftSkills": ["Comunicação", "Liderança"],
+                }
+            ],
+        }
+    ],
+}
+
+
+class ModelNotReadyError(Exception):
+    """Raised when the classifier is requested before it finished loading."""
+
+
+@contextmanager
+def internal_scoring(service: Any) -> Iterator[Any]:
+    """
+    Score on a service that is not serving yet without its prediction cache
+    and experiments, so warm-up and smoke predictions are neither cached nor
+    counted in the shadow and A/B statistics of real traffic.
+    """
+    detached = ("prediction_cache", "shadow_evaluator", "ab_split")
+    saved = {name: getattr(service, name) for name in detached}
+    for name in detached:
+        setattr(service, name, None)
+    try:
+        yield service
+    finally:
+        for name, value in saved.items():
+            setattr(service, name, value)
+
+
+def warm_up_service(service: Any) -> None:
+    """Run one single and one batch inference, bypassing the prediction cache and experiments."""
+    with internal_scoring(service):
+        resume = ResumePayload(**WARM_UP_RESUME)
+        service.predict(resume)
+        service.predict_batch([resume, resume])
+
+
+class ModelLoader:
+    """
+    Loads the classifier service once, in a background thread or in the
+    calling thread, and exposes its readiness.
+
+    Args:
+        factory: Builds the service (loads the artifacts)
+        warm_up: Runs a first inference on the new service
+        on_ready: Called with the service once it is warmed up
+    """
+
+    def __init__(self, factory: Callable[[], Any], warm_up: Callable[[Any], None] = warm_up_service,
+                 on_ready: Optional[Callable[[Any], None]] = None):
+        self.factory = factory
+        self.warm_up = warm_up
+        self.on_ready = on_ready
+        self.service: Any = None
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warm_up_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self) -> None:
+        """Load the model in a background thread, unless it is loaded or loading already."""
+        with self._lock:
+            if self.state != "pending":
+                return
+            self.state = "loading"
+        self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def load(self) -> Any:
+        """Load the model in the calling thread and return the service."""
+        with self._lock:
+            started = self.state == "pending"
+            if started:
+                self.state = "loading"
+        if started:
+            self._load()
+        else:
+            self._done.wait()
+        return self.require()
+
+    def replace(self, service: Any) -> None:
+        """Serve ``service`` from now on, e.g. a new version swapped in by the model registry."""
+        if self.on_ready is not None:
+            self.on_ready(service)
+        self.service = service
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until loading finished (or failed); return whether the model is ready."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def require(self) -> Any:
+        """Return the service, or raise ModelNotReadyError while it is not available."""
+        if self.state == "ready":
+            return self.service
+        if self.state == "failed":
+            raise ModelNotReadyError(f"Model failed to load: {self.error}")
+        raise ModelNotReadyError("Model is still loading, retry shortly")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "warm_up_seconds": self.warm_up_seconds,
+        }
+
+    def _load(self) -> None:
+        try:
+            started_at = time.perf_counter()
+            service = self.factory()
+            self.load_seconds = time.perf_counter() - started_at
+
+            self.state = "warming_up"
+            started_at = time.perf_counter()
+            self.warm_up(service)
+            self.warm_up_seconds = time.perf_counter() - started_at
+
+            if self.on_ready is not None:
+                self.on_ready(service)
+            self.service = service
+            self.state = "ready"
+            logger.info(f"Model ready (loaded in {self.load_seconds:.2f}s, "
+                        f"warmed up in {self.warm_up_seconds:.3f}s)")
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            logger.exception("Model loading failed")
+        finally:
+            self._done.set()
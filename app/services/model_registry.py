@@ -0,0 +1,264 @@
+"""
+Registry of model versions with hot reload, pinning and rollback.
+
+A registry root holds one directory per model version, either an array
+export (``manifest.json``, see ``app.ml.array_artifacts``) or the two
+pickles. The version to serve is the pinned one if set, otherwise the one
+named in ``LATEST``, otherwise the most recently modified directory.
+
+A watcher thread polls the root. When the target version changes, it is
+loaded in the background, validated with a smoke prediction and swapped in
+atomically. Requests hold a reference to the service they started with, so
+in-flight requests finish on the old version. The previous versions stay
+loaded, so a rollback is immediate.
+"""
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.ml.array_artifacts import LATEST_FILE, MANIFEST_FILE, load_array_artifacts
+from app.models import ResumePayload
+from app.services.model_loader import WARM_UP_RESUME, internal_scoring, warm_up_service
+from app.utils import load_model_artifacts
+
+MODEL_FILE = "talent_flow_classifier.pkl"
+PREPROCESSORS_FILE = "talent_flow_preprocessors.pkl"
+
+
+class RegistryError(Exception):
+    """Raised when a registry operation cannot be carried out (e.g. nothing to roll back to)."""
+
+
+def resolve_version_path(path: str) -> str:
+    """``path`` if it holds a version (array export or pickles), else the version its ``LATEST`` names."""
+    if os.path.exists(os.path.join(path, MANIFEST_FILE)) or os.path.exists(os.path.join(path, MODEL_FILE)):
+        return path
+    latest_path = os.path.join(path, LATEST_FILE)
+    if not os.path.exists(latest_path):
+        raise FileNotFoundError(f"Required model file not found: no {MANIFEST_FILE}, {MODEL_FILE} or "
+                                f"{LATEST_FILE} in {path}")
+    with open(latest_path) as latest_file:
+        return os.path.join(path, latest_file.read().strip())
+
+
+def load_version_artifacts(version_dir: str) -> Tuple[Any, Dict[str, Any]]:
+    """Load the model and preprocessors of one version directory, in either format."""
+    if os.path.exists(os.path.join(version_dir, MANIFEST_FILE)):
+        return load_array_artifacts(version_dir)
+    model, artifacts = load_model_artifacts(
+        os.path.join(version_dir, MODEL_FILE),
+        os.path.join(version_dir, PREPROCESSORS_FILE)
+    )
+    return model, dict(artifacts, model_version=os.path.basename(os.path.normpath(version_dir)))
+
+
+def smoke_test_service(service: Any) -> None:
+    """Warm a new service up and check that it returns a well-formed classification."""
+    warm_up_service(service)
+    with internal_scoring(service):
+        result = service.predict(ResumePayload(**WARM_UP_RESUME))
+    if result["predictedExperienceLevel"] not in service.artifacts['level_mapping']:
+        raise ValueError(f"Smoke prediction returned an unknown level: {result['predictedExperienceLevel']}")
+    total = sum(entry["probability"] for entry in result["probabilities"])
+    if not math.isclose(total, 1.0, abs_tol=1e-6):
+        raise ValueError(f"Smoke prediction probabilities sum to {total}")
+
+
+class LoadedVersion:
+    """A model version that was loaded and validated."""
+
+    def __init__(self, version: str, service: Any, path: str):
+        self.version = version
+        self.service = service
+        self.path = path
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    """
+    Serves one version out of a directory of model versions.
+
+    Args:
+        root: Directory holding the version directories
+        service_factory: Builds a service from ``(model, artifacts)``
+        poll_interval: Seconds between scans of ``root``
+        pinned_version: Version to serve regardless of ``LATEST``
+        history_size: Previous versions kept loaded for rollback
+        on_swap: Called with the new service after every swap
+        validate: Raises if a freshly loaded service must not be served
+    """
+
+    def __init__(self, root: str, service_factory: Callable[[Any, Dict[str, Any]], Any],
+                 poll_interval: float = 5.0, pinned_version: Optional[str] = None, history_size: int = 1,
+                 on_swap: Optional[Callable[[Any], None]] = None,
+                 validate: Callable[[Any], None] = smoke_test_service):
+        self.root = root
+        self.service_factory = service_factory
+        self.poll_interval = poll_interval
+        self.pinned_version = pinned_version
+        self.history_size = history_size
+        self.on_swap = on_swap
+        self.validate = validate
+        self.active: Optional[LoadedVersion] = None
+        self.history: List[LoadedVersion] = []
+        self.failed: Dict[str, str] = {}
+        self.swaps = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+
+    @property
+    def active_version(self) -> Optional[str]:
+        active = self.active
+        return active.version if active is not None else None
+
+    def available_versions(self) -> List[str]:
+        """Complete version directories under the root, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        versions = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            # Dot-prefixed directories are exports still being written
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            if os.path.exists(os.path.join(path, MANIFEST_FILE)) or (
+                    os.path.exists(os.path.join(path, MODEL_FILE))
+                    and os.path.exists(os.path.join(path, PREPROCESSORS_FILE))):
+                versions.append((os.path.getmtime(path), name))
+        return [name for _, name in sorted(versions)]
+
+    def target_version(self) -> Optional[str]:
+        """The version that should be served: pinned, else ``LATEST``, else the newest."""
+        if self.pinned_version:
+            return self.pinned_version
+        latest_path = os.path.join(self.root, LATEST_FILE)
+        if os.path.exists(latest_path):
+            with open(latest_path) as latest_file:
+                latest = latest_file.read().strip()
+            if latest:
+                return latest
+        versions = self.available_versions()
+        return versions[-1] if versions else None
+
+    def load_active(self) -> Any:
+        """Load the target version in the calling thread and return its service."""
+        self.refresh(raise_errors=True)
+        if self.active is None:
+            raise RegistryError(f"No model version found in {self.root}")
+        return self.active.service
+
+    def refresh(self, raise_errors: bool = False) -> bool:
+        """
+        Swap in the target version if it is not the active one.
+
+        Returns whether a swap happened. A version that fails to load or to
+        validate is remembered and not retried until the target changes.
+        """
+        with self._refresh_lock:
+            target = self.target_version()
+            if target is None or target == self.active_version:
+                return False
+            retained = next((entry for entry in self.history if entry.version == target), None)
+            if retained is not None:
+                self._swap(retained)
+                return True
+            if target in self.failed and not raise_errors:
+                return False
+
+            path = os.path.join(self.root, target)
+            try:
+                started_at = time.perf_counter()
+                service = self.service_factory(*load_version_artifacts(path))
+                self.validate(service)
+            except Exception as e:
+                self.failed[target] = str(e)
+                logger.exception(f"Model version {target} failed to load; keeping {self.active_version}")
+                if raise_errors:
+                    raise
+                return False
+            self.failed.pop(target, None)
+            logger.info(f"Model version {target} loaded and validated in {time.perf_counter() - started_at:.2f}s")
+            self._swap(LoadedVersion(target, service, path))
+            return True
+
+    def rollback(self) -> str:
+        """Serve the previous version again and pin it, so the watcher does not undo the rollback."""
+        with self._refresh_lock:
+            if not self.history:
+                raise RegistryError("No previous model version to roll back to")
+            previous = self.history[0]
+            self.pinned_version = previous.version
+            self._swap(previous)
+            return previous.version
+
+    def pin(self, version: Optional[str]) -> None:
+        """Pin a version (or unpin with None) and wake the watcher to apply it."""
+        if version is not None and version not in self.available_versions() \
+                and version not in [entry.version for entry in self.history]:
+            raise RegistryError(f"Unknown model version: {version}")
+        self.pinned_version = version
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start watching the root in a background thread (once per process)."""
+        if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._thread_pid = os.getpid()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def status(self) -> Dict[str, Any]:
+        active = self.active
+        return {
+            "root": self.root,
+            "active_version": self.active_version,
+            "active_since": active.loaded_at if active is not None else None,
+            "previous_versions": [entry.version for entry in self.history],
+            "pinned_version": self.pinned_version,
+            "target_version": self.target_version(),
+            "available_versions": self.available_versions(),
+            "failed_versions": dict(self.failed),
+            "swaps": self.swaps,
+        }
+
+    def _swap(self, new: LoadedVersion) -> None:
+        with self._lock:
+            old = self.active
+            # A single reference assignment: requests that already hold the old service keep using it
+            self.active = new
+            self.history = [entry for entry in self.history if entry.version != new.version]
+            if old is not None and old.version != new.version:
+                self.history.insert(0, old)
+            del self.history[self.history_size:]
+            self.swaps += 1
+        if self.on_swap is not None:
+            self.on_swap(new.service)
+        logger.info(f"Serving model version {new.version}"
+                    + (f" (previous: {old.version})" if old is not None else ""))
+
+    def _watch(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            # The initial version is loaded by the model loader; only swaps happen here
+            if self.active is None:
+                continue
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Model registry refresh failed")
@@ -0,0 +1,211 @@
+"""
+Content-addressed cache of model outputs.
+
+Entries are keyed on a fingerprint of the resume fields that feed the
+features, so re-submitting an unchanged resume (or one where only contact
+details changed) skips feature extraction and inference. Keys are scoped by
+model version, so a new model never serves answers of the previous one.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+def resume_fingerprint(resume_data: Dict[str, Any], today: Optional[date] = None) -> str:
+    """
+    Fingerprint the parts of a resume that affect the extracted features.
+
+    Contact details, names and other fields ignored by
+    ``extract_features_for_prediction`` are left out. Because experience
+    lengths are measured up to the current date, the date is part of the
+    fingerprint whenever the resume has dated experiences.
+    """
+    experiences = resume_data.get("professionalExperiences") or []
+    formations = resume_data.get("academicFormations") or []
+    relevant = {
+        "summary": resume_data.get("summary"),
+        "education": formations[0].get("level") if formations else None,
+        "experiences": [
+            {
+                "startDate": experience.get("startDate"),
+                "endDate": experience.get("endDate"),
+                "activities": [
+                    [
+                        activity.get("activity"),
+                        activity.get("problemSolved"),
+                        activity.get("technologies"),
+                        activity.get("appliedSoftSkills"),
+                    ]
+                    for activity in experience.get("activitiesPerformed") or []
+                ],
+            }
+            for experience in experiences
+        ],
+    }
+    if any(experience.get("startDate") for experience in experiences):
+        relevant["today"] = (today or date.today()).isoformat()
+
+    canonical = json.dumps(relevant, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class InMemoryCacheBackend:
+    """Bounded in-process LRU with a per-entry time to live."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class KeyValueCacheBackend:
+    """
+    Cache shared between processes through a Redis-like client.
+
+    Any client with ``get(key)`` and ``set(key, value, ex=seconds)`` works;
+    eviction and expiry are left to the server. The cache only saves work,
+    so client failures (server down, timeouts) are logged and counted, and a
+    failed lookup is a miss: they never fail a classification.
+    """
+
+    def __init__(self, client: Any, ttl_seconds: float, prefix: str = "talent-flow:prediction:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self.client.get(self.prefix + key)
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            self._record_error("get", e)
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl_seconds)))
+        except Exception as e:
+            self._record_error("set", e)
+
+    def _record_error(self, operation: str, error: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"Prediction cache {operation} failed, continuing without the cache: {error!r}")
+
+    def clear(self) -> None:
+        # Entries of other model versions are unreachable and expire on their own
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+def create_redis_client(url: str) -> Any:
+    """Create a Redis client, failing clearly when the optional package is missing."""
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("The redis cache backend requires the 'redis' package to be installed") from e
+    return redis.Redis.from_url(url)
+
+
+class PredictionCache:
+    """Model outputs keyed on model version and resume fingerprint, with hit/miss counters."""
+
+    def __init__(self, backend: Any, model_version: str = ""):
+        self.backend = backend
+        self.model_version = model_version
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        value = self.backend.get(self._key(fingerprint))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, fingerprint: str, value: Dict[str, Any]) -> None:
+        self.backend.set(self._key(fingerprint), value)
+
+    def set_model_version(self, model_version: str) -> None:
+        """Invalidate entries computed by a different model version."""
+        if model_version != self.model_version:
+            self.model_version = model_version
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "backend": type(self.backend).__name__,
+            "model_version": self.model_version,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "expirations": self.backend.expirations,
+            "errors": self.backend.errors,
+        }
+
+    def _key(self, fingerprint: str) -> str:
+        return f"{self.model_version}:{fingerprint}"
+
+
+def build_prediction_cache(cache_config: Any, model_version: str) -> Optional[PredictionCache]:
+    """Create the cache described by the ``cache`` configuration section, if enabled."""
+    if not cache_config.enabled:
+        return None
+    if cache_config.backend == "memory":
+        backend = InMemoryCacheBackend(cache_config.max_entries, cache_config.ttl_seconds)
+    elif cache_config.backend == "redis":
+        backend = KeyValueCacheBackend(create_redis_client(cache_config.redis_url), cache_config.ttl_seconds)
+    else:
+        raise ValueError(f"Unknown prediction cache backend: {cache_config.backend}")
+    return PredictionCache(backend, model_version)
@@ -1,37 +1,357 @@
 import numpy as np
 import hashlib
 import json
-import pandas as pd
-from typing import Dict
+import time
+from scipy import sparse
+from typing import Any, Dict, List, Optional, Tuple
 from app.models import ResumePayload
-from app.utils import load_model_artifacts, extract_features_for_prediction
+from app.utils import (
+    FeatureColumns,
+    compute_artifact_version,
+    extract_features_batch,
+    extract_features_for_prediction,
+    load_model_artifacts,
+)
 from app.config import config
+from app.ml.array_artifacts import load_array_artifacts
+from app.ml.compiled_forest import CompiledForest
+from app.ml.feature_layout import FeatureLayout
+from app.services.metrics import CACHE_LOOKUPS, RESUME_ERRORS
+from app.services.model_experiments import ABSplit, CandidateModel, ModelExperiments, ShadowEvaluator
+from app.services.prediction_cache import build_prediction_cache, resume_fingerprint
+from app.services.request_profiler import record_stage
 from datetime import datetime
 
 
 class ResumeClassifierService:
-    def __init__(self):
-        self.model, self.artifacts = load_model_artifacts(
+    def __init__(self, model: Any = None, artifacts: Dict[str, Any] = None,
+                 experiments: Optional[ModelExperiments] = None):
+        # Callers that already loaded the artifacts (e.g. pool workers) pass them in
+        if model is None or artifacts is None:
+            model, artifacts = self._load_artifacts(config.model.artifact_format)
+        self.model, self.artifacts = model, artifacts
+        self.engine = self._build_engine(config.model.engine)
+        self.feature_layout = self._build_feature_layout(config.model.feature_builder)
+        if self.feature_layout is not None and config.cache.text_fragment_max_entries > 0:
+            self.feature_layout.cache_text_fragments(config.cache.text_fragment_max_entries)
+        # Exported arrays carry their version; pickles are versioned by content
+        self.model_version = self.artifacts.get('model_version') or compute_artifact_version(
             config.model.model_path,
             config.model.preprocessors_path
         )
+        self.prediction_cache = build_prediction_cache(config.cache, self.model_version)
+        self.shadow_evaluator: Optional[ShadowEvaluator] = None
+        self.ab_split: Optional[ABSplit] = None
+        self._layout_signature: Optional[str] = None
+        # Shared by the services of every model version when the caller passes them in
+        (experiments or ModelExperiments(config.experiments)).attach(self)
 
-    def predict(self, resume: ResumePayload) -> Dict[str, str]:
-        features = extract_features_for_prediction(resume.model_dump())
-        processed_features = self._preprocess_features(features)
-        prediction_encoded = self.model.predict(processed_features)[0]
-        predicted_level = self._decode_prediction(prediction_encoded)
-        confidence_score = float(self.model.predict_proba(processed_features).max())
-        resume_hash = self._generate_resume_hash(resume)
+    @staticmethod
+    def _load_artifacts(artifact_format: str):
+        if artifact_format == "arrays":
+            return load_array_artifacts(config.model.arrays_path)
+        if artifact_format == "pickle":
+            return load_model_artifacts(config.model.model_path, config.model.preprocessors_path)
+        raise ValueError(f"Unknown model artifact format: {artifact_format}")
 
+    def _build_engine(self, engine: str):
+        """Return the object whose ``predict_proba`` scores feature rows."""
+        if isinstance(self.model, CompiledForest):
+            # Exported arrays hold no scikit-learn estimator to fall back on
+            if engine != "compiled":
+                raise ValueError(f"Inference engine {engine} requires pickled model artifacts")
+            return self.model
+        if engine == "compiled":
+            return CompiledForest.from_sklearn(self.model)
+        if engine == "sklearn":
+            return self.model
+        raise ValueError(f"Unknown inference engine: {engine}")
+
+    def _build_feature_layout(self, feature_builder: str):
+        """Return the precompiled feature layout, or None to use the pandas pipeline."""
+        if 'feature_layout' in self.artifacts:
+            if feature_builder != "layout":
+                raise ValueError(f"Feature builder {feature_builder} requires pickled preprocessors")
+            return self.artifacts['feature_layout']
+        if feature_builder == "layout":
+            return FeatureLayout.from_artifacts(self.artifacts)
+        if feature_builder == "pandas":
+            return None
+        raise ValueError(f"Unknown feature builder: {feature_builder}")
+
+    @property
+    def layout_signature(self) -> str:
+        """Digest of the feature layout the model reads (see ``FeatureLayout.signature``)."""
+        if self._layout_signature is None:
+            layout = self.feature_layout or FeatureLayout.from_artifacts(self.artifacts)
+            self._layout_signature = layout.signature()
+        return self._layout_signature
+
+    def attach_shadow_models(self, candidates: List[CandidateModel], max_queue_size: int = 256) -> None:
+        """Score ``candidates`` in the background on the rows the primary model scores."""
+        self.shadow_evaluator = ShadowEvaluator(candidates, max_queue_size)
+
+    def set_ab_split(self, candidate: CandidateModel, weight: float) -> None:
+        """Answer a share ``weight`` of resumes with ``candidate`` instead of the primary model."""
+        self.ab_split = ABSplit(candidate, weight)
+
+    def experiment_stats(self) -> Dict[str, Any]:
         return {
-            "userId": resume.userId,
-            "predictedExperienceLevel": predicted_level,
-            "confidenceScore": confidence_score,
-            "hash": resume_hash
+            "shadow": self.shadow_evaluator.stats() if self.shadow_evaluator is not None else {"enabled": False},
+            "ab_split": self.ab_split.stats() if self.ab_split is not None else {"enabled": False},
         }
 
-    def _preprocess_features(self, features: dict) -> np.ndarray:
+    def predict(self, resume: ResumePayload, use_cache: bool = True) -> Dict[str, Any]:
+        # The single dump of the payload feeds the cache key, the features and the hash
+        resume_data = resume.model_dump()
+        candidate = self._route(resume.userId)
+        # Cached outputs belong to the primary model
+        use_cache = use_cache and self.prediction_cache is not None and candidate is None
+        fingerprint = resume_fingerprint(resume_data) if use_cache else None
+        output = self._cache_get(fingerprint) if fingerprint is not None else None
+
+        if output is None:
+            features = self._extract_features(resume_data)
+            started_at = time.perf_counter()
+            processed_features = self._preprocess_features(features)
+            record_stage("preprocess", time.perf_counter() - started_at)
+            output = self._score(processed_features, candidate)[0]
+            if fingerprint is not None:
+                self.prediction_cache.put(fingerprint, output)
+
+        return self._build_result(resume.userId, output, self._generate_resume_hash(resume_data),
+                                  candidate.name if candidate is not None else None)
+
+    def predict_extracted(self, resume_data: Dict[str, Any], features: Dict[str, Any],
+                          text_counts: Optional[Dict[int, int]] = None,
+                          counts_version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Classify a dumped resume whose features the caller already assembled.
+
+        Used by incremental re-classification (see ``ResumeStore``): the result
+        equals ``predict`` on the same resume without the prediction cache.
+        ``text_counts`` are the term counts of the resume text in the
+        vocabulary of model ``counts_version``; counts of another version are
+        ignored and the text is vectorized again.
+        """
+        candidate = self._route(resume_data["userId"])
+        if counts_version != self.model_version:
+            text_counts = None
+        started_at = time.perf_counter()
+        processed_features = self._preprocess_features(features, text_counts)
+        record_stage("preprocess", time.perf_counter() - started_at)
+        output = self._score(processed_features, candidate)[0]
+        return self._build_result(resume_data["userId"], output, self._generate_resume_hash(resume_data),
+                                  candidate.name if candidate is not None else None)
+
+    def predict_batch(self, resumes: List[ResumePayload]) -> List[Dict[str, Any]]:
+        """
+        Classify several resumes with a single call to the model.
+
+        Features of every resume are extracted together as columns and stacked
+        into one N×F matrix so the forest is evaluated once per batch. Failures are reported per item: each entry
+        of the returned list has a ``result`` (the classification) or an
+        ``error`` (the failure message), in the same order as ``resumes``.
+        """
+        outcomes: List[Dict[str, Any]] = [{"result": None, "error": None} for _ in resumes]
+        model_outputs: Dict[int, Dict[str, Any]] = {}
+        fingerprints: Dict[int, str] = {}
+        dumps: Dict[int, Dict[str, Any]] = {}
+
+        candidates: Dict[int, CandidateModel] = {}
+
+        to_extract, positions = [], []
+        for position, resume in enumerate(resumes):
+            try:
+                resume_data = dumps[position] = resume.model_dump()
+                candidate = self._route(resume.userId)
+                if candidate is not None:
+                    candidates[position] = candidate
+                elif self.prediction_cache is not None:
+                    fingerprints[position] = resume_fingerprint(resume_data)
+                    cached = self._cache_get(fingerprints[position])
+                    if cached is not None:
+                        model_outputs[position] = cached
+                        continue
+                to_extract.append(resume_data)
+                positions.append(position)
+            except Exception as e:
+                outcomes[position]["error"] = str(e)
+
+        features_list, positions = self._extract_batch_isolating_errors(to_extract, positions, outcomes)
+        started_at = time.perf_counter()
+        features_list, positions, processed_features = self._preprocess_batch_isolating_errors(
+            features_list, positions, outcomes
+        )
+        if len(features_list):
+            record_stage("preprocess", time.perf_counter() - started_at)
+        if positions:
+            for arm_positions, arm_features, candidate in self._split_arms(positions, processed_features, candidates):
+                for position, output in zip(arm_positions, self._score(arm_features, candidate)):
+                    model_outputs[position] = output
+                    if position in fingerprints:
+                        self.prediction_cache.put(fingerprints[position], output)
+
+        for position, output in model_outputs.items():
+            resume = resumes[position]
+            candidate = candidates.get(position)
+            outcomes[position]["result"] = self._build_result(
+                resume.userId, output, self._generate_resume_hash(dumps[position]),
+                candidate.name if candidate is not None else None
+            )
+
+        failed = sum(1 for outcome in outcomes if outcome["error"] is not None)
+        if failed:
+            RESUME_ERRORS.inc("prediction", amount=failed)
+        return outcomes
+
+    def _cache_get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        output = self.prediction_cache.get(fingerprint)
+        CACHE_LOOKUPS.inc("miss" if output is None else "hit")
+        return output
+
+    def _extract_features(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        started_at = time.perf_counter()
+        features = extract_features_for_prediction(resume_data)
+        record_stage("extract_features", time.perf_counter() - started_at)
+        return features
+
+    def _extract_batch_isolating_errors(self, resumes_data: List[Dict[str, Any]], positions: List[int],
+                                        outcomes: List[Dict[str, Any]]) -> Tuple[FeatureColumns, List[int]]:
+        """Extract the features of a batch as columns, marking the resumes that fail as errors."""
+        started_at = time.perf_counter()
+        features = extract_features_batch(resumes_data)
+        if resumes_data:
+            record_stage("extract_features", time.perf_counter() - started_at)
+        valid_rows = [row for row, error in enumerate(features.errors) if error is None]
+        if len(valid_rows) == len(features):
+            return features, positions
+        for row, error in enumerate(features.errors):
+            if error is not None:
+                outcomes[positions[row]]["error"] = error
+        return features.take(valid_rows), [positions[row] for row in valid_rows]
+
+    def _route(self, user_id: str) -> Optional[CandidateModel]:
+        """The A/B candidate that answers this user's resumes, or None for the primary model."""
+        if self.ab_split is not None and self.ab_split.routes_to_candidate(user_id):
+            return self.ab_split.candidate
+        return None
+
+    @staticmethod
+    def _split_arms(positions: List[int], processed_features: Any, candidates: Dict[int, CandidateModel]):
+        """Yield (positions, feature rows, candidate or None) for each model answering part of a batch."""
+        if not candidates:
+            yield positions, processed_features, None
+            return
+        arms: Dict[Optional[str], List[int]] = {}
+        by_name = {candidate.name: candidate for candidate in candidates.values()}
+        for row, position in enumerate(positions):
+            candidate = candidates.get(position)
+            arms.setdefault(candidate.name if candidate is not None else None, []).append(row)
+        for name, rows in arms.items():
+            yield [positions[row] for row in rows], processed_features[rows], by_name.get(name)
+
+    def _score(self, processed_features: Any, candidate: Optional[CandidateModel] = None) -> List[Dict[str, Any]]:
+        """
+        Score preprocessed rows with the primary model (or an A/B candidate).
+
+        Rows scored by the primary model are handed to the shadow models too,
+        so every model sees the same feature matrix, built once.
+        """
+        engine = candidate.engine if candidate is not None else self.engine
+        started_at = time.perf_counter()
+        probabilities = engine.predict_proba(processed_features)
+        elapsed = time.perf_counter() - started_at
+        record_stage("inference", elapsed)
+        latency_ms = elapsed * 1000
+        outputs = [self._model_output(row, engine) for row in probabilities]
+        if candidate is None and self.shadow_evaluator is not None:
+            self.shadow_evaluator.submit(
+                processed_features, [output["predictedExperienceLevel"] for output in outputs], latency_ms
+            )
+        return outputs
+
+    def _model_output(self, probabilities: np.ndarray, engine: Any = None) -> Dict[str, Any]:
+        """
+        Turn one row of class probabilities into the model's answer.
+
+        The label is the argmax of the probabilities, exactly as
+        ``model.predict`` derives it, so the forest is evaluated only once.
+        The full distribution is included, most likely level first.
+        """
+        classes = (engine if engine is not None else self.engine).classes_
+        best = int(np.argmax(probabilities))
+        ranking = np.argsort(-probabilities, kind="stable")
+        return {
+            "predictedExperienceLevel": self._decode_prediction(classes[best]),
+            "confidenceScore": float(probabilities[best]),
+            "probabilities": [
+                {
+                    "level": self._decode_prediction(classes[index]),
+                    "probability": float(probabilities[index])
+                }
+                for index in ranking
+            ]
+        }
+
+    def _build_result(self, user_id: str, output: Dict[str, Any], resume_hash: str,
+                      model_version: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "userId": user_id,
+            "predictedExperienceLevel": output["predictedExperienceLevel"],
+            "confidenceScore": output["confidenceScore"],
+            "hash": resume_hash,
+            "modelVersion": model_version or self.model_version,
+            "probabilities": output["probabilities"]
+        }
+
+    def _preprocess_batch_isolating_errors(self, features: FeatureColumns, positions: List[int],
+                                           outcomes: List[Dict[str, Any]]):
+        """
+        Preprocess a batch, falling back to row by row when the batch fails so
+        that only the offending resumes are marked as errors.
+        """
+        if not len(features):
+            return features, positions, None
+        sparse_output = config.model.sparse_batch_features
+        try:
+            return features, positions, self._preprocess_batch(features, sparse_output)
+        except Exception:
+            pass
+
+        valid_rows = []
+        for row, position in enumerate(positions):
+            try:
+                self._preprocess_batch(features.take([row]))
+                valid_rows.append(row)
+            except Exception as e:
+                outcomes[position]["error"] = str(e)
+
+        features, positions = features.take(valid_rows), [positions[row] for row in valid_rows]
+        if not valid_rows:
+            return features, positions, None
+        return features, positions, self._preprocess_batch(features, sparse_output)
+
+    def _preprocess_features(self, features: dict, text_counts: Optional[Dict[int, int]] = None) -> np.ndarray:
+        if text_counts is not None and self.feature_layout is not None:
+            return self.feature_layout.transform([features], [text_counts])
+        return self._preprocess_batch([features])
+
+    def _preprocess_batch(self, features_list: Any, sparse_output: bool = False):
+        """Preprocess feature dictionaries or a FeatureColumns batch into the model input."""
+        if self.feature_layout is not None:
+            if sparse_output:
+                return self.feature_layout.transform_sparse(features_list)
+            return self.feature_layout.transform(features_list)
+        if isinstance(features_list, FeatureColumns):
+            features_list = features_list.rows()
+        return self._preprocess_batch_with_pandas(features_list, sparse_output)
+
+    def _preprocess_batch_with_pandas(self, features_list: List[dict], sparse_output: bool = False):
+        """Reference pipeline applying the fitted sklearn preprocessors directly."""
+        # pandas is only needed here, so the array artifact path never imports it
+        import pandas as pd
+
         num_order = self.artifacts['numerical_features_order']
         scaler = self.artifacts['scaler']
         ohe = self.artifacts['one_hot_encoder']
@@ -40,43 +360,66 @@ class ResumeClassifierService:
         tfidf = self.artifacts['tfidf_vectorizer']
 
         # Create a DataFrame with numerical features to preserve feature names
-        num_df = pd.DataFrame([[features[n] for n in num_order]], columns=num_order)
+        num_df = pd.DataFrame([[f[n] for n in num_order] for f in features_list], columns=num_order)
         num_features = scaler.transform(num_df)
 
         # Create a DataFrame with education level to preserve feature names
-        edu_df = pd.DataFrame([[features["highestEducationLevel"]]], columns=['highestEducationLevel'])
+        edu_df = pd.DataFrame([[f["highestEducationLevel"]] for f in features_list],
+                              columns=['highestEducationLevel'])
         edu_features = ohe.transform(edu_df)
 
+        text_features = tfidf.transform([f["fullText"] for f in features_list])
+
+        if sparse_output:
+            # Keep the mostly-zero blocks in CSR form end to end
+            return sparse.hstack([
+                sparse.csr_matrix(num_features),
+                sparse.csr_matrix(edu_features),
+                self._binarize_sparse(mlb_tech, [f["technologies"] for f in features_list]),
+                self._binarize_sparse(mlb_skills, [f["softSkills"] for f in features_list]),
+                text_features
+            ], format="csr")
+
         # These don't need DataFrames as they don't use feature names
-        tech_features = mlb_tech.transform([features["technologies"]])
-        skills_features = mlb_skills.transform([features["softSkills"]])
-        text_features = tfidf.transform([features["fullText"]]).toarray()
+        tech_features = mlb_tech.transform([f["technologies"] for f in features_list])
+        skills_features = mlb_skills.transform([f["softSkills"] for f in features_list])
 
         return np.concatenate([
             num_features,
             edu_features,
             tech_features,
             skills_features,
-            text_features
+            text_features.toarray()
         ], axis=1)
 
+    @staticmethod
+    def _binarize_sparse(mlb, label_lists: List[List[str]]) -> sparse.csr_matrix:
+        """CSR equivalent of ``mlb.transform``; labels unseen during training are ignored."""
+        column_of = {label: column for column, label in enumerate(mlb.classes_)}
+        indptr, indices = [0], []
+        for labels in label_lists:
+            indices.extend(sorted({column_of[label] for label in labels if label in column_of}))
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int64), indices, indptr),
+            shape=(len(label_lists), len(mlb.classes_))
+        )
+
     def _decode_prediction(self, encoded_label: int) -> str:
         inverse_map = {v: k for k, v in self.artifacts['level_mapping'].items()}
         return inverse_map.get(encoded_label, "Desconhecido")
 
-    def _generate_resume_hash(self, resume: ResumePayload) -> str:
+    def _generate_resume_hash(self, resume_data: Dict[str, Any]) -> str:
         """Gera um hash SHA-256 a partir do conteúdo do currículo."""
+        started_at = time.perf_counter()
+        resume_json = json.dumps(resume_data, sort_keys=True, default=_isoformat)
+        resume_hash = hashlib.sha256(resume_json.encode("utf-8")).hexdigest()
+        record_stage("hash", time.perf_counter() - started_at)
+        return resume_hash
+
 
-        def convert(obj):
-            if isinstance(obj, dict):
-                return {k: convert(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert(v) for v in obj]
-            elif isinstance(obj, datetime):
-                return obj.isoformat()
-            return obj
-
-        raw = resume.model_dump()
-        converted = convert(raw)
-        resume_json = json.dumps(converted, sort_keys=True)
-        return hashlib.sha256(resume_json.encode("utf-8")).hexdigest()
+def _isoformat(value: Any) -> str:
+    """Serialize the datetimes of a dumped resume for hashing."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
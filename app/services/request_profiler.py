@@ -0,0 +1,121 @@
+"""
+On-demand profiling of single classification requests.
+
+A request is profiled when it carries ``X-Profile`` with a valid admin
+token, or when it is drawn by ``profiling.sample_rate``. It then runs the
+service under cProfile, answers with a ``Server-Timing`` header holding the
+time of each stage, and the profile is saved to ``profiling.output_dir``
+for ``pstats`` or snakeviz.
+
+Stages are reported through ``record_stage``, which feeds the stage latency
+metrics and, only while a request is profiled, the request's own
+breakdown. Requests that are not profiled pay one context variable lookup
+per stage.
+
+Only one request is profiled at a time: from Python 3.12 cProfile hooks
+``sys.monitoring`` for the whole process, where a second profiler cannot
+start. A requested profile that finds the profiler busy is refused, and
+sampling skips while a profile is running.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.services.metrics import STAGE_SECONDS
+
+# Profile of the request being handled; asyncio.to_thread carries it to the worker thread
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+PROFILE_SUFFIX = ".prof"
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another request is being profiled."""
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Report the duration of one classification stage."""
+    STAGE_SECONDS.observe(seconds, stage)
+    profile = current_profile.get()
+    if profile is not None:
+        profile.stages.append((stage, seconds))
+
+
+class RequestProfile:
+    """Stage timings and cProfile statistics of one request."""
+
+    def __init__(self, reason: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.reason = reason
+        self.stages: List[Tuple[str, float]] = []
+        self.profiler = cProfile.Profile()
+
+    def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Call ``function`` under the profiler, timing the whole call as the ``predict`` stage."""
+        started_at = time.perf_counter()
+        try:
+            return self.profiler.runcall(function, *args)
+        finally:
+            self.stages.append(("predict", time.perf_counter() - started_at))
+
+    def server_timing(self) -> str:
+        """The stages as a Server-Timing header value, in milliseconds."""
+        return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages)
+
+    def save(self, directory: str, max_files: int) -> str:
+        """Write the profile to ``directory``, keeping at most ``max_files`` profiles there."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{self.reason}-{self.id}{PROFILE_SUFFIX}")
+        self.profiler.dump_stats(path)
+        _prune(directory, max_files)
+        return path
+
+
+class RequestProfiler:
+    """Decides which requests are profiled and where their profiles go."""
+
+    def __init__(self, sample_rate: float = 0.0, output_dir: str = "profiles", max_files: int = 100):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"Profiling sample rate must be between 0 and 1, got {sample_rate}")
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.max_files = max_files
+        self._slot = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._slot.locked()
+
+    def sampled(self) -> bool:
+        # A draw while another request is profiled is skipped, not queued
+        return self.sample_rate > 0.0 and not self.busy and random.random() < self.sample_rate
+
+    def run(self, profile: RequestProfile, function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Call ``function`` under ``profile``, or raise ProfilerBusyError while
+        another request holds the profiler. The slot is taken and released in
+        the calling thread, around the profiled call only.
+        """
+        if not self._slot.acquire(blocking=False):
+            raise ProfilerBusyError("Another request is being profiled; retry later")
+        try:
+            return profile.run(function, *args)
+        finally:
+            self._slot.release()
+
+
+def _prune(directory: str, max_files: int) -> None:
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(PROFILE_SUFFIX)),
+        key=lambda entry: entry.stat().st_mtime_ns
+    )
+    for entry in profiles[:max(0, len(profiles) - max_files)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
@@ -0,0 +1,247 @@
+"""
+Stored resumes for incremental re-classification.
+
+A resume put under an id is kept with partial aggregates of each
+professional experience: the dates its length is measured from, its
+technologies and soft skills, its text fragments and their term counts. A
+patch that adds, updates or removes one experience or formation recomputes
+the partials of that entry only; the features are then reassembled from the
+partials, in the order and with the quirks of
+``extract_features_for_prediction``, so the classification equals a full
+recompute of the patched resume.
+
+Resumes are kept in the memory of the process, in a bounded LRU. With
+several server workers, a patch that reaches a worker which does not hold
+the resume is answered 404 and the client puts the resume again.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.models import AcademicFormation, ProfessionalExperience, ResumePayload, ResumePatchOperation
+from app.services.request_profiler import record_stage
+from app.utils import format_validation_error
+
+ENTRY_MODELS = {
+    "professionalExperiences": ProfessionalExperience,
+    "academicFormations": AcademicFormation,
+}
+
+# What classifying a stored resume needs: its dump, its features and the term counts of its text
+Prepared = Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[int, int]]]
+
+
+class ResumeNotFoundError(Exception):
+    """Raised when patching a resume that is not (or no longer) stored."""
+
+
+class InvalidPatchError(ValueError):
+    """Raised when a patch operation cannot be applied to the stored resume."""
+
+
+class ExperiencePartial:
+    """The share of one professional experience in the features of its resume."""
+
+    __slots__ = ("start", "end", "technologies", "soft_skills", "fragments", "term_counts")
+
+    def __init__(self, experience: Dict[str, Any], layout: Any = None):
+        # Same date handling as extract_features_for_prediction: an end date is only read from an
+        # ISO string, otherwise the experience lasts until the day it is classified
+        start_date, end_date = experience.get("startDate"), experience.get("endDate")
+        self.start = (datetime.fromisoformat(start_date) if isinstance(start_date, str) else start_date
+                      ) if start_date else None
+        self.end = datetime.fromisoformat(end_date) if isinstance(end_date, str) and end_date else None
+
+        self.technologies: List[str] = []
+        self.soft_skills: List[str] = []
+        self.fragments: List[str] = []
+        for activity in experience.get("activitiesPerformed", []):
+            self.technologies.extend(activity.get("technologies", []))
+            self.soft_skills.extend(activity.get("appliedSoftSkills", []))
+            if activity.get("activity"):
+                self.fragments.append(activity.get("activity"))
+            if activity.get("problemSolved"):
+                self.fragments.append(activity.get("problemSolved"))
+        self.term_counts = layout.text_counts(self.fragments) if layout is not None else None
+
+    def years(self, now: datetime) -> int:
+        if self.start is None:
+            return 0
+        end = self.end or now
+        return (end.year - self.start.year) - ((end.month, end.day) < (self.start.month, self.start.day))
+
+
+class StoredResume:
+    """A dumped resume with the partials of its experiences, computed with ``layout``."""
+
+    def __init__(self, resume_data: Dict[str, Any], layout: Any,
+                 experiences: Optional[List[ExperiencePartial]] = None):
+        self.resume_data = resume_data
+        self.layout = layout
+        self.experiences = experiences if experiences is not None else [
+            ExperiencePartial(experience, layout) for experience in resume_data.get("professionalExperiences", [])
+        ]
+        summary = resume_data.get("summary", "")
+        self.summary_counts = (layout.text_counts([summary])
+                               if layout is not None and isinstance(summary, str) else None)
+
+    def features(self, now: Optional[datetime] = None) -> Tuple[Dict[str, Any], Optional[Dict[int, int]]]:
+        """
+        The features ``extract_features_for_prediction`` returns for the
+        resume, and the term counts of its full text (None when the text is
+        vectorized as a whole, e.g. without a summary).
+        """
+        now = now or datetime.now()
+        total_years = sum(experience.years(now) for experience in self.experiences)
+        number_of_jobs = len(self.experiences)
+        formations = self.resume_data.get("academicFormations", [])
+
+        summary = self.resume_data.get("summary", "")
+        fragments = list(chain.from_iterable(experience.fragments for experience in self.experiences))
+        full_text = summary
+        for fragment in fragments:
+            # Raises the TypeError of a full extraction when there is no summary
+            full_text += " " + fragment
+
+        features = {
+            "totalYearsExperience": total_years,
+            "numberOfJobs": number_of_jobs,
+            "avgYearsPerJob": total_years / number_of_jobs if number_of_jobs > 0 else 0,
+            "highestEducationLevel": formations[0].get("level", "") if formations else "",
+            "technologies": list(set(chain.from_iterable(e.technologies for e in self.experiences))),
+            "softSkills": list(set(chain.from_iterable(e.soft_skills for e in self.experiences))),
+            "fullText": full_text,
+            "textFragments": [summary, *fragments],
+        }
+        if self.summary_counts is None:
+            return features, None
+        text_counts = dict(self.summary_counts)
+        for experience in self.experiences:
+            for column, count in experience.term_counts.items():
+                text_counts[column] = text_counts.get(column, 0) + count
+        return features, text_counts
+
+    def patched(self, operations: List[ResumePatchOperation]) -> "StoredResume":
+        """A copy of this resume with ``operations`` applied, recomputing the partials of changed experiences."""
+        resume_data = dict(self.resume_data)
+        sections = {section: list(resume_data.get(section, [])) for section in ENTRY_MODELS}
+        experiences = list(self.experiences)
+
+        for number, operation in enumerate(operations):
+            entries = sections[operation.section]
+            try:
+                index = self._target_index(operation, len(entries))
+                if operation.op == "remove":
+                    entry = None
+                elif operation.value is None:
+                    raise InvalidPatchError(f"'{operation.op}' needs a value")
+                else:
+                    entry = ENTRY_MODELS[operation.section].model_validate(operation.value).model_dump()
+            except ValidationError as e:
+                raise InvalidPatchError(f"operations.{number}.value: {format_validation_error(e)}")
+            except InvalidPatchError as e:
+                raise InvalidPatchError(f"operations.{number}: {e}")
+
+            partial = (ExperiencePartial(entry, self.layout)
+                       if entry is not None and operation.section == "professionalExperiences" else None)
+            if operation.op == "add":
+                entries.insert(index, entry)
+                if partial is not None:
+                    experiences.insert(index, partial)
+            elif operation.op == "update":
+                entries[index] = entry
+                if partial is not None:
+                    experiences[index] = partial
+            else:
+                del entries[index]
+                if operation.section == "professionalExperiences":
+                    del experiences[index]
+
+        resume_data.update(sections)
+        return StoredResume(resume_data, self.layout, experiences)
+
+    @staticmethod
+    def _target_index(operation: ResumePatchOperation, length: int) -> int:
+        if operation.op == "add":
+            if operation.index is None:
+                return length
+            if operation.index > length:
+                raise InvalidPatchError(f"cannot add at index {operation.index} of {length} {operation.section}")
+            return operation.index
+        if operation.index is None:
+            raise InvalidPatchError(f"'{operation.op}' needs an index")
+        if operation.index >= length:
+            raise InvalidPatchError(f"index {operation.index} out of range for {length} {operation.section}")
+        return operation.index
+
+
+class ResumeStore:
+    """Bounded LRU of stored resumes, keyed by resume id."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, StoredResume]" = OrderedDict()
+        # Serializes patches, so concurrent patches of one resume all apply
+        self._lock = threading.Lock()
+        self.puts = 0
+        self.patches = 0
+        self.evictions = 0
+
+    def put(self, resume_id: str, resume: ResumePayload, layout: Any) -> Prepared:
+        """Store ``resume`` under ``resume_id``, replacing any earlier version, and prepare its classification."""
+        started_at = time.perf_counter()
+        stored = StoredResume(resume.model_dump(), layout)
+        with self._lock:
+            self._store(resume_id, stored)
+            self.puts += 1
+        return self._prepare(stored, started_at)
+
+    def patch(self, resume_id: str, operations: List[ResumePatchOperation], layout: Any) -> Prepared:
+        """
+        Apply ``operations`` to the resume stored under ``resume_id`` and
+        prepare its classification. Operations apply in order and all or
+        none of them do.
+        """
+        started_at = time.perf_counter()
+        with self._lock:
+            stored = self._entries.get(resume_id)
+            if stored is None:
+                raise ResumeNotFoundError(f"Resume {resume_id} is not stored")
+            if stored.layout is not layout:
+                # Term counts index the vocabulary of the model they were computed for
+                stored = StoredResume(stored.resume_data, layout)
+            stored = stored.patched(operations)
+            self._store(resume_id, stored)
+            self.patches += 1
+        return self._prepare(stored, started_at)
+
+    def delete(self, resume_id: str) -> bool:
+        with self._lock:
+            return self._entries.pop(resume_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "puts": self.puts,
+            "patches": self.patches,
+            "evictions": self.evictions,
+        }
+
+    def _store(self, resume_id: str, stored: StoredResume) -> None:
+        self._entries[resume_id] = stored
+        self._entries.move_to_end(resume_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _prepare(stored: StoredResume, started_at: float) -> Prepared:
+        features, text_counts = stored.features()
+        record_stage("extract_features", time.perf_counter() - started_at)
+        return stored.resume_data, features, text_counts
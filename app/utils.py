@@ -1,9 +1,12 @@
 """
 Utility functions for the Talent Flow API.
 """
-from typing import Dict, Any, Tuple
+from typing import AsyncIterator, Dict, Any, List, Optional, Sequence, Tuple
+import hashlib
 import pickle
-from datetime import datetime
+from datetime import date, datetime
+
+from pydantic import ValidationError
 
 def load_model_artifacts(model_path: str, preprocessors_path: str) -> Tuple[Any, Dict[str, Any]]:
     """
@@ -30,6 +33,77 @@ def load_model_artifacts(model_path: str, preprocessors_path: str) -> Tuple[Any,
     except FileNotFoundError as e:
         raise FileNotFoundError(f"Required model file not found: {e}")
 
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes],
+                            max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a stream of byte chunks into NDJSON lines as they arrive.
+    
+    Args:
+        chunks: Asynchronous iterator of raw body chunks
+        max_line_bytes: Longest line accepted
+        
+    Yields:
+        Tuples of (1-based line number, line bytes) for every non-blank line.
+        A line longer than ``max_line_bytes`` is yielded as ``None`` and its
+        content discarded, so one oversized record cannot exhaust memory.
+    """
+    buffer = bytearray()
+    line_number = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                if len(buffer) > max_line_bytes:
+                    oversized = True
+                    buffer.clear()
+                break
+            line = bytes(buffer[:newline]).strip()
+            del buffer[:newline + 1]
+            line_number += 1
+            if oversized:
+                oversized = False
+                yield line_number, None
+            elif len(line) > max_line_bytes:
+                yield line_number, None
+            elif line:
+                yield line_number, line
+    line = bytes(buffer).strip()
+    if oversized or line:
+        yield line_number + 1, None if oversized else line
+
+def format_validation_error(error: ValidationError) -> str:
+    """Render a pydantic validation error as one line of ``field: message`` pairs."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'resume'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+def select_probabilities(result: Dict[str, Any], include_probabilities: bool, top_k: Optional[int]) -> Dict[str, Any]:
+    """Keep the requested part of the level distribution, or drop it when not asked for."""
+    shaped = {key: value for key, value in result.items() if key != "probabilities"}
+    if include_probabilities or top_k is not None:
+        shaped["probabilities"] = result["probabilities"][:top_k]
+    return shaped
+
+def compute_artifact_version(*paths: str) -> str:
+    """
+    Derive a short version identifier from the content of artifact files.
+    
+    Args:
+        paths: Paths of the files that make up a model version
+        
+    Returns:
+        The first 12 hex digits of the SHA-256 of the files' contents
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as artifact_file:
+            for block in iter(lambda: artifact_file.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
 def extract_features_for_prediction(resume_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Extract features from resume data for model prediction.
@@ -80,16 +154,19 @@ def extract_features_for_prediction(resume_data: Dict[str, Any]) -> Dict[str, An
     technologies = list(set(technologies))
     soft_skills = list(set(soft_skills))
     
-    # Create full text for TF-IDF
+    # Create full text for TF-IDF, keeping its pieces for the per-fragment TF-IDF cache
     summary = resume_data.get("summary", "")
     full_text = summary
+    text_fragments = [summary]
     
     for exp in experiences:
         for activity in exp.get("activitiesPerformed", []):
             if activity.get("activity"):
                 full_text += " " + activity.get("activity")
+                text_fragments.append(activity.get("activity"))
             if activity.get("problemSolved"):
                 full_text += " " + activity.get("problemSolved")
+                text_fragments.append(activity.get("problemSolved"))
     
     return {
         "totalYearsExperience": total_years,
@@ -98,5 +175,184 @@ def extract_features_for_prediction(resume_data: Dict[str, Any]) -> Dict[str, An
         "highestEducationLevel": highest_education,
         "technologies": technologies,
         "softSkills": soft_skills,
-        "fullText": full_text
-    }
\ No newline at end of file
+        "fullText": full_text,
+        "textFragments": text_fragments
+    }
+
+
+class FeatureColumns:
+    """
+    Features of a batch of resumes, one column per feature.
+
+    Numerical features are NumPy arrays; education levels, token lists and
+    texts are lists. ``errors[i]`` holds the message of the exception that
+    ``extract_features_for_prediction`` raises for resume ``i``, whose other
+    values are then placeholders.
+    """
+
+    def __init__(self, total_years, number_of_jobs, avg_years_per_job, highest_education: List[Any],
+                 technologies: List[List[str]], soft_skills: List[List[str]], full_text: List[Any],
+                 text_fragments: List[List[Any]], errors: List[Optional[str]]):
+        self.total_years = total_years
+        self.number_of_jobs = number_of_jobs
+        self.avg_years_per_job = avg_years_per_job
+        self.highest_education = highest_education
+        self.technologies = technologies
+        self.soft_skills = soft_skills
+        self.full_text = full_text
+        self.text_fragments = text_fragments
+        self.errors = errors
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    def numerical(self, order: Sequence[str]):
+        """The numerical features as a float64 matrix, columns in ``order``."""
+        import numpy as np
+        columns = {
+            "totalYearsExperience": self.total_years,
+            "numberOfJobs": self.number_of_jobs,
+            "avgYearsPerJob": self.avg_years_per_job,
+        }
+        return np.column_stack([columns[name] for name in order]).astype(np.float64, copy=False)
+
+    def take(self, rows: Sequence[int]) -> "FeatureColumns":
+        """The columns of the given rows only."""
+        import numpy as np
+        index = np.asarray(rows, dtype=np.intp)
+        return FeatureColumns(
+            self.total_years[index], self.number_of_jobs[index], self.avg_years_per_job[index],
+            [self.highest_education[row] for row in rows], [self.technologies[row] for row in rows],
+            [self.soft_skills[row] for row in rows], [self.full_text[row] for row in rows],
+            [self.text_fragments[row] for row in rows], [self.errors[row] for row in rows]
+        )
+
+    def row(self, row: int) -> Dict[str, Any]:
+        """Row ``row`` as the dictionary ``extract_features_for_prediction`` returns."""
+        number_of_jobs = int(self.number_of_jobs[row])
+        return {
+            "totalYearsExperience": int(self.total_years[row]),
+            "numberOfJobs": number_of_jobs,
+            "avgYearsPerJob": float(self.avg_years_per_job[row]) if number_of_jobs > 0 else 0,
+            "highestEducationLevel": self.highest_education[row],
+            "technologies": self.technologies[row],
+            "softSkills": self.soft_skills[row],
+            "fullText": self.full_text[row],
+            "textFragments": self.text_fragments[row]
+        }
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [self.row(row) for row in range(len(self))]
+
+
+# Proleptic Gregorian ordinal of 1970-01-01, day 0 of datetime64[D]
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _day_number(value: Any) -> int:
+    """Days since 1970-01-01 of the calendar date (in its own time zone) of an ISO string or datetime."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, date):
+        value = date(value.year, value.month, value.day)
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def _whole_years(start, end):
+    """Whole years from ``start`` to ``end`` (datetime64[D] arrays), counting only passed anniversaries."""
+    import numpy as np
+    start_year, end_year = start.astype("datetime64[Y]"), end.astype("datetime64[Y]")
+    start_month, end_month = start.astype("datetime64[M]"), end.astype("datetime64[M]")
+    # (month, day) packed in one integer, compared like the tuples of the single-resume function
+    start_key = (start_month - start_year).astype(np.int64) * 32 + (start - start_month).astype(np.int64)
+    end_key = (end_month - end_year).astype(np.int64) * 32 + (end - end_month).astype(np.int64)
+    return (end_year - start_year).astype(np.int64) - (end_key < start_key)
+
+
+def extract_features_batch(resumes: Sequence[Dict[str, Any]], now: Optional[datetime] = None) -> FeatureColumns:
+    """
+    Extract the features of many resumes at once, as columns.
+
+    Equivalent to calling ``extract_features_for_prediction`` on every
+    resume (``FeatureColumns.row`` returns the same dictionaries), including
+    its quirks: only ISO string end dates are read, others count up to now,
+    and a missing summary fails a resume that has activity texts. Dates are
+    compared against one reference ``now`` (default: the current time), and
+    the year arithmetic and averages are vectorized over all experiences.
+
+    Args:
+        resumes: Resume dictionaries, e.g. ``ResumePayload.model_dump()`` outputs
+        now: Reference time for experiences without an end date
+
+    Returns:
+        FeatureColumns with one row per resume
+    """
+    import numpy as np
+
+    today = _day_number(now or datetime.now())
+    count = len(resumes)
+    number_of_jobs = np.zeros(count, dtype=np.int64)
+    highest_education: List[Any] = [""] * count
+    technologies: List[List[str]] = [[] for _ in range(count)]
+    soft_skills: List[List[str]] = [[] for _ in range(count)]
+    full_text: List[Any] = [""] * count
+    text_fragments: List[List[Any]] = [[""] for _ in range(count)]
+    errors: List[Optional[str]] = [None] * count
+    starts, ends, owners = [], [], []
+
+    for row, resume_data in enumerate(resumes):
+        try:
+            experiences = resume_data.get("professionalExperiences", [])
+            row_starts, row_ends = [], []
+            for exp in experiences:
+                start_date = exp.get("startDate")
+                end_date = exp.get("endDate")
+                if start_date:
+                    row_starts.append(_day_number(start_date))
+                    row_ends.append(_day_number(end_date) if isinstance(end_date, str) and end_date else today)
+            jobs = len(experiences)
+
+            academic_formations = resume_data.get("academicFormations", [])
+            education = academic_formations[0].get("level", "") if academic_formations else ""
+
+            row_technologies, row_skills, texts = [], [], []
+            for exp in experiences:
+                for activity in exp.get("activitiesPerformed", []):
+                    row_technologies.extend(activity.get("technologies", []))
+                    row_skills.extend(activity.get("appliedSoftSkills", []))
+            for exp in experiences:
+                for activity in exp.get("activitiesPerformed", []):
+                    if activity.get("activity"):
+                        texts.append(activity.get("activity"))
+                    if activity.get("problemSolved"):
+                        texts.append(activity.get("problemSolved"))
+
+            summary = resume_data.get("summary", "")
+            if texts and not isinstance(summary, str):
+                # The message of the concatenation that fails in the single-resume function
+                raise TypeError(f"unsupported operand type(s) for +=: '{type(summary).__name__}' and 'str'")
+            text = " ".join([summary, *texts]) if texts else summary
+        except Exception as e:
+            errors[row] = str(e)
+            continue
+
+        starts.extend(row_starts)
+        ends.extend(row_ends)
+        owners.extend([row] * len(row_starts))
+        number_of_jobs[row] = jobs
+        highest_education[row] = education
+        technologies[row] = list(set(row_technologies))
+        soft_skills[row] = list(set(row_skills))
+        full_text[row] = text
+        text_fragments[row] = [summary, *texts]
+
+    total_years = np.zeros(count, dtype=np.int64)
+    if starts:
+        years = _whole_years(np.array(starts, dtype=np.int64).astype("datetime64[D]"),
+                             np.array(ends, dtype=np.int64).astype("datetime64[D]"))
+        np.add.at(total_years, np.array(owners, dtype=np.intp), years)
+    avg_years_per_job = np.zeros(count, dtype=np.float64)
+    np.divide(total_years, number_of_jobs, out=avg_years_per_job, where=number_of_jobs > 0)
+
+    return FeatureColumns(total_years, number_of_jobs, avg_years_per_job, highest_education,
+                          technologies, soft_skills, full_text, text_fragments, errors)
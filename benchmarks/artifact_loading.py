@@ -0,0 +1,72 @@
+"""
+Compare loading the model from the pickles and from the memory-mapped array export.
+
+Each format is loaded in a fresh interpreter, so import costs are included.
+Reported per format, as the median of several runs:
+
+- load_s: time to import and load the artifacts, until the service can score
+- service_s: the same, up to a constructed ResumeClassifierService
+- rss_mb: resident memory after constructing the service
+
+Usage:
+    python benchmarks/artifact_loading.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CHILD = r"""
+import json, sys, time
+started_at = time.perf_counter()
+sys.path.insert(0, {root!r})
+if {artifact_format!r} == "arrays":
+    from app.ml.array_artifacts import load_array_artifacts
+    model, artifacts = load_array_artifacts({arrays_path!r})
+else:
+    from app.utils import load_model_artifacts
+    model, artifacts = load_model_artifacts("ml/talent_flow_classifier.pkl", "ml/talent_flow_preprocessors.pkl")
+loaded_at = time.perf_counter()
+from app.services.prediction_service import ResumeClassifierService
+service = ResumeClassifierService(model, artifacts)
+built_at = time.perf_counter()
+with open("/proc/self/status") as status:
+    rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+print(json.dumps({{"load_s": loaded_at - started_at, "service_s": built_at - started_at, "rss_mb": rss_kb / 1024}}))
+"""
+
+
+def run(artifact_format: str, arrays_path: str) -> dict:
+    code = CHILD.format(root=ROOT, artifact_format=artifact_format, arrays_path=arrays_path)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, CACHE_ENABLED="false"))
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pickle vs memory-mapped artifact loading.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as arrays_path:
+        subprocess.run([sys.executable, "-m", "app.ml.array_artifacts", "ml/talent_flow_classifier.pkl",
+                        "ml/talent_flow_preprocessors.pkl", arrays_path], cwd=ROOT, check=True,
+                       capture_output=True)
+        results = {}
+        for artifact_format in ("pickle", "arrays"):
+            runs = [run(artifact_format, arrays_path) for _ in range(args.runs)]
+            results[artifact_format] = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+
+    for artifact_format, result in results.items():
+        print(f"{artifact_format:<8} load={result['load_s'] * 1000:.0f}ms "
+              f"service={result['service_s'] * 1000:.0f}ms rss={result['rss_mb']:.1f}MB")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
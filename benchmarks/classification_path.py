@@ -0,0 +1,257 @@
+"""
+Benchmark suite for the classification path, to catch performance regressions.
+
+Two parts, both on synthetic resumes (see ``synthetic_resumes.py``):
+
+- micro: per size profile, the time per call of feature extraction,
+  preprocessing, the model call, hashing and the whole ``predict``
+  (median and minimum of several repeats, in microseconds)
+- load: concurrent ``POST /classify-resume/`` requests against the ASGI app
+  in process (no network), reporting throughput and p50/p95/p99 latency
+
+Results are written as JSON. Given a baseline written by an earlier run,
+every timing is compared with it (the minimum, for micro-benchmarks) and
+the run fails (exit status 1) when one is slower by more than the
+tolerance. Timings only compare on the same machine; regenerate the
+baseline after changing hardware.
+
+The prediction cache is disabled, so every request is computed, and the
+clock of feature extraction is pinned to ``REFERENCE_NOW``, so the features
+(and the tree paths they take) are the same on every run. The baseline
+records the machine and commit it was measured on.
+
+Usage:
+    python benchmarks/classification_path.py --output results.json
+    python benchmarks/classification_path.py --baseline benchmarks/baseline.json [--tolerance 0.2]
+    python benchmarks/classification_path.py --save-baseline
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+# Every request must reach the model; set before the app configuration is imported
+os.environ.setdefault("CACHE_ENABLED", "false")
+
+from synthetic_resumes import PROFILES, generate_resumes  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# "Now" of feature extraction during the benchmark; the synthetic experiences all end before it
+REFERENCE_NOW = datetime(2025, 6, 1)
+
+
+@contextmanager
+def pinned_clock(now: datetime = REFERENCE_NOW) -> Iterator[None]:
+    """
+    Make feature extraction measure open-ended experiences up to ``now``.
+
+    Payload end dates are datetimes, which ``extract_features_for_prediction``
+    does not read, so every experience is measured up to the current time.
+    """
+    import app.utils
+
+    class PinnedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now if tz is None else now.replace(tzinfo=tz)
+
+    original, app.utils.datetime = app.utils.datetime, PinnedDatetime
+    try:
+        yield
+    finally:
+        app.utils.datetime = original
+
+
+def cpu_model() -> Optional[str]:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+
+def source_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_call(function: Callable[[], Any], loops: int, repeats: int) -> Dict[str, float]:
+    """Median and minimum time of one call, over ``repeats`` runs of ``loops`` calls."""
+    function()
+    runs = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        for _ in range(loops):
+            function()
+        runs.append((time.perf_counter() - started_at) / loops * 1e6)
+    return {"median_us": statistics.median(runs), "min_us": min(runs)}
+
+
+def run_micro_benchmarks(service: Any, loops: int, repeats: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    from app.models import ResumePayload
+    from app.utils import extract_features_for_prediction
+
+    results = {}
+    for profile, (experiences, activities, technologies) in PROFILES.items():
+        resume = ResumePayload(**generate_resumes(1, experiences, activities, technologies)[0])
+        resume_data = resume.model_dump()
+        features = extract_features_for_prediction(resume_data)
+        processed = service._preprocess_features(features)
+        results[profile] = {
+            "extract_features": time_call(lambda: extract_features_for_prediction(resume_data), loops, repeats),
+            "preprocess": time_call(lambda: service._preprocess_features(features), loops, repeats),
+            "model": time_call(lambda: service.engine.predict_proba(processed), loops, repeats),
+            "hash": time_call(lambda: service._generate_resume_hash(resume_data), loops, repeats),
+            "predict": time_call(lambda: service.predict(resume), loops, repeats),
+        }
+    return results
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_load_test(app: Any, resumes: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(resumes)
+
+    async def worker(client: "httpx.AsyncClient") -> None:
+        nonlocal errors
+        for resume in pending:
+            started_at = time.perf_counter()
+            response = await client.post("/classify-resume/", json=resume)
+            latencies.append((time.perf_counter() - started_at) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Describe every timing worse than the baseline by more than ``tolerance`` (a fraction)."""
+    regressions = []
+    for profile, stages in results["micro"].items():
+        for stage, timing in stages.items():
+            reference = baseline.get("micro", {}).get(profile, {}).get(stage)
+            # The minimum is the least disturbed by other load on the machine
+            if reference and timing["min_us"] > reference["min_us"] * (1 + tolerance):
+                regressions.append(f"micro {profile}/{stage}: {timing['min_us']:.1f}us "
+                                   f"vs {reference['min_us']:.1f}us")
+    load, reference = results["load"], baseline.get("load", {})
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        if key in reference and load[key] > reference[key] * (1 + tolerance):
+            regressions.append(f"load {key}: {load[key]:.2f} vs {reference[key]:.2f}")
+    if "throughput_rps" in reference and load["throughput_rps"] < reference["throughput_rps"] / (1 + tolerance):
+        regressions.append(f"load throughput_rps: {load['throughput_rps']:.1f} vs {reference['throughput_rps']:.1f}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the classification path.")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results of an earlier run")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Write the results to {BASELINE_PATH}")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--loops", type=int, default=200, help="Calls per micro-benchmark repeat")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests of the load test")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    import numpy as np
+    from app.config import config
+    import app.main as main_module
+
+    service = main_module.model_loader.load()
+    results: Dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": source_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_model": cpu_model(),
+            "cpu_count": os.cpu_count(),
+            "platform": platform.platform(),
+            "reference_now": REFERENCE_NOW.isoformat(),
+            "environment": config.env,
+            "engine": config.model.engine,
+            "feature_builder": config.model.feature_builder,
+            "micro_batching": config.micro_batching.enabled,
+            "model_version": service.model_version,
+        },
+    }
+    resumes = generate_resumes(args.requests, *PROFILES["medium"], seed=7)
+    with pinned_clock():
+        results["micro"] = run_micro_benchmarks(service, args.loops, args.repeats)
+        results["load"] = asyncio.run(run_load_test(main_module.app, resumes, args.concurrency))
+    main_module.inference_executor.shutdown()
+
+    for profile, stages in results["micro"].items():
+        print(f"{profile:<7} " + " ".join(f"{stage}={timing['median_us']:.1f}us" for stage, timing in stages.items()))
+    load = results["load"]
+    print(f"load    {load['throughput_rps']:.1f} req/s p50={load['p50_ms']:.2f}ms p95={load['p95_ms']:.2f}ms "
+          f"p99={load['p99_ms']:.2f}ms errors={load['errors']}")
+
+    for path in filter(None, [args.output, BASELINE_PATH if args.save_baseline else None]):
+        with open(path, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+            output_file.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        reference_meta = baseline.get("meta", {})
+        for key in ("cpu_model", "cpu_count", "python", "numpy"):
+            if key in reference_meta and reference_meta[key] != results["meta"][key]:
+                print(f"WARNING baseline {key} is {reference_meta[key]}, this run {results['meta'][key]}: "
+                      f"timings may not be comparable")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regression beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
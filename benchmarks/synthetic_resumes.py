@@ -0,0 +1,124 @@
+"""
+Deterministic generator of synthetic resumes for benchmarks.
+
+Resumes are built from a seeded random generator, so two runs with the same
+arguments produce the same payloads. Their size is controlled by the number
+of professional experiences, of activities per experience and of
+technologies per activity; the vocabulary mixes terms the model was trained
+on with unseen ones.
+
+Usage:
+    python benchmarks/synthetic_resumes.py --count 1000 --experiences 5 > resumes.jsonl
+"""
+import argparse
+import json
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+# Named size profiles used by the benchmark suite: (experiences, activities, technologies)
+PROFILES = {
+    "small": (1, 1, 2),
+    "medium": (3, 3, 5),
+    "large": (10, 5, 10),
+}
+
+TECHNOLOGIES = [
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Node.js", "Docker", "Kubernetes", "AWS", "Azure",
+    "SQL", "PostgreSQL", "MongoDB", "Git", "Linux", "Terraform", "Spark", "Pandas", "Figma", "Go",
+    "UI/UX Design", "Cloud Computing", "Desenvolvimento Backend", "Análise de Dados", "DevOps",
+    "Gestão de Produtos", "Machine Learning", "Segurança da Informação", "Kotlin", "Rust",
+]
+SOFT_SKILLS = [
+    "Comunicação", "Liderança", "Trabalho em equipe", "Pensamento Analítico", "Colaboração", "Organização",
+    "Resolução de Problemas", "Adaptabilidade", "Criatividade", "Empatia", "Gestão de Tempo", "Negociação",
+]
+EDUCATION_LEVELS = ["Ensino Médio", "Técnico", "Graduação", "Pós-graduação", "MBA", "Mestrado", "Doutorado"]
+ACTIONS = [
+    "Desenvolvi", "Implementei", "Liderei", "Automatizei", "Otimizei", "Migrei", "Projetei", "Mantive",
+    "Documentei", "Coordenei", "Refatorei", "Integrei",
+]
+OBJECTS = [
+    "serviços de pagamento", "pipelines de dados", "APIs REST", "dashboards de negócio", "testes automatizados",
+    "a infraestrutura em nuvem", "o sistema de recomendação", "o aplicativo móvel", "fluxos de onboarding",
+    "modelos de classificação", "a arquitetura de microsserviços", "rotinas de monitoramento",
+]
+RESULTS = [
+    "Reduzi o tempo de resposta em {n}%", "Aumentei a conversão em {n}%", "Cortei custos de nuvem em {n}%",
+    "Diminuí incidentes em produção em {n}%", "Acelerei as entregas em {n}%",
+]
+SUMMARY_TEMPLATES = [
+    "Profissional de {area} com foco em {focus} e entrega de resultados.",
+    "Atuo com {area} há vários anos, com experiência em {focus}.",
+    "Especialista em {area}, interessado em {focus} e melhoria contínua.",
+]
+AREAS = ["Desenvolvimento Backend", "Dados", "UI/UX Design", "DevOps", "Produto", "Mobile", "Segurança"]
+
+
+def generate_resume(rng: random.Random, index: int, experiences: int, activities: int,
+                    technologies: int) -> Dict[str, Any]:
+    """One resume with the given number of experiences, activities per experience and technologies each."""
+    area = rng.choice(AREAS)
+    # Experiences follow each other backwards from a fixed date. ResumePayload parses the end dates into
+    # datetimes, which feature extraction measures up to now, so benchmarks pin the clock (see
+    # classification_path.pinned_clock) for features that do not depend on the run date
+    end = date(2025, 1, 1) - timedelta(days=rng.randint(0, 365))
+    professional_experiences: List[Dict[str, Any]] = []
+    for _ in range(experiences):
+        start = end - timedelta(days=rng.randint(180, 1500))
+        professional_experiences.append({
+            "experienceType": rng.choice(["CLT", "PJ", "Estágio"]),
+            "companyName": f"Empresa {rng.randint(1, 500)}",
+            "role": f"{rng.choice(['Júnior', 'Pleno', 'Sênior'])} em {area}",
+            "startDate": start.isoformat(),
+            "endDate": end.isoformat(),
+            "isCurrent": False,
+            "activitiesPerformed": [
+                {
+                    "activity": f"{rng.choice(ACTIONS)} {rng.choice(OBJECTS)} para {rng.choice(OBJECTS)}.",
+                    "problemSolved": rng.choice(RESULTS).format(n=rng.randint(5, 60)) + ".",
+                    "technologies": rng.sample(TECHNOLOGIES, min(technologies, len(TECHNOLOGIES))),
+                    "appliedSoftSkills": rng.sample(SOFT_SKILLS, rng.randint(1, 3)),
+                }
+                for _ in range(activities)
+            ],
+        })
+        end = start - timedelta(days=rng.randint(0, 120))
+
+    return {
+        "userId": f"synthetic-{index}",
+        "fullName": f"Pessoa Sintética {index}",
+        "email": f"pessoa{index}@example.com",
+        "mainArea": area,
+        "summary": rng.choice(SUMMARY_TEMPLATES).format(area=area, focus=rng.choice(OBJECTS)),
+        "academicFormations": [
+            {"level": rng.choice(EDUCATION_LEVELS), "courseName": f"Curso em {area}", "institution": "Universidade"}
+        ],
+        "professionalExperiences": professional_experiences,
+        "languages": [{"language": "Português", "proficiency": "Nativo"}],
+        "status": "published",
+    }
+
+
+def generate_resumes(count: int, experiences: int = 3, activities: int = 3, technologies: int = 5,
+                     seed: int = 42) -> List[Dict[str, Any]]:
+    """``count`` resumes of the same shape, reproducible for a given seed."""
+    rng = random.Random(seed)
+    return [generate_resume(rng, index, experiences, activities, technologies) for index in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic resumes as JSON lines.")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--experiences", type=int, default=3)
+    parser.add_argument("--activities", type=int, default=3)
+    parser.add_argument("--technologies", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for resume in generate_resumes(args.count, args.experiences, args.activities, args.technologies, args.seed):
+        print(json.dumps(resume, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
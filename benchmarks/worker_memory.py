@@ -0,0 +1,144 @@
+"""
+Compare the memory of N API workers started by ``uvicorn --workers N`` and by
+the preforking ``serve.py``.
+
+Each launcher is started on a free port and warmed up with a few requests.
+Then ``/proc/<pid>/smaps_rollup`` of every worker process is read. RSS
+counts shared pages in full for every process. PSS divides them among the
+processes sharing them, so the PSS sum is the real memory cost of the
+workers.
+
+Usage (Linux only):
+    python benchmarks/worker_memory.py --workers 4
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SAMPLE_RESUME = {
+    "userId": "benchmark",
+    "summary": "Desenvolvedor backend com foco em APIs e dados.",
+    "academicFormations": [{"level": "Graduação", "courseName": "Computação", "institution": "USP"}],
+    "professionalExperiences": [{
+        "startDate": "2019-01-01",
+        "endDate": "2024-01-01",
+        "activitiesPerformed": [{"activity": "Construí APIs", "technologies": ["Python", "Docker"],
+                                 "appliedSoftSkills": ["Comunicação"]}],
+    }],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def descendants(pid: int) -> List[int]:
+    found = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as children_file:
+            for child in children_file.read().split():
+                found.append(int(child))
+                found.extend(descendants(int(child)))
+    return found
+
+
+def is_worker(pid: int) -> bool:
+    with open(f"/proc/{pid}/cmdline", "rb") as cmdline_file:
+        # multiprocessing helpers of uvicorn's supervisor are not API workers
+        return b"resource_tracker" not in cmdline_file.read()
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup_file:
+        for line in rollup_file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def wait_until_serving(port: int, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def warm_up(port: int, requests: int) -> None:
+    body = json.dumps(SAMPLE_RESUME).encode("utf-8")
+    for _ in range(requests):
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/classify-resume/", data=body,
+                                         headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(request, timeout=10).read()
+
+
+def measure(name: str, command: List[str], port: int, workers: int) -> Dict[str, object]:
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               env=dict(os.environ, LOG_LEVEL="WARNING"))
+    try:
+        wait_until_serving(port)
+        warm_up(port, 10 * workers)
+        pids = [pid for pid in descendants(process.pid) if is_worker(pid)]
+        per_worker = [memory_kb(pid) for pid in pids]
+        master = memory_kb(process.pid)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+    return {
+        "launcher": name,
+        "workers": len(per_worker),
+        "master_rss_mb": master["Rss"] / 1024,
+        "worker_rss_mb": [m["Rss"] / 1024 for m in per_worker],
+        "worker_pss_mb": [m["Pss"] / 1024 for m in per_worker],
+        "worker_private_mb": [(m["Private_Clean"] + m["Private_Dirty"]) / 1024 for m in per_worker],
+        "total_pss_mb": (master["Pss"] + sum(m["Pss"] for m in per_worker)) / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    results = []
+    port = free_port()
+    results.append(measure(
+        "uvicorn --workers",
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(args.workers)],
+        port, args.workers,
+    ))
+    port = free_port()
+    results.append(measure(
+        "serve.py (prefork)",
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.workers)],
+        port, args.workers,
+    ))
+
+    for result in results:
+        mean = lambda values: sum(values) / len(values)
+        print(f"{result['launcher']:<20} workers={result['workers']} "
+              f"RSS/worker={mean(result['worker_rss_mb']):.1f}MB "
+              f"PSS/worker={mean(result['worker_pss_mb']):.1f}MB "
+              f"private/worker={mean(result['worker_private_mb']):.1f}MB "
+              f"total PSS (master + workers)={result['total_pss_mb']:.1f}MB")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
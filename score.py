@@ -0,0 +1,51 @@
+"""
+Offline batch scoring of a JSONL file of resumes, without going through HTTP.
+
+Usage:
+    python score.py resumes.jsonl scores.jsonl --workers 8
+    python score.py resumes.jsonl scores.jsonl --resume   # continue an interrupted run
+"""
+import argparse
+import os
+
+from loguru import logger
+
+from app.config import config
+from app.services.batch_scoring import score_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Classify every resume of a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one resume payload per line")
+    parser.add_argument("output", help="JSONL file receiving one classification (or error) per input line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Scoring processes (default: number of CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Lines scored per task")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue after the last chunk recorded in the checkpoint")
+    parser.add_argument("--include-probabilities", action="store_true",
+                        help="Include the probability of every level in each result")
+    args = parser.parse_args()
+
+    summary = score_file(
+        args.input,
+        args.output,
+        config.model.model_path,
+        config.model.preprocessors_path,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        include_probabilities=args.include_probabilities,
+        max_line_bytes=config.streaming.max_line_bytes,
+    )
+    logger.info(
+        f"Scored {summary['lines']} lines ({summary['errors']} errors) in {summary['elapsed_seconds']:.1f}s, "
+        f"{summary['lines_per_second']:.0f} lines/s; {summary['total_lines']} lines scored in total"
+    )
+
+
+if __name__ == "__main__":
+    main()
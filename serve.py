@@ -0,0 +1,113 @@
+"""
+Production launcher: load the model once, then prefork the uvicorn workers.
+
+Running ``uvicorn --workers N`` makes every worker import ``app.main`` and
+unpickle its own forest and preprocessors, so memory grows with N. Here the
+master imports the app (loading the artifacts), moves every object it
+created into the garbage collector's permanent generation with
+``gc.freeze()`` and only then forks. The children inherit the model through
+copy-on-write pages that they only read, so the model arrays stay shared.
+
+Usage:
+    python serve.py                       # host, port and workers from config
+    python serve.py --workers 8 --port 9000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+from loguru import logger
+
+from app.config import config
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket) -> None:
+    # Restore default handlers; uvicorn installs its own for a graceful shutdown
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=config.log.level.lower()))
+    server.run(sockets=[sock])
+
+
+def spawn_worker(app, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(app, sock)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the API from preforked workers sharing one model.")
+    parser.add_argument("--host", default=config.server.host)
+    parser.add_argument("--port", type=int, default=config.server.port)
+    parser.add_argument("--workers", type=int, default=config.server.workers)
+    args = parser.parse_args()
+
+    # Load the model artifacts once, in the master; the workers' lifespan
+    # finds the model ready and does not load it again
+    from app.main import app, model_loader
+    model_loader.load()
+
+    # Objects that exist now are never collected again, so the collector
+    # does not write to their pages (and un-share them) in the workers
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    workers: Dict[int, int] = {}
+    for slot in range(args.workers):
+        workers[spawn_worker(app, sock)] = slot
+    logger.info(f"Serving on {args.host}:{args.port} with {args.workers} workers (master pid {os.getpid()})")
+
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = workers.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {status}; starting a replacement")
+        # Avoid a tight respawn loop when workers fail at start-up
+        time.sleep(1)
+        if not stopping:
+            workers[spawn_worker(app, sock)] = slot
+
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,29 @@ Tests for the Talent Flow API endpoints.
 """
 import os
 import sys
+import threading
+from datetime import datetime
 
+import pytest
 from fastapi.testclient import TestClient
 
 # Add the parent directory to the path to allow importing from app
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import app.main as main_module
 from app.main import app  # Import the FastAPI app
+from app.services.model_loader import ModelLoader
 
 # Create a test client
 client = TestClient(app)
 
+@pytest.fixture(scope="module", autouse=True)
+def started_app():
+    """Run the app lifespan, which loads the model in the background, and wait until it is ready."""
+    with client:
+        assert main_module.model_loader.wait(timeout=60)
+        yield
+
 def test_root_endpoint():
     """Test that the root endpoint returns the expected response."""
     response = client.get("/")
@@ -36,11 +48,24 @@ def test_classify_resume_endpoint_validation():
     response = client.post("/classify-resume/", json=payload)
     assert response.status_code == 422
 
-def test_maria_sophia_resume_classification():
+def test_maria_sophia_resume_classification(monkeypatch):
     """
     Test that the specific resume for Maria Sophia Melo is correctly classified as 'Júnior'.
     This test uses the actual model and preprocessors, not mocks.
     """
+    import app.utils
+
+    class ResumeDateTime(datetime):
+        """Clock of feature extraction pinned to when the resume was written."""
+
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2025, 6, 25, tzinfo=tz)
+
+    # The current experience has no end date and is measured up to now; as time passes the
+    # resume gains years of experience and no longer describes a junior profile
+    monkeypatch.setattr(app.utils, "datetime", ResumeDateTime)
+
     # Resume data from the issue description
     payload = {
       "userId": "gen_user_1",
@@ -117,3 +142,163 @@ def test_maria_sophia_resume_classification():
     assert data["predictedExperienceLevel"] == "Júnior"
 
     assert data["confidenceScore"] > 0.8
+
+def test_classify_resumes_batch_matches_single(sample_resume_payload):
+    """Test that batch results match the single-resume endpoint item by item."""
+    second_resume = dict(sample_resume_payload, userId="gen_user_2", professionalExperiences=[])
+    payload = {"resumes": [sample_resume_payload, second_resume]}
+
+    response = client.post("/classify-resumes/", json=payload)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 0
+    for item, resume in zip(data["results"], payload["resumes"]):
+        single = client.post("/classify-resume/", json=resume).json()
+        assert item["error"] is None
+        assert item["result"]["userId"] == resume["userId"]
+        assert item["result"]["predictedExperienceLevel"] == single["predictedExperienceLevel"]
+        assert abs(item["result"]["confidenceScore"] - single["confidenceScore"]) < 1e-9
+        assert item["result"]["hash"] == single["hash"]
+
+def test_classify_resumes_reports_errors_per_item(sample_resume_payload):
+    """Test that an invalid resume is reported in its item without failing the batch."""
+    invalid_resume = {"summary": "Sem userId"}
+    payload = {"resumes": [sample_resume_payload, invalid_resume]}
+
+    response = client.post("/classify-resumes/", json=payload)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 1
+    assert data["failed"] == 1
+    assert data["results"][0]["result"]["userId"] == sample_resume_payload["userId"]
+    assert data["results"][1]["index"] == 1
+    assert data["results"][1]["result"] is None
+    assert "userId" in data["results"][1]["error"]
+
+def test_classify_resumes_rejects_empty_batch():
+    """Test that an empty batch is rejected by validation."""
+    response = client.post("/classify-resumes/", json={"resumes": []})
+    assert response.status_code == 422
+
+def test_classify_resume_omits_probabilities_by_default(sample_resume_payload):
+    """Test that the level distribution is only returned when requested."""
+    response = client.post("/classify-resume/", json=sample_resume_payload)
+    assert response.status_code == 200
+    assert "probabilities" not in response.json()
+
+def test_classify_resume_returns_probabilities(sample_resume_payload):
+    """Test that the full distribution is consistent with the predicted level."""
+    response = client.post("/classify-resume/?include_probabilities=true", json=sample_resume_payload)
+    assert response.status_code == 200
+    data = response.json()
+
+    probabilities = data["probabilities"]
+    assert {p["level"] for p in probabilities} == {"Júnior", "Pleno", "Sênior", "Especialista"}
+    assert abs(sum(p["probability"] for p in probabilities) - 1.0) < 1e-9
+    assert probabilities[0]["level"] == data["predictedExperienceLevel"]
+    assert probabilities[0]["probability"] == data["confidenceScore"]
+    assert [p["probability"] for p in probabilities] == sorted(
+        (p["probability"] for p in probabilities), reverse=True
+    )
+
+def test_classify_resume_top_k(sample_resume_payload):
+    """Test that top_k limits the distribution to the most likely levels."""
+    response = client.post("/classify-resume/?top_k=2", json=sample_resume_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["probabilities"]) == 2
+    assert data["probabilities"][0]["level"] == data["predictedExperienceLevel"]
+
+    response = client.post("/classify-resume/?top_k=0", json=sample_resume_payload)
+    assert response.status_code == 422
+
+def test_classify_resume_rejects_malformed_json():
+    """Test that a body that is not valid JSON is rejected like any invalid payload."""
+    response = client.post(
+        "/classify-resume/", content=b'{"userId": ', headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][0] == "body"
+
+def test_classify_resume_hash_is_canonical(sample_resume_payload):
+    """Test that the hash is the SHA-256 of the sorted-key JSON of the validated resume."""
+    import hashlib
+    import json
+    from app.models import ResumePayload
+
+    resume = ResumePayload(**sample_resume_payload).model_dump()
+    for experience in resume["professionalExperiences"]:
+        for key in ("startDate", "endDate"):
+            if experience[key] is not None:
+                experience[key] = experience[key].isoformat()
+    expected = hashlib.sha256(json.dumps(resume, sort_keys=True).encode("utf-8")).hexdigest()
+
+    response = client.post("/classify-resume/", json=sample_resume_payload)
+    assert response.json()["hash"] == expected
+
+def test_classify_resumes_stream_reports_line_errors_inline(sample_resume_payload):
+    """Test that an NDJSON stream is classified line by line with errors emitted in place."""
+    import json
+
+    lines = [
+        json.dumps(sample_resume_payload),
+        "",
+        "{not json",
+        json.dumps(dict(sample_resume_payload, userId="gen_user_2")),
+        json.dumps({"summary": "Sem userId"}),
+    ]
+    body = ("\n".join(lines) + "\n").encode("utf-8")
+
+    def chunks():
+        for start in range(0, len(body), 64):
+            yield body[start:start + 64]
+
+    response = client.post(
+        "/classify-resumes/stream", content=chunks(), headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert len(results) == 4
+    assert results[0]["userId"] == "gen_user_1"
+    assert results[1] == {"line": 3, "error": results[1]["error"]}
+    assert results[2]["userId"] == "gen_user_2"
+    assert results[3]["line"] == 5
+    assert "userId" in results[3]["error"]
+
+def test_health_probes_when_ready():
+    """Test that liveness and readiness succeed once the model is loaded and warmed up."""
+    assert client.get("/health/live").status_code == 200
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["model"]["state"] == "ready"
+    assert response.json()["model"]["warm_up_seconds"] is not None
+
+def test_classification_returns_503_until_model_is_ready(monkeypatch, sample_resume_payload):
+    """Test that classification is refused with 503 while the model loads, and served afterwards."""
+    release = threading.Event()
+    service = main_module.model_loader.service
+
+    def slow_factory():
+        release.wait(timeout=10)
+        return service
+
+    loader = ModelLoader(slow_factory)
+    monkeypatch.setattr(main_module, "model_loader", loader)
+    loader.start()
+
+    assert client.get("/health/live").status_code == 200
+    assert client.get("/health/ready").status_code == 503
+    response = client.post("/classify-resume/", json=sample_resume_payload)
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert client.post("/classify-resumes/", json={"resumes": [sample_resume_payload]}).status_code == 503
+
+    release.set()
+    assert loader.wait(timeout=10)
+    assert client.get("/health/ready").status_code == 200
+    assert client.post("/classify-resume/", json=sample_resume_payload).status_code == 200
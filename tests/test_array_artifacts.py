@@ -0,0 +1,91 @@
+"""
+Tests for the pickle-free array artifact format.
+"""
+import json
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import config
+from app.ml.array_artifacts import export_array_artifacts, load_array_artifacts
+from app.ml.tfidf import TfidfTables
+from app.models import ResumePayload
+from app.services.prediction_service import ResumeClassifierService
+from app.utils import load_model_artifacts
+
+
+@pytest.fixture(scope="module")
+def pickled():
+    return load_model_artifacts(config.model.model_path, config.model.preprocessors_path)
+
+
+@pytest.fixture(scope="module")
+def export_root(pickled, tmp_path_factory):
+    root = tmp_path_factory.mktemp("arrays")
+    export_array_artifacts(*pickled, str(root), version="v-test")
+    return root
+
+
+def test_export_writes_versioned_manifest(export_root):
+    """Test that the export writes a manifest describing every array and points LATEST at it."""
+    assert (export_root / "LATEST").read_text().strip() == "v-test"
+    manifest = json.loads((export_root / "v-test" / "manifest.json").read_text(encoding="utf-8"))
+
+    assert manifest["version"] == "v-test"
+    for entry in manifest["arrays"].values():
+        assert (export_root / "v-test" / entry["file"]).exists()
+    assert not list(export_root.glob(".*.tmp"))
+
+
+def test_loaded_arrays_are_memory_mapped(export_root):
+    """Test that the forest and scaler arrays are read-only memory maps, not heap copies."""
+    forest, artifacts = load_array_artifacts(str(export_root), verify=True)
+
+    assert isinstance(forest.values, np.memmap)
+    assert isinstance(artifacts["feature_layout"].tfidf.idf_, np.memmap)
+    assert not forest.threshold.flags.writeable
+    assert not artifacts["feature_layout"].scale.flags.writeable
+    assert artifacts["model_version"] == "v-test"
+
+
+def test_array_service_matches_pickle_service(pickled, export_root, sample_resume_payload):
+    """Test that a service on exported arrays classifies exactly like one on the pickles."""
+    from_pickle = ResumeClassifierService(*pickled)
+    from_arrays = ResumeClassifierService(*load_array_artifacts(str(export_root)))
+    resumes = [
+        ResumePayload(**sample_resume_payload),
+        ResumePayload(**dict(sample_resume_payload, userId="no_experience", professionalExperiences=[])),
+        ResumePayload(**dict(sample_resume_payload, userId="no_formation", academicFormations=[])),
+    ]
+
+    for expected, actual in zip(from_pickle.predict_batch(resumes), from_arrays.predict_batch(resumes)):
+        assert actual["result"].pop("modelVersion") == "v-test"
+        expected["result"].pop("modelVersion")
+        assert actual == expected
+    rng = np.random.default_rng(3)
+    X = rng.random((300, from_pickle.engine.n_features_in_))
+    X[X < 0.85] = 0.0
+    assert np.array_equal(from_arrays.engine.predict_proba(X), from_pickle.model.predict_proba(X))
+
+
+def test_tfidf_tables_match_vectorizer(pickled):
+    """Test that the regex / stop word / IDF / l2 reimplementation equals TfidfVectorizer bit for bit."""
+    vectorizer = pickled[1]["tfidf_vectorizer"]
+    tables = TfidfTables.from_vectorizer(vectorizer)
+    rng = random.Random(0)
+    words = list(vectorizer.vocabulary_) + ["de", "que", "inexistente", "Python3", "ÁGIL"]
+    texts = ["", "de a o que", "Júnior em UI/UX Design, com foco em impacto real no negócio."] + [
+        " ".join(rng.choice(words) for _ in range(rng.randint(0, 60))) for _ in range(500)
+    ]
+
+    expected, actual = vectorizer.transform(texts), tables.transform(texts)
+
+    assert np.array_equal(actual.indptr, expected.indptr)
+    assert np.array_equal(actual.indices, expected.indices)
+    assert np.array_equal(actual.data, expected.data)
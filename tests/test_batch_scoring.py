@@ -0,0 +1,73 @@
+"""
+Tests for offline batch scoring of JSONL files.
+"""
+import json
+import os
+import sys
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import config
+from app.services.batch_scoring import load_checkpoint, save_checkpoint, score_file
+
+
+def _write_input(path, sample_resume_payload, count):
+    lines = []
+    for index in range(count):
+        lines.append(json.dumps(dict(sample_resume_payload, userId=f"user_{index}")))
+        if index == 2:
+            lines.append("")
+            lines.append("{not json")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _score(input_path, output_path, **kwargs):
+    return score_file(str(input_path), str(output_path), config.model.model_path,
+                      config.model.preprocessors_path, workers=2, chunk_size=2, **kwargs)
+
+
+def test_scores_every_line_in_input_order(tmp_path, sample_resume_payload):
+    """Test that each non-blank input line gets one output line, in order, with errors inline."""
+    input_path, output_path = tmp_path / "resumes.jsonl", tmp_path / "scores.jsonl"
+    _write_input(input_path, sample_resume_payload, 7)
+
+    summary = _score(input_path, output_path)
+
+    outputs = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [output.get("userId") for output in outputs] == [
+        "user_0", "user_1", "user_2", None, "user_3", "user_4", "user_5", "user_6"
+    ]
+    assert outputs[3]["line"] == 5
+    assert "probabilities" not in outputs[0]
+    assert summary["lines"] == 8
+    assert summary["errors"] == 1
+
+
+def test_resume_continues_after_checkpoint(tmp_path, sample_resume_payload):
+    """Test that a resumed run drops output past the checkpoint and produces the same file."""
+    input_path = tmp_path / "resumes.jsonl"
+    complete_path, resumed_path = tmp_path / "complete.jsonl", tmp_path / "resumed.jsonl"
+    _write_input(input_path, sample_resume_payload, 7)
+    _score(input_path, complete_path)
+    expected = complete_path.read_bytes()
+
+    # Simulate a run interrupted after the first four input lines, with one more output line written
+    checkpoint = load_checkpoint(f"{complete_path}.checkpoint")
+    input_offset = len(b"".join(input_path.read_bytes().splitlines(keepends=True)[:4]))
+    output_lines = expected.splitlines(keepends=True)
+    resumed_path.write_bytes(b"".join(output_lines[:4]))
+    save_checkpoint(f"{resumed_path}.checkpoint", {
+        "input_offset": input_offset,
+        "output_offset": len(b"".join(output_lines[:3])),
+        "line_number": 4,
+        "lines": 3,
+        "errors": 0,
+    })
+
+    summary = _score(input_path, resumed_path, resume=True)
+
+    assert resumed_path.read_bytes() == expected
+    assert summary["lines"] == 5
+    assert summary["total_lines"] == checkpoint["lines"]
+    assert load_checkpoint(f"{resumed_path}.checkpoint")["input_offset"] == input_path.stat().st_size
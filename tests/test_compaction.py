@@ -0,0 +1,98 @@
+"""
+Tests for forest compaction.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import config
+from app.ml.array_artifacts import export_array_artifacts
+from app.ml.compaction import compact, distill, greedy_tree_subset, limit_depth, select_trees
+from app.ml.compiled_forest import CompiledForest
+from app.services.model_registry import load_version_artifacts
+from app.utils import load_model_artifacts
+from test_training import labelled_resumes
+
+
+@pytest.fixture(scope="module")
+def forest():
+    model, _ = load_model_artifacts(config.model.model_path, config.model.preprocessors_path)
+    return CompiledForest.from_sklearn(model)
+
+
+@pytest.fixture(scope="module")
+def rows(forest):
+    return np.random.default_rng(0).random((200, forest.n_features_in_)).astype(np.float32)
+
+
+def test_selected_and_depth_limited_trees_match_the_original(forest, rows):
+    """Test that tree surgery keeps predictions when nothing is removed."""
+    expected = forest.predict_proba(rows)
+    np.testing.assert_allclose(select_trees(forest, list(range(forest.n_estimators))).predict_proba(rows), expected)
+    np.testing.assert_allclose(limit_depth(forest, forest.max_depth).predict_proba(rows), expected)
+
+    first = select_trees(forest, [0])
+    np.testing.assert_allclose(first.predict_proba(rows), forest.values[forest.apply(rows)[:, 0]])
+
+
+def test_compacted_variants_are_smaller_valid_forests(forest, rows):
+    """Test that depth limits, subsets and distillation bound the size and keep distributions."""
+    labels = forest.predict_proba(rows).argmax(axis=1)
+    order = greedy_tree_subset(forest, rows, labels, 5)
+    variants = [limit_depth(forest, 3), select_trees(forest, order), distill(forest, rows, max_depth=4)]
+
+    assert len(set(order)) == 5
+    assert variants[0].max_depth == 3 and len(variants[0].feature) < len(forest.feature)
+    assert variants[1].n_estimators == 5
+    assert variants[2].n_estimators == 1 and variants[2].max_depth <= 4
+    for variant in variants:
+        np.testing.assert_allclose(variant.predict_proba(rows).sum(axis=1), 1.0)
+
+
+def test_compact_reports_and_exports_every_variant(tmp_path):
+    """Test the end-to-end report on a labelled dataset and the exported array versions."""
+    dataset = tmp_path / "dataset.jsonl"
+    dataset.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in labelled_resumes(60)),
+                       encoding="utf-8")
+
+    report = compact(str(dataset), tree_counts=[3], depths=[4], distill_depths=[5],
+                     export_root=str(tmp_path / "compacted"))
+
+    assert report["rows"] == {"selection": 30, "test": 30}
+    assert list(report["variants"]) == ["full", "trees-3", "depth-4", "distilled-5"]
+    assert report["variants"]["full"]["agreement"] == 1.0
+    for row in report["variants"].values():
+        assert 0.0 <= row["accuracy"] <= 1.0 and 0.0 <= row["ece"] <= 1.0
+        assert row["single_row_us"] > 0 and row["size_kb"] > 0
+    assert report["variants"]["distilled-5"]["size_kb"] < report["variants"]["full"]["size_kb"]
+
+    exported = sorted(os.listdir(tmp_path / "compacted"))
+    assert len(exported) == 3 and "LATEST" not in exported
+    [distilled] = [name for name in exported if name.endswith("-distilled-5")]
+    model, artifacts = load_version_artifacts(str(tmp_path / "compacted" / distilled))
+    assert (model.n_estimators, artifacts["model_version"]) == (1, distilled)
+
+
+def test_compact_from_an_array_root_exports_variants(tmp_path):
+    """Test that an array export, given by its root's LATEST, is compacted and re-exported."""
+    export_array_artifacts(*load_model_artifacts(config.model.model_path, config.model.preprocessors_path),
+                           str(tmp_path / "arrays"), version="base")
+    dataset = tmp_path / "dataset.jsonl"
+    dataset.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in labelled_resumes(20)),
+                       encoding="utf-8")
+
+    report = compact(str(dataset), base_path=str(tmp_path / "arrays"), tree_counts=[2], depths=[],
+                     distill_depths=[], export_root=str(tmp_path / "compacted"))
+
+    assert list(report["variants"]) == ["full", "trees-2"]
+    model, artifacts = load_version_artifacts(str(tmp_path / "compacted" / "base-trees-2"))
+    _, base_artifacts = load_version_artifacts(str(tmp_path / "arrays" / "base"))
+    assert model.n_estimators == 2
+    assert artifacts["feature_layout"].signature() == base_artifacts["feature_layout"].signature()
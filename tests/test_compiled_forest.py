@@ -0,0 +1,62 @@
+"""
+Parity tests for the compiled forest engine against scikit-learn.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import config
+from app.ml.compiled_forest import CompiledForest
+from app.models import ResumePayload
+from app.services.prediction_service import ResumeClassifierService
+from app.utils import load_model_artifacts, extract_features_for_prediction
+
+
+@pytest.fixture(scope="module")
+def forest():
+    model, _ = load_model_artifacts(config.model.model_path, config.model.preprocessors_path)
+    return model
+
+
+@pytest.fixture(scope="module")
+def compiled(forest):
+    return CompiledForest.from_sklearn(forest)
+
+
+def test_probabilities_match_sklearn_on_random_rows(forest, compiled):
+    """Test that probabilities are bit-for-bit equal to predict_proba on sparse-looking rows."""
+    rng = np.random.default_rng(42)
+    X = rng.random((500, forest.n_features_in_))
+    X[X < 0.8] = 0.0
+
+    assert np.array_equal(compiled.predict_proba(X), forest.predict_proba(X))
+    assert np.array_equal(compiled.predict(X), forest.predict(X))
+
+
+def test_probabilities_match_sklearn_on_resume(forest, compiled, sample_resume_payload):
+    """Test parity on the feature vector of a real resume."""
+    service = ResumeClassifierService()
+    resume = ResumePayload(**sample_resume_payload)
+    row = service._preprocess_features(extract_features_for_prediction(resume.model_dump()))
+
+    assert np.array_equal(compiled.predict_proba(row), forest.predict_proba(row))
+
+
+def test_missing_values_follow_learned_side(forest, compiled):
+    """Test that NaN features are routed like scikit-learn routes them."""
+    rng = np.random.default_rng(7)
+    X = rng.random((200, forest.n_features_in_))
+    X[rng.random(X.shape) < 0.1] = np.nan
+
+    assert np.array_equal(compiled.predict_proba(X), forest.predict_proba(X))
+
+
+def test_rejects_wrong_feature_count(compiled):
+    """Test that rows with the wrong width are rejected."""
+    with pytest.raises(ValueError):
+        compiled.predict_proba(np.zeros((1, 3)))
@@ -0,0 +1,71 @@
+"""
+Tests for the executor that runs inference off the event loop.
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.inference_executor import ExecutorSaturatedError, InferenceExecutor
+
+
+class BlockingService:
+    """Stand-in service whose predict blocks until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def predict(self, value):
+        self.release.wait(timeout=5)
+        return value * 2
+
+
+def test_call_does_not_block_event_loop():
+    """Test that the event loop keeps running while inference is in progress."""
+    service = BlockingService()
+    executor = InferenceExecutor(service, max_workers=1, max_queue_size=1)
+
+    async def scenario():
+        task = asyncio.ensure_future(executor.call("predict", 21))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        service.release.set()
+        return await task
+
+    assert asyncio.run(scenario()) == 42
+    executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_submit_rejects_when_queue_is_full():
+    """Test that submissions beyond workers plus queue size are rejected."""
+    service = BlockingService()
+    executor = InferenceExecutor(service, max_workers=1, max_queue_size=1)
+    running = executor.submit("predict", 1)
+    queued = executor.submit("predict", 2)
+
+    assert executor.stats()["queue_depth"] == 1
+    with pytest.raises(ExecutorSaturatedError):
+        executor.submit("predict", 3)
+
+    service.release.set()
+    assert running.result(timeout=5) == 2
+    assert queued.result(timeout=5) == 4
+    executor.shutdown()
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["max_queue_depth"] == 1
+
+
+def test_unknown_mode_is_rejected():
+    """Test that only thread and process modes are accepted."""
+    with pytest.raises(ValueError):
+        InferenceExecutor(BlockingService(), mode="gpu")
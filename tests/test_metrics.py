@@ -0,0 +1,72 @@
+"""
+Tests for the Prometheus metrics and the /metrics endpoint.
+"""
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app.main as main_module
+from app.services.metrics import CACHE_LOOKUPS, STAGE_SECONDS, MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    """Test that an observation equal to a bound falls in that bucket and buckets are cumulative."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "inference")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{stage="inference",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="inference",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{stage="inference",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="inference"} 2.65' in lines
+    assert 'latency_seconds_count{stage="inference"} 4' in lines
+
+
+def test_disabled_registry_records_nothing():
+    """Test that observations are ignored while metrics are disabled."""
+    registry = MetricsRegistry(enabled=False)
+    counter = registry.counter("requests_total", "Requests", ("status",))
+    histogram = registry.histogram("latency_seconds", "Latency")
+
+    counter.inc("200")
+    histogram.observe(0.5)
+
+    assert counter.value("200") == 0
+    assert histogram.count() == 0
+
+
+def test_label_values_are_escaped():
+    """Test that quotes, backslashes and newlines in label values keep the exposition valid."""
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors", ("reason",)).inc('bad "value"\\\n')
+
+    assert 'errors_total{reason="bad \\"value\\"\\\\\\n"} 1' in registry.render().splitlines()
+
+
+def test_metrics_endpoint_reports_request_stages(sample_resume_payload):
+    """Test that a classification is counted and each of its stages is timed."""
+    client = TestClient(main_module.app)
+    main_module.model_loader.load()
+    stages = ("validation", "extract_features", "preprocess", "inference", "hash")
+    before = {stage: STAGE_SECONDS.count(stage) for stage in stages}
+    lookups_before = CACHE_LOOKUPS.value("hit") + CACHE_LOOKUPS.value("miss")
+
+    payload = dict(sample_resume_payload, summary="Resumo exclusivo do teste de métricas")
+    assert client.post("/classify-resume/", json=payload).status_code == 200
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for stage in stages:
+        assert STAGE_SECONDS.count(stage) == before[stage] + 1
+    assert CACHE_LOOKUPS.value("hit") + CACHE_LOOKUPS.value("miss") == lookups_before + 1
+    assert 'talent_flow_http_requests_total{method="POST",route="/classify-resume/",status="200"}' in response.text
+    assert 'talent_flow_stage_duration_seconds_count{stage="inference"}' in response.text
@@ -0,0 +1,122 @@
+"""
+Tests for the micro-batcher in front of the classifier service.
+"""
+import asyncio
+import os
+import sys
+import threading
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models import ResumePayload
+from app.services.micro_batcher import MicroBatcher, PredictionError
+
+
+class RecordingPredictor:
+    """Stand-in for predict_batch that records the batch sizes it receives."""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.release = threading.Event()
+
+    def __call__(self, resumes):
+        self.release.wait(timeout=5)
+        self.batch_sizes.append(len(resumes))
+        return [
+            {"result": None, "error": "bad resume"} if resume.userId == "bad"
+            else {"result": {"userId": resume.userId}, "error": None}
+            for resume in resumes
+        ]
+
+
+def test_concurrent_requests_are_scored_together():
+    """Test that requests queued within the window share one batch and get their own result."""
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(predictor, window_ms=50, max_batch_size=64)
+    futures = [batcher.submit(ResumePayload(userId=f"user_{i}")) for i in range(10)]
+    predictor.release.set()
+
+    results = [future.result(timeout=5) for future in futures]
+    batcher.shutdown()
+
+    assert [r["userId"] for r in results] == [f"user_{i}" for i in range(10)]
+    assert sum(predictor.batch_sizes) == 10
+    assert max(predictor.batch_sizes) > 1
+    stats = batcher.stats()
+    assert stats["items"] == 10
+    assert stats["batches"] == len(predictor.batch_sizes)
+    assert stats["max_batch_size_seen"] == max(predictor.batch_sizes)
+
+
+def test_batch_size_is_capped():
+    """Test that no batch exceeds the configured maximum size."""
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(predictor, window_ms=50, max_batch_size=4)
+    futures = [batcher.submit(ResumePayload(userId=f"user_{i}")) for i in range(10)]
+    predictor.release.set()
+
+    for future in futures:
+        future.result(timeout=5)
+    batcher.shutdown()
+
+    assert max(predictor.batch_sizes) <= 4
+    assert sum(predictor.batch_sizes) == 10
+
+
+def test_failed_item_only_fails_its_caller():
+    """Test that an error for one resume is raised only to the caller that sent it."""
+    predictor = RecordingPredictor()
+    predictor.release.set()
+    batcher = MicroBatcher(predictor, window_ms=20, max_batch_size=64)
+
+    async def classify_both():
+        return await asyncio.gather(
+            batcher.predict(ResumePayload(userId="good")),
+            batcher.predict(ResumePayload(userId="bad")),
+            return_exceptions=True,
+        )
+
+    good, bad = asyncio.run(classify_both())
+    batcher.shutdown()
+
+    assert good == {"userId": "good"}
+    assert isinstance(bad, PredictionError)
+    assert str(bad) == "bad resume"
+
+
+def test_cancelled_waiter_does_not_stop_the_worker():
+    """Test that a caller giving up before its batch runs is skipped and later requests still resolve."""
+    predictor = RecordingPredictor()
+    predictor.release.set()
+    batcher = MicroBatcher(predictor, window_ms=200, max_batch_size=64)
+
+    async def cancel_one_then_classify():
+        # Cancelled while its batch is still gathering, as on a client disconnect
+        waiter = asyncio.ensure_future(batcher.predict(ResumePayload(userId="gone")))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        kept = await asyncio.wait_for(batcher.predict(ResumePayload(userId="kept")), timeout=5)
+        later = await asyncio.wait_for(batcher.predict(ResumePayload(userId="later")), timeout=5)
+        return waiter, kept, later
+
+    waiter, kept, later = asyncio.run(cancel_one_then_classify())
+    batcher.shutdown()
+
+    assert waiter.cancelled()
+    assert (kept["userId"], later["userId"]) == ("kept", "later")
+    assert batcher.stats()["items"] == 2
+
+
+def test_dead_worker_is_restarted():
+    """Test that a submit after the worker thread died starts a new one."""
+    predictor = RecordingPredictor()
+    predictor.release.set()
+    batcher = MicroBatcher(predictor, window_ms=1, max_batch_size=64)
+    batcher._worker = threading.Thread(target=lambda: None)
+    batcher._worker_pid = os.getpid()
+    batcher._worker.start()
+    batcher._worker.join()
+
+    assert batcher.submit(ResumePayload(userId="user")).result(timeout=5) == {"userId": "user"}
+    batcher.shutdown()
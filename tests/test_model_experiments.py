@@ -0,0 +1,212 @@
+"""
+Tests for shadow and A/B evaluation of candidate models.
+"""
+import copy
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import config
+from app.ml.array_artifacts import export_array_artifacts
+from app.ml.compiled_forest import CompiledForest
+from app.models import ResumePayload
+from app.services.model_experiments import CandidateModel, ModelExperiments, ShadowEvaluator, load_candidate
+from app.services.model_loader import warm_up_service
+from app.services.prediction_service import ResumeClassifierService
+from app.utils import load_model_artifacts
+
+
+@pytest.fixture(scope="module")
+def pickled():
+    return load_model_artifacts(config.model.model_path, config.model.preprocessors_path)
+
+
+@pytest.fixture(scope="module")
+def candidate_path(pickled, tmp_path_factory):
+    root = tmp_path_factory.mktemp("candidates")
+    export_array_artifacts(*pickled, str(root), version="candidate")
+    return str(root / "candidate")
+
+
+@pytest.fixture(scope="module")
+def renamed_vocabulary(pickled):
+    """The preprocessors with one technology renamed: same column count, other features."""
+    model, artifacts = pickled
+    artifacts = dict(artifacts, mlb_tech=copy.deepcopy(artifacts['mlb_tech']))
+    artifacts['mlb_tech'].classes_ = artifacts['mlb_tech'].classes_.copy()
+    artifacts['mlb_tech'].classes_[0] = "Tecnologia renomeada"
+    return model, artifacts
+
+
+@pytest.fixture
+def service(pickled):
+    service = ResumeClassifierService(*pickled)
+    service.prediction_cache = None
+    return service
+
+
+def _resumes(sample_resume_payload, count):
+    return [ResumePayload(**dict(sample_resume_payload, userId=f"user-{index}")) for index in range(count)]
+
+
+def test_shadow_model_agrees_with_itself(service, candidate_path, sample_resume_payload):
+    """Test that a shadow copy of the primary model scores every row and agrees on all of them."""
+    service.attach_shadow_models([load_candidate(candidate_path, service.engine.n_features_in_)])
+    resumes = _resumes(sample_resume_payload, 3)
+
+    service.predict(resumes[0])
+    service.predict_batch(resumes)
+    service.shadow_evaluator.drain()
+    stats = service.experiment_stats()["shadow"]
+    service.shadow_evaluator.shutdown()
+
+    assert stats["submitted"] == 2
+    assert stats["dropped"] == 0
+    assert stats["primary"]["calls"] == 2
+    assert stats["models"]["candidate"]["rows"] == 4
+    assert stats["models"]["candidate"]["agreement_rate"] == 1.0
+    assert stats["models"]["candidate"]["calls"] == 2
+
+
+def test_shadow_work_is_dropped_when_queue_is_full(service, candidate_path):
+    """Test that a full queue drops shadow work instead of blocking the caller."""
+    evaluator = ShadowEvaluator([load_candidate(candidate_path, service.engine.n_features_in_)], max_queue_size=1)
+    evaluator._ensure_worker = lambda: None  # no worker: the queue never empties
+    features = np.zeros((1, service.engine.n_features_in_))
+
+    assert evaluator.submit(features, ["Júnior"], 1.0)
+    assert not evaluator.submit(features, ["Júnior"], 1.0)
+    assert evaluator.stats()["dropped"] == 1
+
+
+def test_ab_split_routes_weighted_share_to_candidate(service, candidate_path, sample_resume_payload):
+    """Test that weight 1 answers everything with the candidate and weight 0 nothing."""
+    candidate = load_candidate(candidate_path, service.engine.n_features_in_)
+    resumes = _resumes(sample_resume_payload, 4)
+    primary = [outcome["result"] for outcome in service.predict_batch(resumes)]
+
+    service.set_ab_split(candidate, 1.0)
+    routed = [outcome["result"] for outcome in service.predict_batch(resumes)]
+    assert {result["modelVersion"] for result in routed} == {"candidate"}
+    assert service.predict(resumes[0])["modelVersion"] == "candidate"
+    for expected, result in zip(primary, routed):
+        assert result["predictedExperienceLevel"] == expected["predictedExperienceLevel"]
+        assert result["confidenceScore"] == expected["confidenceScore"]
+
+    service.set_ab_split(candidate, 0.0)
+    assert {outcome["result"]["modelVersion"] for outcome in service.predict_batch(resumes)} \
+        == {service.model_version}
+    assert service.ab_split.stats()["routed"] == {"primary": 4, "candidate": 0}
+
+
+def test_ab_split_mixes_arms_within_a_batch(service, candidate_path, sample_resume_payload):
+    """Test that a batch split across both arms keeps each result in its position."""
+    service.set_ab_split(load_candidate(candidate_path, service.engine.n_features_in_), 0.5)
+    resumes = _resumes(sample_resume_payload, 20)
+
+    results = [outcome["result"] for outcome in service.predict_batch(resumes)]
+
+    assert [result["userId"] for result in results] == [resume.userId for resume in resumes]
+    versions = [result["modelVersion"] for result in results]
+    assert set(versions) == {"candidate", service.model_version}
+    assert versions == [
+        "candidate" if service.ab_split.routes_to_candidate(resume.userId) else service.model_version
+        for resume in resumes
+    ]
+
+
+def test_ab_candidate_with_other_class_order_decodes_its_own_classes(service, pickled, sample_resume_payload):
+    """Test that a candidate's label and probability list are decoded with the candidate's classes."""
+    arrays = dict(service.engine.arrays(), max_depth=service.engine.max_depth,
+                  n_features=service.engine.n_features_in_)
+    # Same trees with the class columns reversed: the same answers under another class order
+    arrays.update(classes=service.engine.classes_[::-1], values=service.engine.values[:, ::-1])
+    reversed_engine = CompiledForest(**arrays)
+    resume = ResumePayload(**sample_resume_payload)
+    expected = service.predict(resume)
+
+    service.set_ab_split(CandidateModel("reversed", reversed_engine, pickled[1]['level_mapping']), 1.0)
+    result = service.predict(resume)
+
+    assert result["modelVersion"] == "reversed"
+    assert result["predictedExperienceLevel"] == expected["predictedExperienceLevel"]
+    assert result["probabilities"][0]["level"] == result["predictedExperienceLevel"]
+    assert sorted((p["level"], p["probability"]) for p in result["probabilities"]) == pytest.approx(
+        sorted((p["level"], p["probability"]) for p in expected["probabilities"]))
+
+
+def test_experiments_are_shared_across_swapped_versions(pickled, renamed_vocabulary, candidate_path,
+                                                       sample_resume_payload):
+    """Test that services of later versions reuse the candidates, unless they read other features."""
+    experiments = ModelExperiments(SimpleNamespace(shadow_models=[candidate_path], shadow_queue_size=16,
+                                                   ab_candidate=candidate_path, ab_weight=0.0))
+    first = ResumeClassifierService(*pickled, experiments)
+    swapped = ResumeClassifierService(*pickled, experiments)
+    other_features = ResumeClassifierService(*renamed_vocabulary, experiments)
+    resume = ResumePayload(**sample_resume_payload)
+
+    first.predict(resume, use_cache=False)
+    swapped.predict(resume, use_cache=False)
+    experiments.shadow_evaluator.drain()
+    stats = swapped.experiment_stats()
+    experiments.shutdown()
+
+    assert swapped.shadow_evaluator is first.shadow_evaluator and swapped.ab_split is first.ab_split
+    assert stats["shadow"]["models"]["candidate"]["rows"] == 2
+    assert stats["ab_split"]["routed"] == {"primary": 2, "candidate": 0}
+    assert other_features.experiment_stats() == {"shadow": {"enabled": False}, "ab_split": {"enabled": False}}
+    assert not experiments.shadow_evaluator._worker
+
+
+def test_candidates_that_fail_to_load_leave_the_primary_serving(pickled, renamed_vocabulary, candidate_path,
+                                                                tmp_path, sample_resume_payload):
+    """Test that a missing shadow model and a mismatched A/B candidate are left out, not fatal."""
+    export_array_artifacts(*renamed_vocabulary, str(tmp_path), version="renamed")
+    experiments = ModelExperiments(SimpleNamespace(
+        shadow_models=[str(tmp_path / "missing"), candidate_path], shadow_queue_size=16,
+        ab_candidate=str(tmp_path / "renamed"), ab_weight=1.0))
+
+    service = ResumeClassifierService(*pickled, experiments)
+    result = service.predict(ResumePayload(**sample_resume_payload), use_cache=False)
+    experiments.shutdown()
+
+    assert result["modelVersion"] == service.model_version
+    assert service.ab_split is None
+    assert [candidate.name for candidate in service.shadow_evaluator.candidates] == ["candidate"]
+
+
+def test_warm_up_is_not_counted_in_experiment_stats(pickled, candidate_path, sample_resume_payload):
+    """Test that only real traffic reaches the shadow and A/B statistics."""
+    experiments = ModelExperiments(SimpleNamespace(shadow_models=[candidate_path], shadow_queue_size=16,
+                                                   ab_candidate=candidate_path, ab_weight=0.0))
+    service = ResumeClassifierService(*pickled, experiments)
+
+    warm_up_service(service)
+    warmed_up = service.experiment_stats()
+    service.predict(ResumePayload(**sample_resume_payload), use_cache=False)
+    experiments.shadow_evaluator.drain()
+    served = service.experiment_stats()
+    experiments.shutdown()
+
+    assert (warmed_up["shadow"]["submitted"], warmed_up["ab_split"]["routed"]) == (0, {"primary": 0, "candidate": 0})
+    assert (served["shadow"]["submitted"], served["ab_split"]["routed"]) == (1, {"primary": 1, "candidate": 0})
+
+
+def test_candidate_with_other_vocabulary_is_rejected(service, renamed_vocabulary, tmp_path):
+    """Test that a candidate with the primary's column count but another vocabulary cannot be attached."""
+    export_array_artifacts(*renamed_vocabulary, str(tmp_path), version="renamed")
+
+    with pytest.raises(ValueError, match="other features"):
+        load_candidate(str(tmp_path / "renamed"), service.engine.n_features_in_, service.layout_signature)
+
+
+def test_candidate_with_other_feature_count_is_rejected(candidate_path):
+    """Test that a candidate built on a different feature layout cannot be attached."""
+    with pytest.raises(ValueError, match="features"):
+        load_candidate(candidate_path, 10)
@@ -0,0 +1,49 @@
+"""
+Tests for background loading of the classifier.
+"""
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.model_loader import ModelLoader, ModelNotReadyError
+
+
+def test_load_warms_up_once_and_notifies():
+    """Test that loading builds the service once, warms it up and reports it ready."""
+    built, warmed, notified = [], [], []
+
+    def factory():
+        built.append(object())
+        return built[-1]
+
+    loader = ModelLoader(factory, warm_up=warmed.append, on_ready=notified.append)
+    with pytest.raises(ModelNotReadyError):
+        loader.require()
+
+    service = loader.load()
+    loader.start()
+
+    assert loader.wait(timeout=1)
+    assert loader.load() is service
+    assert built == [service]
+    assert warmed == [service]
+    assert notified == [service]
+    assert loader.status()["state"] == "ready"
+
+
+def test_failed_load_is_reported():
+    """Test that an exception while loading leaves the loader failed with the error message."""
+    def factory():
+        raise FileNotFoundError("ml/missing.pkl")
+
+    loader = ModelLoader(factory)
+    loader.start()
+
+    assert not loader.wait(timeout=5)
+    assert loader.status()["state"] == "failed"
+    with pytest.raises(ModelNotReadyError, match="missing.pkl"):
+        loader.require()
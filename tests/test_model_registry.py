@@ -0,0 +1,112 @@
+"""
+Tests for the model registry: hot reload, validation, pinning and rollback.
+"""
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app.main as main_module
+from app.config import config
+from app.ml.array_artifacts import export_array_artifacts
+from app.models import ResumePayload
+from app.services.model_registry import ModelRegistry, RegistryError
+from app.services.prediction_service import ResumeClassifierService
+from app.utils import load_model_artifacts
+
+
+@pytest.fixture(scope="module")
+def pickled():
+    return load_model_artifacts(config.model.model_path, config.model.preprocessors_path)
+
+
+@pytest.fixture
+def registry_root(pickled, tmp_path):
+    export_array_artifacts(*pickled, str(tmp_path), version="v1")
+    return tmp_path
+
+
+def _registry(root, **kwargs):
+    return ModelRegistry(str(root), service_factory=ResumeClassifierService, **kwargs)
+
+
+def test_new_version_is_swapped_in_and_old_service_keeps_working(pickled, registry_root, sample_resume_payload):
+    """Test that publishing a version swaps it in, while a service held by a request still answers."""
+    registry = _registry(registry_root)
+    old_service = registry.load_active()
+    assert registry.active_version == "v1"
+
+    export_array_artifacts(*pickled, str(registry_root), version="v2")
+    assert registry.refresh()
+
+    resume = ResumePayload(**sample_resume_payload)
+    assert registry.active.service.predict(resume)["modelVersion"] == "v2"
+    assert old_service.predict(resume)["modelVersion"] == "v1"
+    assert registry.status()["previous_versions"] == ["v1"]
+    assert not registry.refresh()
+
+
+def test_broken_version_is_not_served(registry_root):
+    """Test that a version failing to load is recorded and the active version keeps serving."""
+    registry = _registry(registry_root)
+    registry.load_active()
+    broken = registry_root / "v2"
+    broken.mkdir()
+    (broken / "manifest.json").write_text("{}", encoding="utf-8")
+    (registry_root / "LATEST").write_text("v2\n")
+
+    assert not registry.refresh()
+    assert registry.active_version == "v1"
+    assert "v2" in registry.status()["failed_versions"]
+
+
+def test_rollback_restores_and_pins_previous_version(pickled, registry_root):
+    """Test that rollback serves the previous version again and is not undone by LATEST."""
+    swapped = []
+    registry = _registry(registry_root, on_swap=swapped.append)
+    registry.load_active()
+    export_array_artifacts(*pickled, str(registry_root), version="v2")
+    registry.refresh()
+
+    assert registry.rollback() == "v1"
+    assert registry.active_version == "v1"
+    assert registry.pinned_version == "v1"
+    assert not registry.refresh()
+    assert [service.model_version for service in swapped] == ["v1", "v2", "v1"]
+
+    registry.pin(None)
+    assert registry.refresh()
+    assert registry.active_version == "v2"
+    with pytest.raises(RegistryError):
+        registry.pin("v9")
+
+
+def test_admin_rollback_endpoint(monkeypatch, pickled, registry_root, sample_resume_payload):
+    """Test that rollback requires the admin token and changes the version reported by the API."""
+    registry = _registry(registry_root)
+    loader = main_module.ModelLoader(registry.load_active, on_ready=main_module.inference_executor.set_service)
+    registry.on_swap = loader.replace
+    # Restored after the test, like the patched module attributes
+    monkeypatch.setattr(main_module.inference_executor, "_service", main_module.inference_executor._service)
+    monkeypatch.setattr(main_module, "model_registry", registry)
+    monkeypatch.setattr(main_module, "model_loader", loader)
+    monkeypatch.setattr(config.api, "admin_token", "secret")
+    loader.load()
+    export_array_artifacts(*pickled, str(registry_root), version="v2")
+    registry.refresh()
+    client = TestClient(main_module.app)
+
+    assert client.get("/").json()["modelVersion"] == "v2"
+    assert client.post("/classify-resume/", json=sample_resume_payload).json()["modelVersion"] == "v2"
+    assert client.post("/admin/model/rollback").status_code == 401
+    response = client.post("/admin/model/rollback", headers={"X-Admin-Token": "secret"})
+
+    assert response.status_code == 200
+    assert response.json() == {"activeVersion": "v1", "pinnedVersion": "v1"}
+    assert client.get("/").json()["modelVersion"] == "v1"
+    assert client.post("/classify-resume/", json=sample_resume_payload).json()["modelVersion"] == "v1"
+    assert client.post("/admin/model/rollback", headers={"X-Admin-Token": "secret"}).json()["activeVersion"] == "v2"
@@ -0,0 +1,137 @@
+"""
+Tests for the content-addressed prediction cache.
+"""
+import os
+import sys
+from datetime import date
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models import ResumePayload
+from app.services.prediction_cache import (
+    InMemoryCacheBackend,
+    KeyValueCacheBackend,
+    PredictionCache,
+    resume_fingerprint,
+)
+from app.services.prediction_service import ResumeClassifierService
+
+
+class FakeRedis:
+    """Local stand-in for a shared Redis server."""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+        self.expiry[key] = ex
+
+
+def test_fingerprint_ignores_contact_details(sample_resume_payload):
+    """Test that editing phone or email keeps the fingerprint while feature fields change it."""
+    base = ResumePayload(**sample_resume_payload).model_dump()
+    contact_changed = ResumePayload(
+        **dict(sample_resume_payload, phone="11 99999 0000", email="outro@email.com")
+    ).model_dump()
+    summary_changed = ResumePayload(**dict(sample_resume_payload, summary="Outro resumo")).model_dump()
+    today = date(2025, 7, 1)
+
+    assert resume_fingerprint(base, today) == resume_fingerprint(contact_changed, today)
+    assert resume_fingerprint(base, today) != resume_fingerprint(summary_changed, today)
+    assert resume_fingerprint(base, today) != resume_fingerprint(base, date(2025, 7, 2))
+
+
+class UnreachableRedis:
+    """Client whose server cannot be reached."""
+
+    def get(self, key):
+        raise ConnectionError("Connection refused")
+
+    def set(self, key, value, ex=None):
+        raise ConnectionError("Connection refused")
+
+
+def test_in_memory_backend_evicts_least_recently_used():
+    """Test that the LRU drops the entry used longest ago and counts the eviction."""
+    cache = PredictionCache(InMemoryCacheBackend(max_entries=2, ttl_seconds=60), "v1")
+    cache.put("a", {"value": 1})
+    cache.put("b", {"value": 2})
+    cache.get("a")
+    cache.put("c", {"value": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    assert cache.get("c") == {"value": 3}
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_in_memory_backend_expires_entries():
+    """Test that entries older than the TTL are not served."""
+    cache = PredictionCache(InMemoryCacheBackend(max_entries=10, ttl_seconds=0), "v1")
+    cache.put("a", {"value": 1})
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_model_version_change_invalidates_entries():
+    """Test that entries of a previous model version are never served."""
+    cache = PredictionCache(InMemoryCacheBackend(max_entries=10, ttl_seconds=60), "v1")
+    cache.put("a", {"value": 1})
+    cache.set_model_version("v2")
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_shared_backend_is_visible_across_caches():
+    """Test that two caches on the same shared store see each other's entries."""
+    server = FakeRedis()
+    writer = PredictionCache(KeyValueCacheBackend(server, ttl_seconds=30), "v1")
+    reader = PredictionCache(KeyValueCacheBackend(server, ttl_seconds=30), "v1")
+    writer.put("a", {"value": 1})
+
+    assert reader.get("a") == {"value": 1}
+    assert set(server.expiry.values()) == {30}
+    reader.set_model_version("v2")
+    assert reader.get("a") is None
+
+
+def test_service_serves_repeated_resume_from_cache(sample_resume_payload):
+    """Test that a re-submitted resume is answered from the cache with the same result."""
+    service = ResumeClassifierService()
+    service.prediction_cache = PredictionCache(
+        InMemoryCacheBackend(max_entries=10, ttl_seconds=60), service.model_version
+    )
+    first = service.predict(ResumePayload(**sample_resume_payload))
+    second = service.predict(ResumePayload(**dict(sample_resume_payload, phone="11 99999 0000")))
+
+    assert service.prediction_cache.stats()["hits"] == 1
+    assert second["predictedExperienceLevel"] == first["predictedExperienceLevel"]
+    assert second["confidenceScore"] == first["confidenceScore"]
+    assert second["hash"] != first["hash"]
+
+
+def test_unreachable_shared_cache_does_not_fail_classification(sample_resume_payload):
+    """Test that client errors count as misses and the resumes are still classified."""
+    service = ResumeClassifierService()
+    service.prediction_cache = PredictionCache(KeyValueCacheBackend(UnreachableRedis(), ttl_seconds=30),
+                                               service.model_version)
+    resume = ResumePayload(**sample_resume_payload)
+
+    result = service.predict(resume)
+    outcomes = service.predict_batch([resume, resume])
+
+    assert [outcome["error"] for outcome in outcomes] == [None, None]
+    assert outcomes[0]["result"]["predictedExperienceLevel"] == result["predictedExperienceLevel"]
+    stats = service.prediction_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["errors"]) == (0, 3, 6)
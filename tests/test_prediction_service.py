@@ -0,0 +1,196 @@
+"""
+Tests for the feature preprocessing paths of ResumeClassifierService.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ml.tfidf import FragmentCountCache, TfidfTables
+from app.models import ResumePayload
+from app.services.prediction_service import ResumeClassifierService
+from app.utils import extract_features_batch, extract_features_for_prediction
+
+
+@pytest.fixture(scope="module")
+def service():
+    return ResumeClassifierService()
+
+
+@pytest.fixture
+def features_list(sample_resume_payload):
+    unseen = {
+        "level": "Pós-doutorado",
+        "courseName": "Pós-doutorado em Design",
+        "institution": "Almeida",
+    }
+    experience = dict(sample_resume_payload["professionalExperiences"][0])
+    experience["activitiesPerformed"] = [{
+        "activity": "Liderei a migração para Rust",
+        "technologies": ["Rust", "DevOps"],
+        "appliedSoftSkills": ["Empatia", "Liderança"],
+    }]
+    resumes = [
+        sample_resume_payload,
+        dict(sample_resume_payload, userId="no_experience", professionalExperiences=[]),
+        dict(sample_resume_payload, userId="no_formation", academicFormations=[]),
+        dict(sample_resume_payload, userId="unseen_tokens", academicFormations=[unseen],
+             professionalExperiences=[experience]),
+    ]
+    return [extract_features_for_prediction(ResumePayload(**r).model_dump()) for r in resumes]
+
+
+def test_layout_matches_pandas_pipeline(service, features_list):
+    """Test that the precompiled layout writes the same rows as the sklearn preprocessors."""
+    expected = service._preprocess_batch_with_pandas(features_list)
+    rows = service.feature_layout.transform(features_list)
+
+    assert rows.dtype == np.float32
+    assert np.array_equal(rows, expected.astype(np.float32))
+    assert np.array_equal(service.engine.predict_proba(rows), service.engine.predict_proba(expected))
+
+
+def test_layout_sparse_matches_pandas_pipeline(service, features_list):
+    """Test that the layout's CSR output equals the sparse sklearn pipeline."""
+    expected = service._preprocess_batch_with_pandas(features_list, sparse_output=True)
+    rows = service.feature_layout.transform_sparse(features_list)
+
+    assert np.array_equal(rows.toarray(), expected.toarray())
+
+
+def test_sparse_features_match_dense(service, features_list):
+    """Test that the CSR feature path builds the same matrix as the dense path."""
+    dense = service._preprocess_batch(features_list)
+    csr = service._preprocess_batch(features_list, sparse_output=True)
+
+    assert sparse.isspmatrix_csr(csr)
+    assert csr.shape == dense.shape
+    # The dense rows are float32, the precision the forest compares features in
+    assert np.array_equal(csr.toarray().astype(np.float32), dense)
+
+
+def test_model_scores_sparse_features_like_dense(service, features_list):
+    """Test that the forest gives identical probabilities for CSR and dense input."""
+    dense = service._preprocess_batch(features_list)
+    csr = service._preprocess_batch(features_list, sparse_output=True)
+
+    assert np.array_equal(service.engine.predict_proba(csr), service.engine.predict_proba(dense))
+    assert np.array_equal(service.model.predict_proba(csr), service.model.predict_proba(dense))
+
+
+def _experience(start, end, activity="Entreguei APIs", technologies=("Python",)):
+    return {"startDate": start, "endDate": end, "activitiesPerformed": [
+        {"activity": activity, "problemSolved": "Reduzi custos", "technologies": list(technologies),
+         "appliedSoftSkills": ["Comunicação"]}
+    ]}
+
+
+@pytest.fixture
+def raw_resumes(sample_resume_payload):
+    return [
+        ResumePayload(**sample_resume_payload).model_dump(),
+        dict(sample_resume_payload, professionalExperiences=[]),
+        # Leap day starts, anniversaries not yet reached, time zones and open-ended experiences
+        dict(sample_resume_payload, professionalExperiences=[
+            _experience("2020-02-29", "2021-02-28"),
+            _experience("2016-02-29", "2024-02-29T10:00:00+03:00", technologies=("Go", "Python", "Go")),
+            _experience("2015-12-31T23:30:00-02:00", "2016-12-31", activity=""),
+            _experience("2019-06-27", None),
+            _experience(None, "2020-01-01"),
+        ]),
+        dict(sample_resume_payload, summary=None, professionalExperiences=[_experience("2019-01-01", "")]),
+        dict(sample_resume_payload, summary=None, professionalExperiences=[]),
+        dict(sample_resume_payload, professionalExperiences=[_experience("not a date", None)]),
+        dict(sample_resume_payload, academicFormations=[]),
+    ]
+
+
+def test_batch_extraction_matches_single_resume(raw_resumes):
+    """Test that every column row equals the single-resume features, including its failures."""
+    columns = extract_features_batch(raw_resumes)
+
+    assert len(columns) == len(raw_resumes)
+    for row, resume_data in enumerate(raw_resumes):
+        try:
+            expected = extract_features_for_prediction(resume_data)
+        except Exception as e:
+            assert columns.errors[row] == str(e)
+            continue
+        assert columns.errors[row] is None
+        features = columns.row(row)
+        assert features == expected
+        assert [type(features[key]) for key in expected] == [type(value) for value in expected.values()]
+
+
+def test_batch_extraction_uses_one_reference_time(raw_resumes):
+    """Test that open-ended experiences count up to the given reference time."""
+    from datetime import datetime
+    columns = extract_features_batch(raw_resumes, now=datetime(2019, 6, 27))
+
+    assert columns.row(2)["totalYearsExperience"] == 0 + 8 + 1 + 0
+
+
+def test_layout_transforms_columns_like_rows(service, raw_resumes):
+    """Test that a FeatureColumns batch is preprocessed like the equivalent feature rows."""
+    columns = extract_features_batch(raw_resumes)
+    valid = [row for row, error in enumerate(columns.errors) if error is None and columns.full_text[row] is not None]
+    columns = columns.take(valid)
+
+    assert np.array_equal(service.feature_layout.transform(columns), service.feature_layout.transform(columns.rows()))
+    assert np.array_equal(service.feature_layout.transform_sparse(columns).toarray(),
+                          service.feature_layout.transform_sparse(columns.rows()).toarray())
+
+
+def test_fragment_cache_matches_vectorizer(service, raw_resumes):
+    """Test that summed per-fragment counts give exactly the TF-IDF of the joined text."""
+    vectorizer = service.artifacts['tfidf_vectorizer']
+    cache = FragmentCountCache(TfidfTables.from_vectorizer(vectorizer), max_entries=100)
+    features = [extract_features_for_prediction(resume_data) for resume_data in raw_resumes[:3]]
+    # Case and punctuation at fragment edges, fragments with stop words only, repeated fragments
+    fragments = [f["textFragments"] for f in features] + [["", "Usei Python,", "e de", "python!"]] * 2
+    texts = [" ".join(row) for row in fragments]
+
+    rows = cache.transform(fragments)
+
+    expected = vectorizer.transform(texts)
+    assert np.array_equal(rows.indptr, expected.indptr)
+    assert np.array_equal(rows.indices, expected.indices)
+    assert np.array_equal(rows.data, expected.data)
+    assert [f["fullText"] for f in features] == texts[:3]
+    assert cache.stats()["hits"] > 0
+
+
+def test_fragment_cache_is_bounded(service):
+    """Test that the least recently used fragments are evicted beyond max_entries."""
+    cache = FragmentCountCache(TfidfTables.from_vectorizer(service.artifacts['tfidf_vectorizer']), max_entries=2)
+
+    cache.transform([["Python"], ["Docker"], ["Python"], ["Kubernetes"]])
+    cache.transform([["Python"]])
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+
+
+def test_layout_with_fragment_cache_matches_layout_without(service, raw_resumes):
+    """Test that the cached text path writes the same model input, for rows and columns."""
+    columns = extract_features_batch(raw_resumes)
+    columns = columns.take([row for row, error in enumerate(columns.errors)
+                            if error is None and columns.full_text[row] is not None])
+    layout = service.feature_layout
+    previous = layout.fragment_cache
+    try:
+        layout.fragment_cache = None
+        expected = layout.transform(columns)
+        layout.cache_text_fragments(max_entries=100)
+        assert np.array_equal(layout.transform(columns), expected)
+        assert np.array_equal(layout.transform(columns.rows()), expected)
+        assert np.array_equal(layout.transform_sparse(columns).toarray().astype(np.float32), expected)
+    finally:
+        layout.fragment_cache = previous
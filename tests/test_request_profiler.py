@@ -0,0 +1,118 @@
+"""
+Tests for on-demand request profiling.
+"""
+import os
+import pstats
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app.main as main_module
+from app.config import config
+from app.services.request_profiler import RequestProfile, RequestProfiler, current_profile, record_stage
+
+STAGES = ("validation", "extract_features", "preprocess", "inference", "hash", "predict")
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    main_module.model_loader.load()
+    monkeypatch.setattr(config.api, "admin_token", "secret")
+    monkeypatch.setattr(main_module, "request_profiler", RequestProfiler(output_dir=str(tmp_path), max_files=2))
+    return TestClient(main_module.app)
+
+
+def _server_timing(response):
+    return dict(entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", "))
+
+
+def test_admin_header_profiles_request(client, tmp_path, sample_resume_payload):
+    """Test that X-Profile returns the stage breakdown and saves a loadable profile."""
+    response = client.post("/classify-resume/", json=sample_resume_payload,
+                           headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+
+    assert response.status_code == 200
+    timings = _server_timing(response)
+    assert set(timings) == set(STAGES)
+    assert all(float(duration) >= 0 for duration in timings.values())
+    [profile_file] = os.listdir(tmp_path)
+    assert response.headers["X-Profile-Id"] in profile_file
+    assert pstats.Stats(str(tmp_path / profile_file)).total_calls > 0
+
+
+def test_profile_header_requires_admin_token(client, sample_resume_payload):
+    """Test that only admins can ask for a profile."""
+    response = client.post("/classify-resume/", json=sample_resume_payload,
+                           headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+
+    assert response.status_code == 401
+
+
+def test_requests_are_not_profiled_by_default(client, tmp_path, sample_resume_payload):
+    """Test that without the header and sampling, nothing is profiled or saved."""
+    response = client.post("/classify-resume/", json=sample_resume_payload)
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+    assert os.listdir(tmp_path) == []
+
+
+def test_sampled_requests_are_profiled_and_old_profiles_pruned(client, monkeypatch, tmp_path, sample_resume_payload):
+    """Test that a sample rate of 1 profiles every request, keeping only max_files profiles."""
+    monkeypatch.setattr(main_module, "request_profiler",
+                        RequestProfiler(sample_rate=1.0, output_dir=str(tmp_path), max_files=2))
+
+    for _ in range(3):
+        response = client.post("/classify-resume/", json=sample_resume_payload)
+        assert set(_server_timing(response)) == set(STAGES)
+
+    assert len(os.listdir(tmp_path)) == 2
+    assert all("-sampled-" in name for name in os.listdir(tmp_path))
+
+
+def test_one_request_is_profiled_at_a_time(client, monkeypatch, tmp_path, sample_resume_payload):
+    """Test that while a profile runs, a requested profile is refused and sampling is skipped."""
+    profiler = RequestProfiler(sample_rate=1.0, output_dir=str(tmp_path))
+    monkeypatch.setattr(main_module, "request_profiler", profiler)
+    # Held by the test as if another request were being profiled
+    profiler._slot.acquire()
+    try:
+        refused = client.post("/classify-resume/", json=sample_resume_payload,
+                              headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+        sampled = client.post("/classify-resume/", json=sample_resume_payload)
+    finally:
+        profiler._slot.release()
+
+    assert refused.status_code == 409
+    assert sampled.status_code == 200 and "Server-Timing" not in sampled.headers
+    assert os.listdir(tmp_path) == []
+    assert not profiler.busy
+
+
+def test_sampled_request_losing_the_profiler_is_answered_unprofiled(client, monkeypatch, tmp_path,
+                                                                    sample_resume_payload):
+    """Test the race where the profiler is taken between sampling and profiling."""
+    profiler = RequestProfiler(sample_rate=1.0, output_dir=str(tmp_path))
+    monkeypatch.setattr(main_module, "request_profiler", profiler)
+    monkeypatch.setattr(profiler, "sampled", lambda: profiler._slot.acquire() or True)
+
+    response = client.post("/classify-resume/", json=sample_resume_payload)
+    profiler._slot.release()
+
+    assert response.status_code == 200 and "Server-Timing" not in response.headers
+
+
+def test_stages_reach_only_the_active_profile():
+    """Test that record_stage feeds the profile set in the current context only."""
+    profile = RequestProfile("requested")
+    record_stage("hash", 0.5)
+    token = current_profile.set(profile)
+    record_stage("hash", 0.25)
+    current_profile.reset(token)
+
+    assert profile.stages == [("hash", 0.25)]
+    assert profile.server_timing() == "hash;dur=250.000"
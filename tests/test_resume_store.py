@@ -0,0 +1,143 @@
+"""
+Tests for stored resumes and incremental re-classification.
+"""
+import copy
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app.main as main_module
+from app.models import ResumePatchOperation, ResumePayload
+from app.services.resume_store import InvalidPatchError, ResumeStore
+from app.utils import extract_features_for_prediction
+
+NEW_EXPERIENCE = {
+    "companyName": "Oliveira",
+    "role": "Pleno em UI/UX Design",
+    "startDate": "2018-03-01",
+    "endDate": "2021-02-15",
+    "activitiesPerformed": [{
+        "activity": "Liderei a migração do design system para componentes acessíveis",
+        "problemSolved": "Reduzi o retrabalho das squads em 30%",
+        "technologies": ["Figma", "React"],
+        "appliedSoftSkills": ["Liderança", "Comunicação"],
+    }],
+}
+
+
+@pytest.fixture(scope="module")
+def service():
+    return main_module.model_loader.load()
+
+
+@pytest.fixture
+def client(service, monkeypatch):
+    monkeypatch.setattr(main_module, "resume_store", ResumeStore(max_entries=10))
+    return TestClient(main_module.app)
+
+
+def _operations(sample_resume_payload):
+    formation = {"level": "Doutorado", "courseName": "Doutorado em Design", "institution": "Almeida"}
+    updated = copy.deepcopy(sample_resume_payload["professionalExperiences"][0])
+    updated["activitiesPerformed"][0]["technologies"] = ["Rust", "Figma"]
+    return [
+        {"op": "add", "section": "professionalExperiences", "value": NEW_EXPERIENCE},
+        {"op": "update", "section": "professionalExperiences", "index": 0, "value": updated},
+        {"op": "add", "section": "academicFormations", "index": 0, "value": formation},
+    ]
+
+
+def _apply(resume, operations):
+    """Reference: the patched resume, edited as a plain dict."""
+    resume = copy.deepcopy(resume)
+    for operation in operations:
+        entries = resume[operation["section"]]
+        if operation["op"] == "add":
+            entries.insert(operation.get("index", len(entries)), operation["value"])
+        elif operation["op"] == "update":
+            entries[operation["index"]] = operation["value"]
+        else:
+            del entries[operation["index"]]
+    return resume
+
+
+def test_patched_features_match_full_extraction(service, sample_resume_payload):
+    """Test that features reassembled from partials equal those extracted from the patched resume."""
+    store = ResumeStore(max_entries=10)
+    layout = service.feature_layout
+    store.put("r1", ResumePayload(**sample_resume_payload), layout)
+    operations = _operations(sample_resume_payload) + [
+        {"op": "remove", "section": "professionalExperiences", "index": 1},
+    ]
+
+    for count in range(1, len(operations) + 1):
+        resume_data, features, text_counts = store.patch(
+            "r1", [ResumePatchOperation(**operations[count - 1])], layout
+        )
+        expected = extract_features_for_prediction(
+            ResumePayload(**_apply(sample_resume_payload, operations[:count])).model_dump()
+        )
+
+        assert features == expected
+        assert text_counts == layout.text_counts(expected["textFragments"])
+        assert resume_data == ResumePayload(**_apply(sample_resume_payload, operations[:count])).model_dump()
+
+
+def test_patch_recomputes_only_changed_experiences(service, sample_resume_payload):
+    """Test that experiences a patch does not touch keep their partials."""
+    store = ResumeStore(max_entries=10)
+    layout = service.feature_layout
+    store.put("r1", ResumePayload(**sample_resume_payload), layout)
+    untouched = list(store._entries["r1"].experiences)
+
+    store.patch("r1", [ResumePatchOperation(op="add", section="professionalExperiences", value=NEW_EXPERIENCE)],
+                layout)
+
+    assert store._entries["r1"].experiences[:-1] == untouched
+    assert store._entries["r1"].experiences[-1] not in untouched
+
+
+def test_patch_endpoint_matches_full_classification(client, service, sample_resume_payload):
+    """Test that PATCH answers exactly what classifying the whole patched resume answers."""
+    operations = _operations(sample_resume_payload)
+    params = {"include_probabilities": "true"}
+    assert client.put("/resumes/r1", json=sample_resume_payload, params=params).status_code == 200
+
+    response = client.patch("/resumes/r1", json={"operations": operations}, params=params)
+
+    assert response.status_code == 200
+    patched = ResumePayload(**_apply(sample_resume_payload, operations))
+    assert response.json() == service.predict(patched, use_cache=False)
+
+
+def test_invalid_patch_leaves_stored_resume_unchanged(client, sample_resume_payload):
+    """Test that a failing operation rejects the whole patch."""
+    client.put("/resumes/r1", json=sample_resume_payload)
+    before = main_module.resume_store._entries["r1"]
+    operations = [
+        {"op": "add", "section": "professionalExperiences", "value": NEW_EXPERIENCE},
+        {"op": "remove", "section": "academicFormations", "index": 5},
+    ]
+
+    response = client.patch("/resumes/r1", json={"operations": operations})
+
+    assert response.status_code == 422
+    assert "operations.1" in response.json()["detail"]
+    assert main_module.resume_store._entries["r1"] is before
+    with pytest.raises(InvalidPatchError, match="needs a value"):
+        before.patched([ResumePatchOperation(op="update", section="academicFormations", index=0)])
+
+
+def test_unknown_or_deleted_resume_is_not_found(client, sample_resume_payload):
+    """Test that patching a resume that is not stored answers 404."""
+    operations = {"operations": [{"op": "remove", "section": "academicFormations", "index": 0}]}
+    client.put("/resumes/r1", json=sample_resume_payload)
+
+    assert client.delete("/resumes/r1").status_code == 204
+    assert client.patch("/resumes/r1", json=operations).status_code == 404
+    assert client.delete("/resumes/r1").status_code == 404
@@ -0,0 +1,110 @@
+"""
+Tests for recruiter feedback and warm-start retraining.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app.main as main_module
+from app.ml.retraining import claim_feedback, retrain
+from app.ml.training import train
+from app.models import ResumePayload
+from app.services.feedback_log import FeedbackLog
+from app.services.model_registry import ModelRegistry, load_version_artifacts
+from app.services.prediction_service import ResumeClassifierService
+from test_training import labelled_resumes
+
+
+@pytest.fixture(scope="module")
+def base_version(tmp_path_factory):
+    """A small trained version, as the registry's current one."""
+    root = tmp_path_factory.mktemp("registry")
+    dataset = root.parent / "dataset.jsonl"
+    dataset.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in labelled_resumes(40)),
+                       encoding="utf-8")
+    train(str(dataset), str(root / "base"), n_estimators=8, n_jobs=1)
+    (root / "LATEST").write_text("base\n")
+    return root
+
+
+@pytest.fixture
+def feedback_path(tmp_path):
+    log = FeedbackLog(str(tmp_path / "feedback" / "feedback.jsonl"))
+    for resume in labelled_resumes(12, seed=9):
+        level = resume.pop("experienceLevel")
+        resume["professionalExperiences"][0]["activitiesPerformed"][0]["technologies"].append("Elixir")
+        log.record(resume, level, predicted_level="Pleno", model_version="base")
+    return log.path
+
+
+def test_feedback_endpoint_appends_labelled_resumes(monkeypatch, tmp_path, sample_resume_payload):
+    """Test that feedback is stored with the submitted resume and rejected when malformed."""
+    log = FeedbackLog(str(tmp_path / "feedback.jsonl"))
+    monkeypatch.setattr(main_module, "feedback_log", log)
+    client = TestClient(main_module.app)
+
+    response = client.post("/feedback", json={"resume": sample_resume_payload, "experienceLevel": "Pleno",
+                                              "predictedExperienceLevel": "Júnior", "modelVersion": "v1"})
+    assert response.status_code == 201
+    assert response.json() == {"status": "recorded", "corrected": True}
+    assert client.post("/feedback", json={"resume": sample_resume_payload,
+                                          "experienceLevel": "Estagiário"}).status_code == 422
+    assert client.post("/feedback", json={"resume": {"summary": "sem userId"},
+                                          "experienceLevel": "Pleno"}).status_code == 422
+
+    [line] = (tmp_path / "feedback.jsonl").read_text(encoding="utf-8").splitlines()
+    record = json.loads(line)
+    assert record["experienceLevel"] == "Pleno"
+    assert record["professionalExperiences"] == sample_resume_payload["professionalExperiences"]
+    assert record["feedback"]["predictedExperienceLevel"] == "Júnior"
+
+
+def test_retrain_grows_the_forest_and_publishes_a_version(base_version, feedback_path):
+    """Test that new trees are added to the old ones and the result is served by the registry."""
+    base_model, _ = load_version_artifacts(str(base_version / "base"))
+
+    report = retrain([feedback_path], str(base_version), str(base_version), new_trees=4, n_jobs=1,
+                     random_state=1)
+
+    assert (report["base_version"], report["rows"]) == ("base", 12)
+    assert (report["trees_before"], report["trees_after"]) == (8, 12)
+    assert set(report["class_counts"]) == {"Júnior", "Pleno", "Sênior", "Especialista"}
+    assert report["unknown_tokens"]["technologies"]["top"] == [("Elixir", 12)]
+    assert (base_version / "LATEST").read_text().strip() == report["version"]
+
+    model, artifacts = load_version_artifacts(report["version_dir"])
+    assert model.n_jobs is None and not model.warm_start
+    for old, kept in zip(base_model.estimators_, model.estimators_):
+        assert np.array_equal(old.tree_.value, kept.tree_.value)
+    registry = ModelRegistry(str(base_version), service_factory=ResumeClassifierService)
+    service = registry.load_active()
+    assert registry.active_version == report["version"]
+    assert service.predict(ResumePayload(**labelled_resumes(1)[0]))["modelVersion"] == report["version"]
+
+
+def test_retrain_can_replace_the_oldest_trees(base_version, feedback_path):
+    """Test that replacing keeps the forest size."""
+    report = retrain([feedback_path], str(base_version / "base"), str(base_version), new_trees=3,
+                     replace_oldest=True, n_jobs=1, publish=False)
+
+    assert (report["trees_before"], report["trees_after"], report["version"]) == (8, 8, None)
+
+
+def test_retrain_requires_every_class(base_version, tmp_path):
+    """Test that feedback missing a level is refused instead of producing inconsistent trees."""
+    log = FeedbackLog(str(tmp_path / "feedback.jsonl"))
+    for resume in labelled_resumes(8):
+        if resume["experienceLevel"] != "Especialista":
+            log.record(resume, resume["experienceLevel"])
+
+    with pytest.raises(ValueError, match=r"classes \[3\]"):
+        retrain([claim_feedback(log.path)], str(base_version), str(base_version), n_jobs=1, publish=False)
+    assert not os.path.exists(log.path)
@@ -0,0 +1,121 @@
+"""
+Tests for the training pipeline.
+"""
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the path to allow importing from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ml.training import LEVEL_MAPPING, iter_dataset, read_training_columns, train, training_features
+from app.models import ResumePayload
+from app.services.prediction_service import ResumeClassifierService
+from app.utils import load_model_artifacts
+
+LEVEL_YEARS = {"Júnior": 1, "Pleno": 4, "Sênior": 8, "Especialista": 14}
+
+
+def labelled_resumes(count, seed=3):
+    rng = random.Random(seed)
+    resumes = []
+    for index in range(count):
+        level = list(LEVEL_YEARS)[index % len(LEVEL_YEARS)]
+        years = LEVEL_YEARS[level] + rng.randint(0, 2)
+        resumes.append({
+            "userId": f"user_{index}",
+            "experienceLevel": level,
+            "summary": f"{level} em desenvolvimento backend com foco em APIs",
+            "academicFormations": [{"level": rng.choice(["Graduação", "Mestrado", "Técnico"])}],
+            "professionalExperiences": [{
+                "role": f"{level} em Backend",
+                "startDate": f"{2024 - years}-01-10",
+                "endDate": "2024-01-10",
+                "activitiesPerformed": [{
+                    "activity": rng.choice(["Desenvolvi APIs REST", "Liderei a migração para nuvem"]),
+                    "problemSolved": "Reduzi a latência em 30%",
+                    "technologies": rng.sample(["Python", "Go", "Docker", "AWS", "SQL"], 2),
+                    "appliedSoftSkills": rng.sample(["Liderança", "Comunicação", "Empatia"], 1),
+                }],
+            }],
+        })
+    return resumes
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    resumes = labelled_resumes(48) + [{"userId": "unlabelled"}, {"userId": "other", "experienceLevel": "CEO"}]
+    path = tmp_path / "dataset.json"
+    path.write_text(json.dumps(resumes, ensure_ascii=False, indent=1), encoding="utf-8")
+    return path, resumes
+
+
+def test_json_array_and_jsonl_stream_the_same_resumes(dataset, tmp_path):
+    """Test that both formats yield every resume, even when items span read blocks."""
+    path, resumes = dataset
+    jsonl_path = tmp_path / "dataset.jsonl"
+    jsonl_path.write_text("\n".join(json.dumps(r) for r in resumes) + "\n\n", encoding="utf-8")
+
+    assert list(iter_dataset(str(path), block_size=7)) == resumes
+    assert list(iter_dataset(str(jsonl_path))) == resumes
+
+
+def test_truncated_json_array_is_rejected(tmp_path):
+    """Test that a JSON array cut short raises instead of training on part of it."""
+    path = tmp_path / "dataset.json"
+    path.write_text('[{"userId": "a"}, {"userId": ', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="closed"):
+        list(iter_dataset(str(path)))
+
+
+def test_training_features_follow_the_notebook(dataset):
+    """Test the notebook semantics: fractional years, highest formation, roles in the text."""
+    resume = {
+        "summary": "Resumo",
+        "academicFormations": [{"level": "Mestrado"}, {"level": "Graduação"}],
+        "professionalExperiences": [
+            {"role": "Dev", "startDate": "2020-01-01", "endDate": "2021-07-02", "activitiesPerformed": []},
+            {"role": "Tech Lead", "startDate": "2023-01-01T00:00:00Z", "isCurrent": True, "endDate": "2023-02-01",
+             "activitiesPerformed": [{"activity": "Liderei", "technologies": ["Go"], "appliedSoftSkills": None}]},
+        ],
+    }
+
+    features = training_features(resume, today=datetime(2024, 1, 1))
+
+    assert features["totalYearsExperience"] == round((548 + 365) / 365.25, 1)
+    assert features["avgYearsPerJob"] == round(features["totalYearsExperience"] / 2, 1)
+    assert features["highestEducationLevel"] == "Mestrado"
+    assert features["allTechnologies"] == ["Go"] and features["allSoftSkills"] == []
+    assert features["fullText"] == "Resumo Dev Tech Lead Liderei"
+
+    columns, skipped = read_training_columns(iter([resume, {"experienceLevel": "Pleno"}]))
+    assert (len(columns), skipped) == (1, 1)
+
+
+def test_train_writes_artifacts_the_service_loads(dataset, tmp_path, sample_resume_payload):
+    """Test that a trained model is saved in the served layout and classifies resumes."""
+    path, _ = dataset
+
+    report = train(str(path), str(tmp_path / "model"), chunk_size=5, n_jobs=2, n_estimators=10,
+                   arrays_root=str(tmp_path / "arrays"))
+
+    assert (report["rows"], report["skipped"]) == (48, 2)
+    assert [phase["phase"] for phase in report["phases"]] == [
+        "read_and_extract", "fit_preprocessors", "build_matrix", "fit_forest", "evaluate", "save_artifacts"
+    ]
+    assert all(phase["seconds"] >= 0 and phase["peak_rss_mb"] > 0 for phase in report["phases"])
+    assert report["evaluation"]["accuracy"] > 0.5
+    model, artifacts = load_model_artifacts(report["model_path"], report["preprocessors_path"])
+    assert model.n_jobs is None
+    assert artifacts["level_mapping"] == LEVEL_MAPPING
+    assert os.path.exists(os.path.join(report["arrays_dir"], "manifest.json"))
+
+    result = ResumeClassifierService(model, artifacts).predict(ResumePayload(**sample_resume_payload))
+    assert result["predictedExperienceLevel"] in LEVEL_MAPPING
+    assert np.isclose(sum(level["probability"] for level in result["probabilities"]), 1.0)